@@ -0,0 +1,319 @@
+"""
+Route finder benchmark suite
+Micro-benchmarks for GreenTravelAI.calculate_recommendations,
+get_transport_options and mock_distance_calculation, plus end-to-end
+throughput of views.recommend through Django's test client. The end-to-end
+runs use a scratch copy of db.sqlite3 and a scratch route cache, with
+routing served by the gazetteer ('offline') or by a local stub server
+(benchmarks/stub_maps.py) behind the real geopy / googlemaps clients ('osm',
+'google'); scenarios whose client library is missing are reported as skipped.
+Results are JSON; --compare flags p50/p99 and throughput regressions against
+an earlier run.
+
+Usage: python benchmarks/recommend.py [--output run.json] [--compare baseline.json]
+       [--scenarios offline,osm,google] [--requests 300] [--concurrency 1]
+       [--latency-ms 80] [--skip-micro] [--skip-e2e]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = ('offline', 'osm', 'google')
+# Stub key; the googlemaps client only checks the prefix
+STUB_GOOGLE_KEY = 'AIzaBenchmarkStubKey'
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _setup_django(scratch):
+    """Configure Django against a migrated scratch database and route cache"""
+    db_path = os.path.join(scratch, 'db.sqlite3')
+    shutil.copy(BASE_DIR / 'db.sqlite3', db_path)
+    os.environ['GREENTRAVEL_DB_PATH'] = db_path
+    os.environ['ROUTE_CACHE_DIR'] = os.path.join(scratch, 'routes')
+    os.environ.setdefault('GREENTRAVEL_LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentravel.settings')
+    sys.path.insert(0, str(BASE_DIR))
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def _city_pairs(count, cities, seed):
+    from recommendations.gazetteer import get_gazetteer
+    names = get_gazetteer().names[:cities]
+    rng = random.Random(seed)
+    pairs = []
+    while len(pairs) < count:
+        source, destination = rng.sample(names, 2)
+        pairs.append((source, destination))
+    return pairs
+
+
+def _micro(name, func, args_list, batch, samples):
+    """Per-call latency from `samples` timed batches of `batch` calls"""
+    per_call_us = []
+    for i in range(samples):
+        chunk = [args_list[(i * batch + j) % len(args_list)] for j in range(batch)]
+        t0 = time.perf_counter()
+        for args in chunk:
+            func(*args)
+        per_call_us.append((time.perf_counter() - t0) / batch * 1e6)
+    mean = sum(per_call_us) / len(per_call_us)
+    return {
+        'name': name,
+        'calls': batch * samples,
+        'p50_us': round(_percentile(per_call_us, 50), 3),
+        'p99_us': round(_percentile(per_call_us, 99), 3),
+        'mean_us': round(mean, 3),
+        'ops_per_sec': round(1e6 / mean, 1),
+    }
+
+
+def run_micro(args):
+    from recommendations.ai_logic import GreenTravelAI
+    from recommendations.views import mock_distance_calculation
+
+    rng = random.Random(args.seed)
+    trips = [(round(rng.uniform(1, 2500), 2), None, rng.randint(1, 4)) for _ in range(1000)]
+    pairs = _city_pairs(1000, args.cities, args.seed)
+    # Some misses so the default-distance path is exercised too
+    pairs += [(f'Nowhere {i}', source) for i, (source, _) in enumerate(pairs[:50])]
+
+    GreenTravelAI.calculate_recommendations(100.0)
+    results = [
+        _micro('calculate_recommendations', GreenTravelAI.calculate_recommendations, trips,
+               args.micro_batch, args.micro_samples),
+        _micro('get_transport_options', GreenTravelAI.get_transport_options, [(t[0],) for t in trips],
+               args.micro_batch, args.micro_samples),
+        _micro('mock_distance_calculation', mock_distance_calculation, pairs,
+               args.micro_batch, args.micro_samples),
+    ]
+    return results
+
+
+def _scenario_settings(scenario, stub):
+    overrides = {'ALLOWED_HOSTS': ['testserver'], 'OFFLINE_ROUTING': scenario == 'offline'}
+    if scenario == 'osm':
+        # The public Nominatim 1 req/s policy doesn't apply to the local stub
+        overrides.update(
+            GOOGLE_MAPS_API_KEY='', NOMINATIM_SCHEME='http', NOMINATIM_DOMAIN=stub.netloc, OUTBOUND_RATE_LIMITS={},
+        )
+    elif scenario == 'google':
+        overrides.update(GOOGLE_MAPS_API_KEY=STUB_GOOGLE_KEY, GOOGLE_MAPS_BASE_URL=stub.url)
+    return overrides
+
+
+def _missing_client(scenario):
+    from recommendations import geocoding
+    if scenario == 'osm' and not geocoding._geopy:
+        return 'geopy is not installed'
+    if scenario == 'google' and geocoding._googlemaps is None:
+        return 'googlemaps is not installed'
+    return None
+
+
+def _server_timing(header):
+    stages = {}
+    for part in (header or '').split(','):
+        name, _, duration = part.strip().partition(';dur=')
+        if duration and name != 'total':
+            stages[name] = float(duration)
+    return stages
+
+
+def _reset_caches():
+    """Start each scenario cold: drop both geocode cache tiers, the route cache and governor state"""
+    from recommendations.geocoding import geocode_cache
+    from recommendations.governor import governor
+    from recommendations.models import GeocodeCacheEntry
+    from recommendations.routecache import route_cache
+    geocode_cache.clear()
+    GeocodeCacheEntry.objects.all().delete()
+    route_cache.cache.clear()
+    governor.reset()
+
+
+def run_e2e(scenario, args, user, stub):
+    from django.db import close_old_connections
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    reason = _missing_client(scenario)
+    if reason:
+        return {'scenario': scenario, 'skipped': reason}
+
+    pairs = _city_pairs(args.requests, args.cities, args.seed)
+    next_pair = iter(range(len(pairs)))
+    lock = threading.Lock()
+    latencies_ms, stage_ms, statuses = [], {}, {}
+    stub.counts.clear()
+    _reset_caches()
+
+    def worker():
+        client = Client()
+        client.force_login(user)
+        try:
+            while True:
+                with lock:
+                    i = next(next_pair, None)
+                if i is None:
+                    return
+                source, destination = pairs[i]
+                t0 = time.perf_counter()
+                response = client.post('/', {
+                    'source': source, 'destination': destination, 'passenger_count': 1, 'travel_type': 'train',
+                })
+                elapsed = (time.perf_counter() - t0) * 1000
+                with lock:
+                    latencies_ms.append(elapsed)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    for name, ms in _server_timing(response.get('Server-Timing')).items():
+                        stage_ms.setdefault(name, []).append(ms)
+        finally:
+            close_old_connections()
+
+    with override_settings(**_scenario_settings(scenario, stub)):
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    return {
+        'scenario': scenario,
+        'requests': len(latencies_ms),
+        'concurrency': args.concurrency,
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'requests_per_sec': round(len(latencies_ms) / wall, 2),
+        'p50_ms': round(_percentile(latencies_ms, 50), 2),
+        'p99_ms': round(_percentile(latencies_ms, 99), 2),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 2),
+        'stages_p50_ms': {name: round(_percentile(v, 50), 2) for name, v in sorted(stage_ms.items())},
+        'upstream_calls': dict(stub.counts) if scenario != 'offline' else {},
+    }
+
+
+def _meta(args):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except Exception:
+        numpy_version = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': numpy_version,
+        'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    Regressions of `current` vs `baseline` beyond `tolerance` (fraction):
+    higher p50/p99 latency or lower throughput. Returns a list of messages.
+    """
+    regressions = []
+    checks = (
+        ('micro', 'name', (('p50_us', 1), ('p99_us', 1), ('ops_per_sec', -1))),
+        ('e2e', 'scenario', (('p50_ms', 1), ('p99_ms', 1), ('requests_per_sec', -1))),
+    )
+    for section, key, metrics in checks:
+        before = {row[key]: row for row in baseline.get(section, []) if 'skipped' not in row}
+        for row in current.get(section, []):
+            old = before.get(row[key])
+            if old is None or 'skipped' in row:
+                continue
+            for metric, direction in metrics:
+                if not old.get(metric):
+                    continue
+                change = (row[metric] - old[metric]) / old[metric]
+                if change * direction > tolerance:
+                    regressions.append(f'{section} {row[key]} {metric}: {old[metric]} -> {row[metric]} ({change:+.1%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--compare', help='baseline results JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed regression fraction (default 0.15)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cities', type=int, default=60, help='draw routes from the N largest gazetteer cities')
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--micro-batch', type=int, default=200)
+    parser.add_argument('--micro-samples', type=int, default=200)
+    parser.add_argument('--skip-e2e', action='store_true')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=300, help='route finder requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--latency-ms', type=float, default=80.0, help='median stub upstream latency')
+    parser.add_argument('--jitter', type=float, default=0.5, help='log-normal sigma of stub latency')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='greentravel-bench-')
+    try:
+        _setup_django(scratch)
+        results = {'meta': _meta(args), 'micro': [], 'e2e': []}
+        if not args.skip_micro:
+            results['micro'] = run_micro(args)
+        if not args.skip_e2e:
+            from django.contrib.auth.models import User
+            from stub_maps import StubMapsServer
+            from recommendations.ingest import record_writer
+
+            user, _ = User.objects.get_or_create(username='benchmark-user')
+            stub = StubMapsServer(latency_ms=args.latency_ms, jitter=args.jitter, seed=args.seed).start()
+            try:
+                for scenario in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+                    if scenario not in SCENARIOS:
+                        parser.error(f'unknown scenario {scenario!r}; choose from {", ".join(SCENARIOS)}')
+                    results['e2e'].append(run_e2e(scenario, args, user, stub))
+            finally:
+                stub.stop()
+                record_writer.close()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for message in regressions:
+            print(f'REGRESSION {message}', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+SQLite profile benchmark
+Runs several worker processes against a scratch copy of db.sqlite3, once with
+the default database settings and once with GREENTRAVEL_DB_PROFILE=production,
+and reports throughput, 'database is locked' errors and write latency.
+Each worker mixes route-finder writes (TravelRecord + summary update, a
+LoginAttempt and a session save) with history reads.
+
+Usage: python benchmarks/sqlite_profiles.py [--workers 8] [--seconds 10] [--write-ratio 0.3]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROFILES = ('default', 'production')
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def worker(seconds, write_ratio, start_at):
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'greentravel.settings')
+    import django
+    django.setup()
+    from django.contrib.auth.models import User
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.db import OperationalError
+    from recommendations.models import LoginAttempt, TravelRecord
+    from recommendations.pagination import keyset_page
+    from recommendations.summaries import summary_for_user
+
+    users = list(User.objects.all()[:20]) or [User.objects.create_user(f'bench-{os.getpid()}')]
+    stats = {'writes': 0, 'reads': 0, 'locked': 0, 'errors': 0, 'write_ms': []}
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        user = random.choice(users)
+        try:
+            if random.random() < write_ratio:
+                t0 = time.perf_counter()
+                TravelRecord.objects.create(
+                    user=user, source='Mumbai', destination='Pune', distance_km=144.2,
+                    recommended_transport='bus', co2_estimated_kg=15.14, co2_saved_kg=21.63,
+                )
+                LoginAttempt.objects.create(username=user.username, user=user, success=True)
+                session = SessionStore()
+                session['bench'] = time.time()
+                session.save()
+                stats['write_ms'].append((time.perf_counter() - t0) * 1000)
+                stats['writes'] += 1
+            else:
+                rows, _ = keyset_page(TravelRecord.objects.filter(user=user).values('id', 'created_at', 'co2_saved_kg'))
+                summary_for_user(user)
+                stats['reads'] += 1
+        except OperationalError as e:
+            stats['locked' if 'locked' in str(e) else 'errors'] += 1
+    print(json.dumps(stats))
+
+
+def run_profile(profile, args):
+    scratch = tempfile.mkdtemp(prefix='greentravel-bench-')
+    db_path = os.path.join(scratch, 'db.sqlite3')
+    shutil.copy(BASE_DIR / 'db.sqlite3', db_path)
+    env = dict(os.environ, GREENTRAVEL_DB_PATH=db_path, GREENTRAVEL_DB_PROFILE='' if profile == 'default' else profile)
+    start_at = time.time() + 2.0
+    cmd = [
+        sys.executable, __file__, '--worker', '--seconds', str(args.seconds),
+        '--write-ratio', str(args.write_ratio), '--start-at', str(start_at),
+    ]
+    procs = [subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, text=True) for _ in range(args.workers)]
+    results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    write_ms = [ms for r in results for ms in r['write_ms']]
+    writes = sum(r['writes'] for r in results)
+    reads = sum(r['reads'] for r in results)
+    return {
+        'profile': profile,
+        'workers': args.workers,
+        'seconds': args.seconds,
+        'writes_per_sec': round(writes / args.seconds, 1),
+        'reads_per_sec': round(reads / args.seconds, 1),
+        'locked_errors': sum(r['locked'] for r in results),
+        'other_errors': sum(r['errors'] for r in results),
+        'write_p50_ms': round(_percentile(write_ms, 50) or 0, 2),
+        'write_p99_ms': round(_percentile(write_ms, 99) or 0, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.seconds, args.write_ratio, args.start_at)
+        return
+    print(json.dumps([run_profile(profile, args) for profile in PROFILES], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Stub geocoding/routing server for offline benchmarks
+Answers the Nominatim search API and the Google Geocoding / Distance Matrix
+APIs from the bundled city gazetteer, sleeping a log-normal latency per
+request to look like a real upstream. Point the app at it with
+NOMINATIM_DOMAIN / NOMINATIM_SCHEME=http and GOOGLE_MAPS_BASE_URL.
+
+Usage: python benchmarks/stub_maps.py [--port 8765] [--latency-ms 80] [--jitter 0.5]
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from recommendations.gazetteer import DEFAULT_ROAD_FACTOR, Gazetteer, estimate_durations  # noqa: E402
+
+
+def _duration_text(seconds):
+    hours, minutes = seconds // 3600, (seconds % 3600) // 60
+    return f'{hours} hours {minutes} mins' if hours else f'{minutes} mins'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'StubMaps/1.0'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        routes = {
+            '/search': self.server.nominatim_search,
+            '/maps/api/geocode/json': self.server.google_geocode,
+            '/maps/api/distancematrix/json': self.server.google_distance_matrix,
+        }
+        handler = routes.get(url.path)
+        if handler is None:
+            self.send_error(404)
+            return
+        self.server.wait(url.path)
+        body = json.dumps(handler(params)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubMapsServer(ThreadingHTTPServer):
+    """
+    Threaded stub upstream. `latency_ms` is the median injected delay and
+    `jitter` the log-normal sigma (0.5 puts p99 at roughly 3x the median).
+    `counts` tallies requests per endpoint.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency_ms=80.0, jitter=0.5, seed=None):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.gazetteer = Gazetteer()
+        self.counts = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    @property
+    def netloc(self):
+        return f'127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='stub-maps', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-response; that's expected here
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def wait(self, endpoint):
+        with self._lock:
+            self.counts[endpoint] += 1
+            delay = self._random.lognormvariate(0, self.jitter) * self.latency_ms if self.latency_ms else 0
+        time.sleep(delay / 1000)
+
+    def _city(self, place):
+        city_id = self.gazetteer.lookup(place)
+        if city_id is None:
+            return None
+        return self.gazetteer.names[city_id], self.gazetteer.lat[city_id], self.gazetteer.lon[city_id]
+
+    def nominatim_search(self, params):
+        city = self._city(params.get('q'))
+        if city is None:
+            return []
+        name, lat, lon = city
+        return [{
+            'lat': str(lat), 'lon': str(lon), 'display_name': f'{name}, India',
+            'address': {'city': name, 'country': 'India', 'country_code': 'in'},
+        }]
+
+    def google_geocode(self, params):
+        city = self._city(params.get('address'))
+        if city is None:
+            return {'status': 'ZERO_RESULTS', 'results': []}
+        name, lat, lon = city
+        return {'status': 'OK', 'results': [{
+            'formatted_address': f'{name}, India',
+            'geometry': {'location': {'lat': lat, 'lng': lon}},
+            'address_components': [
+                {'long_name': name, 'short_name': name, 'types': ['locality', 'political']},
+                {'long_name': 'India', 'short_name': 'IN', 'types': ['country', 'political']},
+            ],
+        }]}
+
+    def google_distance_matrix(self, params):
+        km = self.gazetteer.distance_km(params.get('origins'), params.get('destinations'), DEFAULT_ROAD_FACTOR)
+        if km is None:
+            element = {'status': 'NOT_FOUND'}
+        else:
+            seconds = estimate_durations(km)[params.get('mode') or 'driving']
+            element = {
+                'status': 'OK',
+                'distance': {'value': int(km * 1000), 'text': f'{km:.0f} km'},
+                'duration': {'value': seconds, 'text': _duration_text(seconds)},
+            }
+        return {'status': 'OK', 'rows': [{'elements': [element]}]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=80.0)
+    parser.add_argument('--jitter', type=float, default=0.5)
+    args = parser.parse_args()
+    server = StubMapsServer(args.port, args.latency_ms, args.jitter)
+    print(f'Serving on {server.url} (NOMINATIM_SCHEME=http NOMINATIM_DOMAIN={server.netloc} '
+          f'GOOGLE_MAPS_BASE_URL={server.url})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
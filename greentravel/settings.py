@@ -18,7 +18,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recommendations.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'recommendations.staticfiles.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -50,10 +52,46 @@ WSGI_APPLICATION = 'greentravel.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('GREENTRAVEL_DB_PATH') or BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Production SQLite profile (GREENTRAVEL_DB_PROFILE=production): WAL journaling
+# and tuned pragmas on every new connection, IMMEDIATE write transactions (take
+# the writer lock up front instead of failing on upgrade), persistent
+# connections, and a read-only alias for history/analytics reads
+# (see recommendations/routers.py)
+DB_PROFILE = os.environ.get('GREENTRAVEL_DB_PROFILE', '').lower()
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA temp_store=MEMORY;'
+    'PRAGMA cache_size=-20000;'
+    'PRAGMA mmap_size=134217728;'
+)
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    })
+    DATABASES['readonly'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f"file:{DATABASES['default']['NAME']}?mode=ro",
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': 'PRAGMA busy_timeout=5000;PRAGMA query_only=1;PRAGMA cache_size=-20000;PRAGMA mmap_size=134217728;',
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['recommendations.routers.ReadOnlyRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
@@ -71,6 +109,35 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+# `collectstatic` target: fingerprinted copies plus .gz/.br variants, served by
+# PrecompressedStaticMiddleware with immutable cache headers
+STATIC_ROOT = os.environ.get('STATIC_ROOT', str(BASE_DIR / 'staticfiles'))
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'recommendations.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+# Files smaller than this (bytes) are not worth precompressing
+STATIC_COMPRESS_MIN_SIZE = 256
+# Cache-Control max-age for static files without a content hash in the name
+STATIC_MAX_AGE = 60
+
+# Caches: `routes` is shared by every worker on the host (swap for Redis/Memcached
+# when running on more than one machine)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'routes': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('ROUTE_CACHE_DIR', str(BASE_DIR / '.cache' / 'routes')),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('PAGE_CACHE_DIR', str(BASE_DIR / '.cache' / 'pages')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Google Maps API Configuration - expected to be set in the environment.
@@ -80,4 +147,144 @@ GOOGLE_MAPS_API_KEY = os.environ.get('GOOGLE_MAPS_API_KEY', '')
 # Redirect after logout
 LOGOUT_REDIRECT_URL = '/'
 # Redirect after login
-LOGIN_REDIRECT_URL = '/'
\ No newline at end of file
+LOGIN_REDIRECT_URL = '/'
+
+# Geocode cache: in-process LRU size, per-entry TTL and durable table cap
+GEOCODE_CACHE_MAX_ENTRIES = 2048
+GEOCODE_CACHE_TTL = 60 * 60 * 24 * 30  # 30 days
+GEOCODE_CACHE_DB_MAX_ENTRIES = 100000
+
+# Route cache: distance/duration results per (source, destination, backend)
+ROUTE_CACHE_ALIAS = 'routes'
+ROUTE_CACHE_TTL = 60 * 60 * 24 * 7  # 7 days
+# Straight-line backends give the same distance in both directions
+ROUTE_CACHE_SYMMETRIC_BACKENDS = ('osm',)
+
+# Google routing: per-call HTTP timeout, shared deadline for the parallel
+# per-mode Distance Matrix requests, and worker/connection pool size. The
+# client's retries are capped at the deadline, so keep the timeout below it.
+GOOGLE_MAPS_TIMEOUT = 5
+ROUTING_DEADLINE_SECONDS = 8
+ROUTING_MAX_WORKERS = 16
+
+# Geocoding/routing endpoints; override to point at a local stub server
+# (benchmarks/stub_maps.py) or a self-hosted Nominatim
+GOOGLE_MAPS_BASE_URL = os.environ.get('GOOGLE_MAPS_BASE_URL') or None
+NOMINATIM_DOMAIN = os.environ.get('NOMINATIM_DOMAIN', 'nominatim.openstreetmap.org')
+NOMINATIM_SCHEME = os.environ.get('NOMINATIM_SCHEME', 'https')
+NOMINATIM_TIMEOUT = 10
+
+# Outbound governor (recommendations/governor.py): client-side rate limits as
+# backend -> (requests per second, burst), the longest a call may queue for a
+# token, and circuit breaking (consecutive failures to open, seconds before a
+# recovery probe). Nominatim's usage policy allows 1 request per second.
+OUTBOUND_RATE_LIMITS = {'nominatim': (1.0, 1)}
+OUTBOUND_MAX_WAIT_SECONDS = 2.0
+OUTBOUND_FAILURE_THRESHOLD = 5
+OUTBOUND_RESET_TIMEOUT = 30.0
+# Seconds to wait on Google geocoding before also asking Nominatim (None: off)
+GEOCODE_HEDGE_DELAY = None
+
+# Single-flight lookups (recommendations/singleflight.py): how long a caller
+# waits on an identical in-flight lookup before running its own. Set the alias
+# to a cache shared by all workers with an atomic add() (Redis, Memcached) to
+# coalesce across processes too; the lock expires after SINGLEFLIGHT_LOCK_TIMEOUT.
+SINGLEFLIGHT_WAIT_SECONDS = 10
+SINGLEFLIGHT_CACHE_ALIAS = None
+SINGLEFLIGHT_LOCK_TIMEOUT = 15
+SINGLEFLIGHT_POLL_SECONDS = 0.05
+
+# Page caching (catalog.py): anonymous pages and destination browse results are
+# cached per catalog version, which every Destination/Tag/TransportMode write bumps
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 600
+# Cache-Control max-age for cached pages; 0 makes browsers revalidate (ETag -> 304)
+PAGE_CACHE_MAX_AGE = 0
+
+# Batch evaluation: max routes per /batch/ request and concurrent matrix requests
+BATCH_MAX_PAIRS = 2000
+BATCH_MAX_CONCURRENCY = 4
+
+# API keys for the JSON endpoints (batch/, api/recommend/), sent as
+# `Authorization: Bearer <key>`: GREENTRAVEL_API_KEYS="nightly:KEY1,partner:KEY2"
+API_KEYS = {
+    key.strip(): name.strip()
+    for name, _, key in (item.partition(':') for item in os.environ.get('GREENTRAVEL_API_KEYS', '').split(','))
+    if key.strip()
+}
+# Per-client (rate per second, burst) for the JSON API: callers with an API
+# key, and anonymous callers by IP. These are per worker process (N workers
+# allow N times as much) unless API_RATE_LIMIT_CACHE_ALIAS names a cache
+# shared by all workers with atomic add()/incr() (Redis, Memcached)
+API_RATE_LIMITS = {
+    'key': (20.0, 40),
+    'anonymous': (1.0, 10),
+}
+API_RATE_LIMIT_CACHE_ALIAS = None
+
+# JSON recommendation API (api/recommend/): Cache-Control max-age for GET
+# responses and the largest distance_km accepted
+RECOMMEND_API_MAX_AGE = 300
+RECOMMEND_API_MAX_DISTANCE_KM = 20000
+
+# Distance-band rules for GreenTravelAI (format: recommendations/rules.py
+# DEFAULT_DISTANCE_RULES); unset uses the built-in defaults
+GREEN_TRAVEL_DISTANCE_RULES_FILE = os.environ.get('GREEN_TRAVEL_DISTANCE_RULES_FILE') or None
+
+# Offline routing: use the bundled city gazetteer instead of Google/Nominatim
+# (no network at all; handy for tests and load runs)
+OFFLINE_ROUTING = os.environ.get('GREENTRAVEL_OFFLINE_ROUTING', '').lower() in ('1', 'true', 'yes')
+# Straight-line to road distance multiplier for gazetteer estimates
+OFFLINE_ROAD_FACTOR = 1.2
+
+# Destination browse page size
+DESTINATIONS_PER_PAGE = 20
+
+# Route finder: serve the index through the async view (run under ASGI, see
+# greentravel/asgi.py) and the overall deadline for its geocoding/routing lookups
+ASYNC_ROUTE_FINDER = os.environ.get('GREENTRAVEL_ASYNC_ROUTE_FINDER', '').lower() in ('1', 'true', 'yes')
+ROUTE_LOOKUP_DEADLINE_SECONDS = 12
+
+# Travel history page / JSON API page size
+HISTORY_PAGE_SIZE = 50
+
+# Write-behind TravelRecord ingestion (recommendations/ingest.py): queue route
+# finder records and write them in bulk_create batches from a background thread.
+# Off by default: queued records are lost if the process is killed before a flush.
+WRITE_BEHIND_RECORDS = os.environ.get('GREENTRAVEL_WRITE_BEHIND', '0').lower() in ('1', 'true', 'yes')
+WRITE_BEHIND_BATCH_SIZE = 200
+WRITE_BEHIND_FLUSH_SECONDS = 1.0
+# Queue bound; a submit waits up to WRITE_BEHIND_PUT_TIMEOUT, then writes directly
+WRITE_BEHIND_MAX_QUEUE = 10000
+WRITE_BEHIND_PUT_TIMEOUT = 0.5
+
+# Analytics rollups (recommendations/rollups.py): records newer than this are
+# left for the next incremental run so in-flight inserts aren't skipped
+ROLLUP_LAG_SECONDS = 120
+
+# Emission/cost factor sets (recommendations/factors.py). Add a version here
+# with the changed values, switch GREEN_TRAVEL_FACTOR_VERSION to it, then run
+# `manage.py rescore_travel_records` to update stored records, e.g.
+# GREEN_TRAVEL_FACTOR_SETS = {'v2': {'emission_factors': {'train': 0.035}}}
+GREEN_TRAVEL_FACTOR_SETS = {}
+GREEN_TRAVEL_FACTOR_VERSION = os.environ.get('GREEN_TRAVEL_FACTOR_VERSION') or 'v1'
+
+# Latency instrumentation (recommendations/instrumentation.py): per-stage
+# histograms scraped from /metrics/ (None allows any client), and one JSON log
+# line per request on the 'greentravel.requests' logger
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+LOG_LEVEL = os.environ.get('GREENTRAVEL_LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'recommendations.instrumentation.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        'greentravel.requests': {'handlers': ['console'], 'level': LOG_LEVEL, 'propagate': False},
+        'recommendations': {'handlers': ['console'], 'level': LOG_LEVEL, 'propagate': False},
+    },
+}
@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import Profile, LoginAttempt, TravelRecord
+from .models import (
+    Destination, Profile, LoginAttempt, TravelRecord, GeocodeCacheEntry, TravelSummary, TravelModeSummary,
+    DailyModeRollup, DailyRouteRollup, RollupWatermark, JobCheckpoint,
+)
+
+
+@admin.register(Destination)
+class DestinationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'country', 'carbon_score')
+    search_fields = ('name', 'country', 'tags')
 
 
 @admin.register(Profile)
@@ -20,5 +29,52 @@ class LoginAttemptAdmin(admin.ModelAdmin):
 class TravelRecordAdmin(admin.ModelAdmin):
     list_display = ('user', 'source', 'destination', 'distance_km', 'recommended_transport', 'co2_saved_kg', 'created_at')
     search_fields = ('user__username', 'source', 'destination')
-    list_filter = ('recommended_transport', 'created_at')
-    readonly_fields = ('user', 'source', 'destination', 'distance_km', 'passenger_count', 'selected_travel_type', 'recommended_transport', 'co2_estimated_kg', 'co2_saved_kg', 'created_at')
+    list_filter = ('recommended_transport', 'factor_version', 'created_at')
+    readonly_fields = ('user', 'source', 'destination', 'distance_km', 'passenger_count', 'selected_travel_type', 'recommended_transport', 'co2_estimated_kg', 'co2_saved_kg', 'factor_version', 'created_at')
+
+
+@admin.register(GeocodeCacheEntry)
+class GeocodeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('key', 'country_code', 'provider', 'expires_at')
+    search_fields = ('key',)
+    list_filter = ('provider', 'country_code')
+
+
+@admin.register(TravelSummary)
+class TravelSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'trip_count', 'total_co2_estimated_kg', 'total_co2_saved_kg', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'trip_count', 'total_distance_km', 'total_co2_estimated_kg', 'total_co2_saved_kg', 'updated_at')
+
+
+@admin.register(TravelModeSummary)
+class TravelModeSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'transport', 'trip_count', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+    search_fields = ('user__username',)
+    list_filter = ('transport',)
+    readonly_fields = ('user', 'transport', 'trip_count', 'total_distance_km', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+
+
+@admin.register(DailyModeRollup)
+class DailyModeRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'recommended_transport', 'selected_travel_type', 'trip_count', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+    list_filter = ('recommended_transport', 'selected_travel_type')
+    date_hierarchy = 'day'
+
+
+@admin.register(DailyRouteRollup)
+class DailyRouteRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'source', 'destination', 'trip_count', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+    search_fields = ('source', 'destination')
+    date_hierarchy = 'day'
+
+
+@admin.register(RollupWatermark)
+class RollupWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'position', 'updated_at')
+
+
+@admin.register(JobCheckpoint)
+class JobCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'position', 'updated_at')
+    search_fields = ('name',)
@@ -2,6 +2,9 @@
 AI Logic Module for Green Travel Recommendations
 Rule-based intelligent decision-making system for eco-friendly transport selection
 """
+from .engine import DURATION_MODES, ScoringEngine, np
+from .factors import BASE_VERSION, get_factor_set
+from .rules import BandTable, load_distance_rules
 
 class TransportOption:
     """Represents a transport option with emissions and green score"""
@@ -26,6 +29,7 @@ class GreenTravelAI:
     """
     
     # Transport options with emission factors and green scores
+    # (factor set 'v1'; see factors.py for versioned factor sets)
     TRANSPORTS = {
         'bus': TransportOption('Bus', 0.105, 90),
         'train': TransportOption('Train', 0.041, 85),
@@ -55,6 +59,38 @@ class GreenTravelAI:
         'bike': 50,
     }
 
+    # Factor set TRANSPORTS / COST_PER_KM_INR currently hold
+    FACTOR_VERSION = BASE_VERSION
+
+    _band_table = None
+    _engine = None
+    _version_engines = {}
+
+    @classmethod
+    def transports_for_version(cls, version):
+        """TRANSPORTS with the emission factors of a factor set version"""
+        factors = get_factor_set(version)['emission_factors']
+        return {
+            key: TransportOption(option.name, factors.get(key, option.emission_factor), option.base_score)
+            for key, option in cls.TRANSPORTS.items()
+        }
+
+    @classmethod
+    def use_factor_set(cls, version):
+        """Score from now on with a factor set version; cached band table and engine are rebuilt"""
+        cls.TRANSPORTS = cls.transports_for_version(version)
+        cls.COST_PER_KM_INR = dict(get_factor_set(version)['cost_per_km_inr'])
+        cls.FACTOR_VERSION = version
+        cls._band_table = None
+        cls._engine = None
+
+    @classmethod
+    def get_band_table(cls):
+        """Compiled distance-band rules (see rules.BandTable), built once"""
+        if cls._band_table is None:
+            cls._band_table = BandTable(load_distance_rules(), cls.TRANSPORTS, cls.AVERAGE_SPEED_KMH)
+        return cls._band_table
+
     @staticmethod
     def get_transport_options(distance_km):
         """
@@ -62,60 +98,95 @@ class GreenTravelAI:
         - Short distance (<= 100 km): Bike, Bus, Train, Car, EV
         - Medium distance (101-300 km): Train, EV, Bus, Car, Flight
         - Long distance (> 300 km): Flight, Train, EV, Car
+        Bands come from the compiled rule table; the returned mapping is
+        shared and read-only.
         """
-        options = {}
-
-        if distance_km <= 100:
-            # SHORT DISTANCE: Prioritize public transport & bikes
-            suitable = ['bike', 'bus', 'train', 'car', 'ev']
-        elif distance_km <= 300:
-            # MEDIUM DISTANCE: Train and EV are optimal
-            suitable = ['train', 'ev', 'bus', 'car', 'flight']
-        else:
-            # LONG DISTANCE: Flight or train
-            suitable = ['flight', 'train', 'ev', 'car']
+        return GreenTravelAI.get_band_table().lookup(distance_km).options
+
+
+    @classmethod
+    def get_engine(cls):
+        """Vectorized ScoringEngine built from the current factor tables (None without numpy)"""
+        if np is None:
+            return None
+        if cls._engine is None:
+            cls._engine = ScoringEngine(cls.TRANSPORTS, cls.COST_PER_KM_INR, cls.get_band_table())
+        return cls._engine
+
+    @classmethod
+    def get_engine_for_version(cls, version):
+        """ScoringEngine for any factor set version, e.g. to rescore old records (None without numpy)"""
+        if version == cls.FACTOR_VERSION:
+            return cls.get_engine()
+        if np is None:
+            return None
+        if version not in cls._version_engines:
+            transports = cls.transports_for_version(version)
+            band_table = BandTable(load_distance_rules(), transports, cls.AVERAGE_SPEED_KMH)
+            cls._version_engines[version] = ScoringEngine(
+                transports, get_factor_set(version)['cost_per_km_inr'], band_table,
+            )
+        return cls._version_engines[version]
 
-        for transport in suitable:
-            if transport in GreenTravelAI.TRANSPORTS:
-                options[transport] = GreenTravelAI.TRANSPORTS[transport]
-
-        return options
-    
     @staticmethod
     def calculate_recommendations(distance_km, google_durations=None, passengers=1):
         """
         Calculate emissions and green scores for all transport options
         Returns sorted list by green score (highest first)
         """
-        options = GreenTravelAI.get_transport_options(distance_km)
+        engine = GreenTravelAI.get_engine()
+        if engine is None:
+            return GreenTravelAI._calculate_recommendations_python(distance_km, google_durations, passengers)
+
+        durations = {}
+        for mode, value in (google_durations or {}).items():
+            try:
+                durations[mode] = float(int(value))
+            except Exception:
+                continue
+        scores = engine.score([distance_km], passengers, durations, decimals=None)
+        passengers = max(1, passengers)
+
         results = []
-        
-        for name, transport in options.items():
-            emission = transport.calculate_emission(distance_km)
-            green_score = transport.calculate_green_score(distance_km)
-
-            # Adjust green score based on distance suitability
-            adjusted_score = green_score
-            if distance_km < 300 and name in ['bus', 'bike']:
-                adjusted_score = min(100, green_score + 10)
-            elif 300 <= distance_km < 700 and name in ['train', 'ev']:
-                adjusted_score = min(100, green_score + 5)
+        for name in GreenTravelAI.get_transport_options(distance_km):
+            i = engine.mode_index[name]
+            emission = round(float(scores['emission_kg'][0, i]), 2)
+            cost_inr = round(float(scores['cost_inr'][0, i]), 2)
+            duration_seconds = int(scores['duration_seconds'][0, i])
+            hrs = duration_seconds // 3600
+            mins = (duration_seconds % 3600) // 60
+            results.append({
+                'transport': name,
+                'emission_kg': emission,
+                'emission_per_person_kg': round(emission / passengers, 2),
+                'green_score': int(scores['green_score'][0, i]),
+                'cost_inr': cost_inr,
+                'cost_per_person_inr': round(cost_inr / passengers, 2),
+                'duration_seconds': duration_seconds,
+                'duration_text': f"{hrs}h {mins}m" if hrs else f"{mins}m",
+            })
+
+        # Sort by green score (highest first)
+        results.sort(key=lambda x: (-x['green_score'], x['emission_kg']))
+        return results
+
+    @staticmethod
+    def _calculate_recommendations_python(distance_km, google_durations=None, passengers=1):
+        """Pure-Python scoring path, used when numpy is not installed"""
+        band = GreenTravelAI.get_band_table().lookup(distance_km)
+        results = []
+
+        # Band rules carry the distance-adjusted green score and speed per mode
+        for rule in band.modes:
+            name = rule.name
+            emission = GreenTravelAI.TRANSPORTS[name].calculate_emission(distance_km)
 
             # Cost in INR (rounded)
             cost_per_km = GreenTravelAI.COST_PER_KM_INR.get(name, 0.0)
             cost_inr = round(cost_per_km * distance_km, 2)
 
             # Duration estimation: prefer Google-provided per-mode durations when available
-            preferred_mode = None
-            if name in ['car', 'ev']:
-                preferred_mode = 'driving'
-            elif name in ['bus', 'train']:
-                preferred_mode = 'transit'
-            elif name == 'bike':
-                preferred_mode = 'bicycling'
-            elif name == 'flight':
-                preferred_mode = None
-
+            preferred_mode = DURATION_MODES.get(name)
             duration_seconds = None
             if google_durations and preferred_mode and preferred_mode in google_durations:
                 try:
@@ -124,29 +195,8 @@ class GreenTravelAI:
                     duration_seconds = None
 
             if duration_seconds is None:
-                # fallback to speed-based estimate
-                base_speed = GreenTravelAI.AVERAGE_SPEED_KMH.get(name, 50)
-                # Adjust speeds for city vs highway based on distance
-                if distance_km < 50:
-                    # City speeds for short distances
-                    if name in ['car', 'ev']:
-                        speed = 40.0  # km/h
-                    elif name in ['bus', 'train']:
-                        speed = 50.0  # km/h
-                    elif name == 'bike':
-                        speed = 15.0  # km/h
-                    else:
-                        speed = base_speed
-                else:
-                    # Highway speeds for longer distances
-                    speed = base_speed
-                duration_hours = distance_km / max(1e-6, speed)
-                duration_seconds = int(duration_hours * 3600)
-
-            # For flights, use flight-specific speed if no Google duration
-            if name == 'flight' and (not google_durations or 'flight' not in google_durations):
-                speed = GreenTravelAI.AVERAGE_SPEED_KMH.get('flight', 800)
-                duration_hours = distance_km / max(1e-6, speed)
+                # fallback to speed-based estimate (city or highway speed from the band)
+                duration_hours = distance_km / max(1e-6, rule.speed)
                 duration_seconds = int(duration_hours * 3600)
 
             # Human-friendly duration text
@@ -165,13 +215,13 @@ class GreenTravelAI:
                 'transport': name,
                 'emission_kg': emission,
                 'emission_per_person_kg': per_person_emission,
-                'green_score': adjusted_score,
+                'green_score': rule.score,
                 'cost_inr': cost_inr,
                 'cost_per_person_inr': per_person_cost,
                 'duration_seconds': duration_seconds,
                 'duration_text': duration_text,
             })
-        
+
         # Sort by green score (highest first)
         results.sort(key=lambda x: (-x['green_score'], x['emission_kg']))
         return results
@@ -0,0 +1,134 @@
+"""
+API key authentication for the JSON endpoints
+Keys come from API_KEYS ({key: client name}, set via GREENTRAVEL_API_KEYS)
+and are sent as `Authorization: Bearer <key>` or `X-API-Key: <key>`. No
+session or CSRF token is involved, so scheduled jobs and apps can call the
+endpoints directly.
+`rate_limited` applies API_RATE_LIMITS per client (API key, else client IP).
+By default each worker process keeps its own token buckets, so N workers
+allow N times the configured rate; with API_RATE_LIMIT_CACHE_ALIAS set, the
+counts live in that shared cache and the limit holds across workers.
+"""
+import hmac
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from .governor import TokenBucket
+from .instrumentation import registry
+
+registry.describe('greentravel_api_rate_limited_total', 'API requests refused by the per-client rate limit')
+
+
+def api_client(request):
+    """Name of the client whose API key the request carries, or None"""
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer':
+        token = request.META.get('HTTP_X_API_KEY', '')
+    token = token.strip()
+    if not token:
+        return None
+    client = None
+    for key, name in getattr(settings, 'API_KEYS', {}).items():
+        # Compare against every key so timing doesn't reveal which prefix matched
+        if hmac.compare_digest(key.encode('utf-8'), token.encode('utf-8')):
+            client = name
+    return client
+
+
+def unauthorized(message='A valid API key is required.'):
+    response = JsonResponse({'error': message}, status=401)
+    response['WWW-Authenticate'] = 'Bearer'
+    return response
+
+
+def api_key_required(view):
+    """Reject requests without a valid API key; sets `request.api_client`"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.api_client = api_client(request)
+        if request.api_client is None:
+            return unauthorized()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ClientRateLimiter:
+    """Token bucket per client; the least recently seen clients are forgotten past `max_clients`"""
+
+    def __init__(self, max_clients=10000):
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, client, rate, burst):
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(rate, burst)
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            self._buckets.move_to_end(client)
+        return bucket.acquire(0)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SharedRateLimiter:
+    """
+    Fixed-window counters in a shared cache: at most `burst` requests per
+    burst/rate seconds, which averages out to `rate` per second. Counting
+    uses add()/incr(), so it holds across workers on a cache where those are
+    atomic (Redis, Memcached). If the cache is down, requests are let through.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def allow(self, client, rate, burst):
+        window = max(1, math.ceil(burst / rate))
+        key = f'ratelimit:{client}:{int(time.time() // window)}'
+        cache = caches[self.alias]
+        try:
+            cache.add(key, 0, window + 1)
+            count = cache.incr(key)
+        except Exception:
+            return True
+        return count <= burst
+
+
+rate_limiter = ClientRateLimiter()
+
+
+def _limiter():
+    alias = getattr(settings, 'API_RATE_LIMIT_CACHE_ALIAS', None)
+    return SharedRateLimiter(alias) if alias else rate_limiter
+
+
+def rate_limited(view):
+    """
+    Identify the caller (`request.api_client`, None when anonymous) and
+    answer 429 once it exceeds its API_RATE_LIMITS budget
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.api_client = api_client(request)
+        kind = 'key' if request.api_client is not None else 'anonymous'
+        rate, burst = getattr(settings, 'API_RATE_LIMITS', {}).get(kind, (1.0, 10))
+        identity = f'key:{request.api_client}' if request.api_client is not None else f"ip:{request.META.get('REMOTE_ADDR', '')}"
+        if not _limiter().allow(identity, rate, burst):
+            registry.inc('greentravel_api_rate_limited_total', client=kind)
+            response = JsonResponse({'error': 'Rate limit exceeded.'}, status=429)
+            response['Retry-After'] = str(max(1, math.ceil(1 / rate)))
+            return response
+        return view(request, *args, **kwargs)
+    return wrapper
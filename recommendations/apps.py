@@ -1,5 +1,20 @@
 from django.apps import AppConfig
+from django.core.exceptions import ImproperlyConfigured
 
 class RecommendationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recommendations'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from .catalog import bump_catalog_version
+        # Schema or data migrations may change what pages render; start a fresh catalog version
+        post_migrate.connect(lambda **kwargs: bump_catalog_version(), sender=self, weak=False)
+        from .ai_logic import GreenTravelAI
+        from .factors import current_factor_version
+        version = current_factor_version()
+        if version != GreenTravelAI.FACTOR_VERSION:
+            try:
+                GreenTravelAI.use_factor_set(version)
+            except ValueError as exc:
+                raise ImproperlyConfigured(f"GREEN_TRAVEL_FACTOR_VERSION: {exc}")
@@ -0,0 +1,169 @@
+"""
+Batch route evaluation
+Scores many origin/destination pairs in one go: cached routes are reused,
+the rest are packed into Distance Matrix requests that respect the API's
+element limits and fetched concurrently, then each pair is run through
+GreenTravelAI.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .ai_logic import GreenTravelAI
+from .geocoding import geocode_place, google_configured
+from .routecache import route_cache
+from .routing import fetch_google_matrix
+
+# Distance Matrix limits per request
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+
+def plan_chunks(pairs, max_origins=MAX_ORIGINS, max_destinations=MAX_DESTINATIONS, max_elements=MAX_ELEMENTS):
+    """
+    Pack (origin, destination) pairs into matrix requests within the limits.
+    Each origin's destinations are cut into slices; origins that share a slice
+    (the N×M case) are stacked into one block, then small leftover blocks are
+    merged greedily while origins × destinations still fits.
+    Returns a list of (origins, destinations) tuples.
+    """
+    by_origin = {}
+    for origin, destination in pairs:
+        by_origin.setdefault(origin, {})[destination] = None
+
+    dest_limit = min(max_destinations, max_elements)
+    by_slice = {}
+    for origin, wanted in by_origin.items():
+        wanted = list(wanted)
+        for start in range(0, len(wanted), dest_limit):
+            by_slice.setdefault(tuple(wanted[start:start + dest_limit]), []).append(origin)
+
+    blocks = []
+    for dests, origins in by_slice.items():
+        step = max(1, min(max_origins, max_elements // len(dests)))
+        for start in range(0, len(origins), step):
+            blocks.append((origins[start:start + step], list(dests)))
+
+    chunks = []
+    for origins, dests in blocks:
+        if chunks:
+            last_origins, last_dests = chunks[-1]
+            merged_origins = last_origins + [o for o in origins if o not in last_origins]
+            merged_dests = last_dests + [d for d in dests if d not in last_dests]
+            if (len(merged_origins) <= max_origins and len(merged_dests) <= max_destinations
+                    and len(merged_origins) * len(merged_dests) <= max_elements):
+                chunks[-1] = (merged_origins, merged_dests)
+                continue
+        chunks.append((origins, dests))
+    return chunks
+
+
+def _resolve_google(pairs, max_workers):
+    routes = {}
+    chunks = plan_chunks(pairs)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch') as pool:
+        for block in pool.map(lambda chunk: fetch_google_matrix(*chunk), chunks):
+            routes.update(block)
+    return routes
+
+
+def _resolve_single(pairs, max_workers):
+    # OSM/mock backends have no matrix endpoint; fall back to per-pair lookups
+    from .views import get_distance_from_api
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch') as pool:
+        infos = pool.map(lambda pair: get_distance_from_api(*pair), pairs)
+        return {pair: info for pair, info in zip(pairs, infos) if info is not None}
+
+
+def _outside_india(pairs, max_workers):
+    """
+    Pairs with an end outside India (or that can't be geocoded), mirroring
+    the route finder's is_within_india check for the Google backend
+    """
+    def country(place):
+        try:
+            result = geocode_place(place)
+        except Exception:
+            return None
+        return (result or {}).get('country_code')
+
+    places = list(dict.fromkeys(place for pair in pairs for place in pair))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch') as pool:
+        countries = dict(zip(places, pool.map(country, places)))
+    return {
+        pair for pair in pairs
+        if str(countries.get(pair[0]) or '').upper() != 'IN' or str(countries.get(pair[1]) or '').upper() != 'IN'
+    }
+
+
+def score_route(source, destination, distance_info, passengers=1, error='route not found'):
+    """
+    Run GreenTravelAI for one resolved route and return a JSON-friendly dict.
+    Mock distances (a place couldn't be found) are placeholders, not routes,
+    so they get the error instead of a score.
+    """
+    if distance_info is None or distance_info.get('mock'):
+        return {'source': source, 'destination': destination, 'error': error}
+    distance_km = distance_info.get('distance_km')
+    durations = distance_info.get('durations') or {}
+    recommendations = GreenTravelAI.calculate_recommendations(distance_km, durations, passengers)
+    best = recommendations[0] if recommendations else None
+    return {
+        'source': source,
+        'destination': destination,
+        'distance_km': distance_km,
+        'passenger_count': passengers,
+        'recommended': best['transport'] if best else None,
+        'green_score': best['green_score'] if best else None,
+        'co2_estimated_kg': best['emission_kg'] if best else None,
+        'co2_saved_kg': GreenTravelAI.compare_with_flight(best, distance_km) if best else 0,
+        'recommendations': recommendations,
+    }
+
+
+def evaluate_pairs(pairs, passengers=1, max_workers=None):
+    """
+    Score a list of (source, destination) pairs.
+    Returns one result dict per input pair, in input order; unresolvable pairs
+    (including ones only a mock distance was found for, and, with Google,
+    pairs outside India) carry an 'error' key instead of recommendations.
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, 'BATCH_MAX_CONCURRENCY', 4)
+    pairs = [(str(s), str(d)) for s, d in pairs]
+    backend = 'google' if google_configured() else 'osm'
+    # The Google route finder only serves routes within India
+    outside = _outside_india(list(dict.fromkeys(pairs)), max_workers) if backend == 'google' else set()
+
+    routes = {}
+    missing = []
+    for pair in dict.fromkeys(pairs):
+        if pair in outside:
+            continue
+        cached = route_cache.get(pair[0], pair[1], backend)
+        if cached is not None:
+            routes[pair] = cached
+        else:
+            missing.append(pair)
+
+    if missing:
+        if backend == 'google':
+            fetched = _resolve_google(missing, max_workers)
+            for (source, destination), info in fetched.items():
+                if not info.get('partial'):
+                    route_cache.set(source, destination, backend, info)
+        else:
+            fetched = _resolve_single(missing, max_workers)
+        routes.update(fetched)
+
+    return [
+        score_route(s, d, routes.get((s, d)), passengers, error='route outside India' if (s, d) in outside else 'route not found')
+        for s, d in pairs
+    ]
+
+
+def evaluate_matrix(origins, destinations, passengers=1, max_workers=None):
+    """Score every origin × destination combination (see evaluate_pairs)"""
+    pairs = [(o, d) for o in origins for d in destinations]
+    return evaluate_pairs(pairs, passengers=passengers, max_workers=max_workers)
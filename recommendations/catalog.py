@@ -0,0 +1,134 @@
+"""
+Destination catalog version and page caching
+Every write to Destination (or its Tag/TransportMode lookups) bumps a catalog
+version kept in the page cache. Cached browse fragments, cached anonymous
+pages and their ETags all include the version, so a bump invalidates them
+without having to find and delete keys.
+"""
+import hashlib
+import re
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+CATALOG_KEY = 'catalog:version'
+BROWSE_PARAMS = ('max_carbon', 'transport', 'tags', 'page')
+# {% csrf_token %} output; cached pages store a placeholder and get each visitor's own token
+_CSRF_INPUT = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+_CSRF_PLACEHOLDER = rb'\1__CSRF_TOKEN__\2'
+
+
+def page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def _new_version():
+    # Microsecond clock: unique per bump and increasing across processes
+    return str(time.time_ns() // 1000), timezone.now().replace(microsecond=0)
+
+
+def catalog_version():
+    """(version, last_modified) of the destination catalog"""
+    cache = page_cache()
+    try:
+        value = cache.get(CATALOG_KEY)
+        if value is None:
+            # Evicted or first use: start a fresh version (add() so concurrent workers agree)
+            cache.add(CATALOG_KEY, _new_version(), None)
+            value = cache.get(CATALOG_KEY)
+    except Exception:
+        value = None
+    return value or _new_version()
+
+
+def bump_catalog_version():
+    """Invalidate cached browse results, pages and ETags"""
+    try:
+        page_cache().set(CATALOG_KEY, _new_version(), None)
+    except Exception:
+        pass
+
+
+def browse_params(query):
+    """
+    Canonical browse filters from a GET QueryDict: known parameters only,
+    tags lowercased, de-duplicated and sorted, transport lowercased.
+    """
+    params = {}
+    for name in BROWSE_PARAMS:
+        value = (query.get(name) or '').strip()
+        if name == 'tags':
+            value = ','.join(sorted({t.strip().lower() for t in value.split(',') if t.strip()}))
+        elif name == 'transport':
+            value = value.lower()
+        if value:
+            params[name] = value
+    return params
+
+
+def page_key(prefix, params, version=None):
+    """Cache key for `prefix` + normalized params under a catalog version"""
+    if version is None:
+        version = catalog_version()[0]
+    digest = hashlib.sha1(urlencode(sorted(params.items())).encode('utf-8')).hexdigest()
+    return f'{prefix}:{version}:{digest}'
+
+
+def _cacheable(request):
+    # Anonymous GETs with no pending flash messages render the same for everyone
+    return (
+        request.method in ('GET', 'HEAD')
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def _etag(request, *args, **kwargs):
+    if not _cacheable(request):
+        return None
+    return hashlib.sha1(page_key(request.path, browse_params(request.GET)).encode('utf-8')).hexdigest()[:32]
+
+
+def _last_modified(request, *args, **kwargs):
+    if not _cacheable(request):
+        return None
+    return catalog_version()[1]
+
+
+def cache_anonymous_page(view):
+    """
+    Serve anonymous GETs of `view` from the page cache, keyed on path,
+    normalized browse params and catalog version, with ETag/Last-Modified
+    revalidation (304s). Logged-in users and POSTs get the view as is.
+    """
+    @condition(etag_func=_etag, last_modified_func=_last_modified)
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not _cacheable(request):
+            return view(request, *args, **kwargs)
+        cache = page_cache()
+        key = page_key('page:' + request.path, browse_params(request.GET))
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            if b'__CSRF_TOKEN__' in content:
+                content = content.replace(b'__CSRF_TOKEN__', get_token(request).encode('ascii'))
+            response = HttpResponse(content, content_type=content_type)
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                content = _CSRF_INPUT.sub(_CSRF_PLACEHOLDER, response.content)
+                cache.set(key, (content, response['Content-Type']), getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+        # Let browsers keep the page but revalidate it (cheap 304 while the catalog is unchanged)
+        patch_cache_control(response, max_age=getattr(settings, 'PAGE_CACHE_MAX_AGE', 0))
+        return response
+    return wrapper
@@ -0,0 +1,155 @@
+"""
+Vectorized scoring engine for GreenTravelAI
+Holds the per-mode factors as NumPy arrays and scores whole arrays of trips
+(distance, passengers) in one pass. GreenTravelAI.calculate_recommendations
+is a thin wrapper over `ScoringEngine.score` for a single trip.
+"""
+# numpy is optional at runtime; without it GreenTravelAI keeps its pure-Python path
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Google Distance Matrix mode used for each transport's duration (None = speed-based)
+DURATION_MODES = {
+    'car': 'driving',
+    'ev': 'driving',
+    'bus': 'transit',
+    'train': 'transit',
+    'bike': 'bicycling',
+    'flight': None,
+}
+
+
+def _round(values, decimals=2):
+    """
+    Elementwise Python round(): matches TransportOption.calculate_emission /
+    compare_with_flight exactly, where np.round can differ by one unit at .xx5
+    """
+    return np.array([round(v, decimals) for v in np.asarray(values, dtype=float).tolist()], dtype=float)
+
+
+class ScoringEngine:
+    """
+    Array form of the GreenTravelAI rules.
+    All outputs are (n_trips, n_modes) arrays over `self.modes`; ineligible
+    modes for a trip's distance band are masked by `eligible`.
+    """
+
+    def __init__(self, transports, cost_per_km, band_table):
+        self.modes = tuple(transports)
+        self.mode_index = {name: i for i, name in enumerate(self.modes)}
+        self.emission_factor = np.array([transports[m].emission_factor for m in self.modes], dtype=float)
+        self.cost_per_km = np.array([cost_per_km.get(m, 0.0) for m in self.modes], dtype=float)
+        self.flight_index = self.mode_index.get('flight')
+
+        # Per-band matrices compiled from the BandTable: rank (-1 = not eligible),
+        # adjusted green score and speed for every mode
+        self.band_edges = np.array(band_table.edges, dtype=float)
+        shape = (len(band_table.bands), len(self.modes))
+        self.band_rank = np.full(shape, -1, dtype=np.int64)
+        self.band_score = np.zeros(shape, dtype=float)
+        self.band_speed = np.ones(shape, dtype=float)
+        for b, band in enumerate(band_table.bands):
+            for rule in band.modes:
+                i = self.mode_index[rule.name]
+                self.band_rank[b, i] = rule.rank
+                self.band_score[b, i] = rule.score
+                self.band_speed[b, i] = rule.speed
+
+    def band_of(self, distances):
+        """Band index (see rules.BandTable) for each distance"""
+        return np.searchsorted(self.band_edges, distances, side='left')
+
+    def score(self, distances, passengers=1, durations=None, decimals=2):
+        """
+        Score every mode for every trip.
+        - distances: array-like of km
+        - passengers: scalar or array-like, clamped to >= 1
+        - durations: optional {google_mode: array of seconds (NaN = unknown)}
+        - decimals: round money/emission outputs; None returns raw products
+        Returns a dict of arrays: eligible, rank, green_score, emission_kg,
+        emission_per_person_kg, cost_inr, cost_per_person_inr, duration_seconds.
+        """
+        d = np.atleast_1d(np.asarray(distances, dtype=float))
+        dcol = d[:, None]
+        pax = np.maximum(1, np.broadcast_to(np.asarray(passengers, dtype=float), d.shape))[:, None]
+
+        band = self.band_of(d)
+        rank = self.band_rank[band]
+        eligible = rank >= 0
+        score = self.band_score[band]
+
+        emission = self.emission_factor * dcol
+        cost = self.cost_per_km * dcol
+        if decimals is not None:
+            emission = np.round(emission, decimals)
+            cost = np.round(cost, decimals)
+        emission_pp = emission / pax
+        cost_pp = cost / pax
+        if decimals is not None:
+            emission_pp = np.round(emission_pp, decimals)
+            cost_pp = np.round(cost_pp, decimals)
+
+        speed = self.band_speed[band]
+        duration = ((dcol / np.maximum(1e-6, speed)) * 3600).astype(np.int64)
+        if durations:
+            for name, mode in DURATION_MODES.items():
+                if mode is None or mode not in durations or name not in self.mode_index:
+                    continue
+                given = np.broadcast_to(np.asarray(durations[mode], dtype=float), d.shape)
+                col = self.mode_index[name]
+                known = ~np.isnan(given)
+                duration[known, col] = given[known].astype(np.int64)
+
+        return {
+            'eligible': eligible,
+            'rank': rank,
+            'green_score': score,
+            'emission_kg': emission,
+            'emission_per_person_kg': emission_pp,
+            'cost_inr': cost,
+            'cost_per_person_inr': cost_pp,
+            'duration_seconds': duration,
+        }
+
+    def best(self, distances, passengers=1, durations=None):
+        """
+        Pick the recommended mode per trip: highest green score, then lowest
+        emission, then band priority (same ordering as calculate_recommendations).
+        Returns a dict of 1-D arrays: mode_index, transport, green_score,
+        emission_kg, co2_saved_kg (vs flight, floored at 0).
+        """
+        scores = self.score(distances, passengers, durations)
+        eligible = scores['eligible']
+        n = eligible.shape[0]
+        rows = np.arange(n)
+
+        key_score = np.where(eligible, scores['green_score'], -np.inf)
+        top = key_score == key_score.max(axis=1, keepdims=True)
+        key_emission = np.where(top & eligible, scores['emission_kg'], np.inf)
+        top &= key_emission == key_emission.min(axis=1, keepdims=True)
+        key_rank = np.where(top, scores['rank'], np.iinfo(np.int64).max)
+        choice = key_rank.argmin(axis=1)
+
+        d = np.atleast_1d(np.asarray(distances, dtype=float))
+        emission = _round(self.emission_factor[choice] * d)
+        flight = _round(self.emission_factor[self.flight_index] * d)
+        return {
+            'mode_index': choice,
+            'transport': np.array(self.modes, dtype=object)[choice],
+            'green_score': scores['green_score'][rows, choice],
+            'emission_kg': emission,
+            'co2_saved_kg': np.maximum(0, _round(flight - emission)),
+        }
+
+    def trip_emissions(self, modes, distances):
+        """
+        Emission of a given mode per trip and its saving vs flight (floored at
+        0), rounded like `best`. `modes` are transport keys from self.modes.
+        """
+        idx = np.array([self.mode_index[m] for m in modes], dtype=np.int64)
+        d = np.asarray(distances, dtype=float)
+        emission = _round(self.emission_factor[idx] * d)
+        flight = _round(self.emission_factor[self.flight_index] * d)
+        return emission, np.maximum(0, _round(flight - emission))
@@ -0,0 +1,170 @@
+"""
+Streaming TravelRecord export
+Rows are read with a chunked `iterator()` over a values_list projection and
+written as CSV, or as columnar Parquet / Arrow IPC stream when pyarrow is
+installed, one chunk at a time, so memory stays flat however many rows are
+exported. Used by the export_travel_records command and the staff export view.
+"""
+import csv
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+# pyarrow is optional; without it only CSV is available
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    pq = None
+
+EXPORT_FIELDS = (
+    'id', 'user_id', 'source', 'destination', 'distance_km', 'passenger_count', 'selected_travel_type',
+    'recommended_transport', 'co2_estimated_kg', 'co2_saved_kg', 'created_at',
+)
+FORMATS = ('csv', 'parquet', 'arrow')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+DEFAULT_CHUNK_SIZE = 5000
+# Leading characters that make spreadsheet apps evaluate a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def available_formats():
+    return FORMATS if pa is not None else ('csv',)
+
+
+def export_queryset(user_id=None, start=None, end=None, transport=None):
+    """
+    TravelRecord rows to export as value tuples (EXPORT_FIELDS order).
+    start/end are inclusive dates; transport matches recommended_transport.
+    """
+    from .models import TravelRecord
+    qs = TravelRecord.objects.all()
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+    if start is not None:
+        qs = qs.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end is not None:
+        qs = qs.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+    if transport:
+        qs = qs.filter(recommended_transport=transport)
+    return qs.order_by('id').values_list(*EXPORT_FIELDS)
+
+
+def _chunks(rows, chunk_size):
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Echo:
+    """File-like object whose write() returns its argument, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    """
+    CSV representation of an exported value. Text that a spreadsheet would
+    read as a formula (user-entered places like "=HYPERLINK(...)") gets a
+    leading apostrophe so it stays plain text.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """CSV text: a header line, then one string per chunk of rows"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for chunk in _chunks(rows, chunk_size):
+        yield ''.join(writer.writerow([csv_cell(value) for value in row]) for row in chunk)
+
+
+def arrow_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('user_id', pa.int64()),
+        ('source', pa.string()),
+        ('destination', pa.string()),
+        ('distance_km', pa.float64()),
+        ('passenger_count', pa.int32()),
+        ('selected_travel_type', pa.string()),
+        ('recommended_transport', pa.string()),
+        ('co2_estimated_kg', pa.float64()),
+        ('co2_saved_kg', pa.float64()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+class _ByteSink:
+    """Write-only byte buffer drained between chunks"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def stream_columnar(rows, fmt='parquet', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Parquet (one row group per chunk) or Arrow IPC stream bytes, yielded as
+    each chunk is encoded. Requires pyarrow.
+    """
+    if pa is None:
+        raise RuntimeError('pyarrow is required for parquet/arrow exports')
+    schema = arrow_schema()
+    sink = _ByteSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    for chunk in _chunks(rows, chunk_size):
+        columns = list(zip(*chunk))
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema,
+        )
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(rows, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Encoded export chunks (str for csv, bytes otherwise)"""
+    if fmt == 'csv':
+        return stream_csv(rows, chunk_size)
+    return stream_columnar(rows, fmt, chunk_size)
@@ -0,0 +1,66 @@
+"""
+Versioned emission/cost factor sets
+Every TravelRecord stores the factor version it was scored with. Version 'v1'
+is the original hard-coded GreenTravelAI table; newer sets are added through
+settings.GREEN_TRAVEL_FACTOR_SETS and selected with
+settings.GREEN_TRAVEL_FACTOR_VERSION. A set only needs the values that
+changed; everything else falls back to 'v1'. Existing records are brought up
+to date with the rescore_travel_records command.
+"""
+BASE_VERSION = 'v1'
+
+DEFAULT_FACTOR_SETS = {
+    BASE_VERSION: {
+        # kg CO2 per km
+        'emission_factors': {
+            'bus': 0.105,
+            'train': 0.041,
+            'ev': 0.075,
+            'car': 0.192,
+            'flight': 0.255,
+            'bike': 0.08,
+        },
+        # INR per km
+        'cost_per_km_inr': {
+            'bus': 6.0,
+            'train': 3.0,
+            'ev': 1.5,
+            'car': 10.0,
+            'flight': 20.0,
+            'bike': 2.5,
+        },
+    },
+}
+
+
+def load_factor_sets():
+    """Built-in sets plus settings.GREEN_TRAVEL_FACTOR_SETS"""
+    sets = dict(DEFAULT_FACTOR_SETS)
+    try:
+        from django.conf import settings
+        sets.update(getattr(settings, 'GREEN_TRAVEL_FACTOR_SETS', None) or {})
+    except Exception:
+        pass
+    return sets
+
+
+def current_factor_version():
+    """Factor version new recommendations are scored with"""
+    try:
+        from django.conf import settings
+        return getattr(settings, 'GREEN_TRAVEL_FACTOR_VERSION', None) or BASE_VERSION
+    except Exception:
+        return BASE_VERSION
+
+
+def get_factor_set(version):
+    """Complete factor set for `version` (missing values filled from the base set); ValueError if unknown"""
+    sets = load_factor_sets()
+    if version not in sets:
+        raise ValueError(f"Unknown factor set version {version!r}; known: {', '.join(sorted(sets))}")
+    base = DEFAULT_FACTOR_SETS[BASE_VERSION]
+    factors = sets[version]
+    return {
+        'emission_factors': {**base['emission_factors'], **factors.get('emission_factors', {})},
+        'cost_per_km_inr': {**base['cost_per_km_inr'], **factors.get('cost_per_km_inr', {})},
+    }
@@ -0,0 +1,186 @@
+"""
+Offline distance engine
+A bundled gazetteer of Indian cities (recommendations/data/india_cities.csv)
+loaded into compact coordinate arrays with a hash index on names/aliases and
+a sorted prefix index, plus vectorized haversine distances. Gives realistic
+distances with no network access at all.
+"""
+import csv
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DATA_FILE = Path(__file__).resolve().parent / 'data' / 'india_cities.csv'
+EARTH_RADIUS_KM = 6371.0088
+
+# Straight-line distance understates road/rail distance; this is a typical
+# detour factor for Indian intercity routes
+DEFAULT_ROAD_FACTOR = 1.2
+
+
+def _normalize(text):
+    return ' '.join(re.findall(r'[a-z]+', str(text or '').lower()))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; accepts scalars or arrays (NumPy when available)"""
+    if np is not None:
+        lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    lat1, lon1, lat2, lon2 = (math.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def estimate_durations(distance_km):
+    """Speed-based per-mode durations (seconds) used when no routing API is available"""
+    if distance_km < 50:
+        # City speeds for short distances
+        driving_speed = 40.0  # km/h
+        transit_speed = 50.0  # km/h
+    else:
+        # Highway speeds for longer distances
+        driving_speed = 60.0  # km/h
+        transit_speed = 70.0  # km/h
+    return {
+        'driving': int((distance_km / driving_speed) * 3600),
+        'transit': int((distance_km / transit_speed) * 3600),
+        'bicycling': int((distance_km / 15.0) * 3600),
+        'walking': int((distance_km / 5.0) * 3600),
+    }
+
+
+class Gazetteer:
+    """
+    In-memory city index.
+    - names: canonical city names, in file order (largest cities first)
+    - lat/lon: array('d') coordinates aligned with names
+    - exact index: normalized name or alias -> city id
+    - prefix index: sorted normalized keys, searched with bisect
+    """
+
+    def __init__(self, path=DATA_FILE):
+        self.names = []
+        self.lat = array('d')
+        self.lon = array('d')
+        self._index = {}
+        with open(path, encoding='utf-8', newline='') as fh:
+            for row in csv.DictReader(fh):
+                city_id = len(self.names)
+                self.names.append(row['name'])
+                self.lat.append(float(row['lat']))
+                self.lon.append(float(row['lon']))
+                for key in [row['name']] + [a for a in row['aliases'].split('|') if a]:
+                    self._index.setdefault(_normalize(key), city_id)
+        self._keys = sorted(self._index)
+        self._max_words = max(len(k.split()) for k in self._keys)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, place):
+        """
+        Resolve free text ('New Delhi, DL', 'near Connaught Place Delhi') to a
+        city id, or None. Tries the whole string, each comma-separated part,
+        then word n-grams (longest first), then a unique-ish name prefix.
+        """
+        text = str(place or '').lower()
+        whole = _normalize(text)
+        if not whole:
+            return None
+        if whole in self._index:
+            return self._index[whole]
+        for part in text.split(','):
+            key = _normalize(part)
+            if key in self._index:
+                return self._index[key]
+
+        words = whole.split()
+        for size in range(min(self._max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                key = ' '.join(words[start:start + size])
+                if key in self._index:
+                    return self._index[key]
+
+        first = _normalize(text.split(',')[0])
+        if len(first) >= 3:
+            best = None
+            i = bisect_left(self._keys, first)
+            while i < len(self._keys) and self._keys[i].startswith(first):
+                city_id = self._index[self._keys[i]]
+                best = city_id if best is None else min(best, city_id)
+                i += 1
+            return best
+        return None
+
+    def coordinates(self, place):
+        city_id = self.lookup(place)
+        if city_id is None:
+            return None
+        return self.lat[city_id], self.lon[city_id]
+
+    def distance_km(self, source, destination, road_factor=DEFAULT_ROAD_FACTOR):
+        """Estimated travel distance between two places, or None if either is unknown"""
+        a, b = self.lookup(source), self.lookup(destination)
+        if a is None or b is None:
+            return None
+        km = haversine_km(self.lat[a], self.lon[a], self.lat[b], self.lon[b]) * road_factor
+        return round(float(km), 2)
+
+    def distances_km(self, pairs, road_factor=DEFAULT_ROAD_FACTOR):
+        """
+        Vectorized distances for many (source, destination) pairs.
+        Returns a list aligned with `pairs`; unknown places give None.
+        """
+        ids = [(self.lookup(s), self.lookup(d)) for s, d in pairs]
+        known = [i for i, (a, b) in enumerate(ids) if a is not None and b is not None]
+        out = [None] * len(ids)
+        if not known:
+            return out
+        a = [ids[i][0] for i in known]
+        b = [ids[i][1] for i in known]
+        if np is not None:
+            lat, lon = np.frombuffer(self.lat, dtype=float), np.frombuffer(self.lon, dtype=float)
+            km = np.round(haversine_km(lat[a], lon[a], lat[b], lon[b]) * road_factor, 2)
+            for i, value in zip(known, km.tolist()):
+                out[i] = value
+        else:
+            for i, x, y in zip(known, a, b):
+                out[i] = round(haversine_km(self.lat[x], self.lon[x], self.lat[y], self.lon[y]) * road_factor, 2)
+        return out
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Process-wide Gazetteer, loaded on first use"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer()
+    return _gazetteer
+
+
+def offline_route(source, destination):
+    """
+    Route info in the same shape as get_distance_from_api, from the gazetteer.
+    Returns None when either place is not in the gazetteer.
+    """
+    from django.conf import settings
+    road_factor = getattr(settings, 'OFFLINE_ROAD_FACTOR', DEFAULT_ROAD_FACTOR)
+    distance_km = get_gazetteer().distance_km(source, destination, road_factor)
+    if distance_km is None:
+        return None
+    return {'distance_km': distance_km, 'durations': estimate_durations(distance_km), 'fallback': 'offline'}
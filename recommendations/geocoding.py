@@ -0,0 +1,269 @@
+"""
+Geocoding with a two-tier cache
+In-process LRU in front of a durable database table, shared by the Google and
+OpenStreetMap (Nominatim) lookups so repeat places never reach the network.
+"""
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .governor import governor, hedged
+from .instrumentation import stage
+from .singleflight import geocode_flight
+
+# googlemaps is optional at runtime; if it's not installed we fall back to the
+# mock distance calculator. This prevents an import-time crash.
+try:
+    import googlemaps as _googlemaps
+except Exception:
+    _googlemaps = None
+# Try to import geopy for OpenStreetMap fallback
+try:
+    from geopy.geocoders import Nominatim as _Nominatim
+    from geopy.distance import geodesic as _geodesic
+    _geopy = True
+except Exception:
+    _Nominatim = None
+    _geodesic = None
+    _geopy = False
+
+
+def google_configured():
+    """True when a usable Google Maps key and the `googlemaps` client are available"""
+    api_key = settings.GOOGLE_MAPS_API_KEY
+    return bool(api_key) and api_key.strip() != '' and api_key != 'YOUR_GOOGLE_MAPS_API_KEY_HERE' and _googlemaps is not None
+
+
+_gmaps_client = None
+_gmaps_client_key = None
+_gmaps_client_lock = threading.Lock()
+
+
+def get_gmaps_client():
+    """
+    Return the process-wide `googlemaps.Client`, creating it on first use.
+    The client keeps one `requests.Session`, so TCP/TLS connections are pooled
+    and reused across requests and threads instead of renegotiated per call.
+    """
+    global _gmaps_client, _gmaps_client_key
+    api_key = settings.GOOGLE_MAPS_API_KEY
+    with _gmaps_client_lock:
+        if _gmaps_client is None or _gmaps_client_key != api_key:
+            # A call that misses the routing deadline keeps its pool thread busy
+            # until it gives up, so neither one request nor its retries may
+            # outlive the deadline (googlemaps retries for 60 s by default)
+            deadline = getattr(settings, 'ROUTING_DEADLINE_SECONDS', 8)
+            options = {
+                'timeout': min(getattr(settings, 'GOOGLE_MAPS_TIMEOUT', 5), deadline),
+                'retry_timeout': deadline,
+            }
+            base_url = getattr(settings, 'GOOGLE_MAPS_BASE_URL', None)
+            if base_url:
+                options['base_url'] = base_url.rstrip('/')
+            client = _googlemaps.Client(key=api_key, **options)
+            pool_size = getattr(settings, 'ROUTING_MAX_WORKERS', 16)
+            try:
+                from requests.adapters import HTTPAdapter
+                scheme = (base_url or 'https://').split('://')[0] + '://'
+                client.session.mount(scheme, HTTPAdapter(pool_connections=4, pool_maxsize=pool_size))
+            except Exception:
+                pass
+            _gmaps_client, _gmaps_client_key = client, api_key
+        return _gmaps_client
+
+
+def normalize_place(place):
+    """Canonical cache key for a place string: 'Delhi ,  DL ' -> 'delhi, dl'"""
+    text = re.sub(r'\s+', ' ', str(place or '')).strip().lower()
+    text = re.sub(r'\s*,\s*', ', ', text)
+    return text.strip(' ,.')
+
+
+class GeocodeCache:
+    """
+    Two-tier geocode cache keyed on normalized place strings.
+    - Tier 1: bounded in-process LRU (per worker, no I/O)
+    - Tier 2: `GeocodeCacheEntry` table (shared by all workers, survives restarts)
+    Every entry carries its own expiry; expired rows are pruned and the table is
+    trimmed to `db_max_entries` (oldest first) every `prune_every` writes.
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=30 * 24 * 3600, db_max_entries=100000, prune_every=500):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_max_entries = db_max_entries
+        self.prune_every = prune_every
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, place):
+        """Return a copy of the cached result dict for `place`, or None on a miss"""
+        key = normalize_place(place)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > monotonic():
+                    self._lru.move_to_end(key)
+                    # Callers may mutate what they get; the cached dict must stay intact
+                    return dict(value)
+                del self._lru[key]
+
+        from .models import GeocodeCacheEntry
+        try:
+            row = GeocodeCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+        except DatabaseError:
+            return None
+        if row is None:
+            return None
+        value = row.as_result()
+        remaining = (row.expires_at - timezone.now()).total_seconds()
+        self._remember(key, value, remaining)
+        return dict(value)
+
+    def set(self, place, value, ttl_seconds=None):
+        """Store a result dict in both tiers"""
+        key = normalize_place(place)
+        if not key or value is None:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._remember(key, value, ttl)
+
+        from .models import GeocodeCacheEntry
+        try:
+            GeocodeCacheEntry.objects.update_or_create(
+                key=key,
+                defaults={
+                    'latitude': value.get('lat'),
+                    'longitude': value.get('lng'),
+                    'country_code': value.get('country_code') or '',
+                    'provider': value.get('provider') or '',
+                    'expires_at': timezone.now() + timedelta(seconds=ttl),
+                },
+            )
+        except DatabaseError:
+            return
+
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows and trim the table to `db_max_entries`, oldest first"""
+        from .models import GeocodeCacheEntry
+        try:
+            GeocodeCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+            stale = GeocodeCacheEntry.objects.order_by('-expires_at').values_list('pk', flat=True)[self.db_max_entries:]
+            stale_ids = list(stale)
+            if stale_ids:
+                GeocodeCacheEntry.objects.filter(pk__in=stale_ids).delete()
+        except DatabaseError:
+            pass
+
+    def clear(self):
+        """Empty the in-process tier (the durable tier is left untouched)"""
+        with self._lock:
+            self._lru.clear()
+
+    def _remember(self, key, value, ttl_seconds):
+        with self._lock:
+            self._lru[key] = (dict(value), monotonic() + ttl_seconds)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+
+geocode_cache = GeocodeCache(
+    max_entries=getattr(settings, 'GEOCODE_CACHE_MAX_ENTRIES', 2048),
+    ttl_seconds=getattr(settings, 'GEOCODE_CACHE_TTL', 30 * 24 * 3600),
+    db_max_entries=getattr(settings, 'GEOCODE_CACHE_DB_MAX_ENTRIES', 100000),
+)
+
+
+@stage('geocode_api', backend='google')
+def _geocode_google(place):
+    results = governor.call('google', get_gmaps_client().geocode, place)
+    if not results:
+        return None
+    location = results[0].get('geometry', {}).get('location', {})
+    country_code = None
+    for comp in results[0].get('address_components', []):
+        if 'country' in comp.get('types', []):
+            country_code = comp.get('short_name')
+            break
+    return {'lat': location.get('lat'), 'lng': location.get('lng'), 'country_code': country_code, 'provider': 'google'}
+
+
+@stage('geocode_api', backend='osm')
+def _geocode_nominatim(place, max_wait=None):
+    geolocator = _Nominatim(
+        user_agent="greentravel_app",
+        domain=getattr(settings, 'NOMINATIM_DOMAIN', 'nominatim.openstreetmap.org'),
+        scheme=getattr(settings, 'NOMINATIM_SCHEME', 'https'),
+    )
+    res = governor.call(
+        'nominatim', geolocator.geocode, place,
+        addressdetails=True, timeout=getattr(settings, 'NOMINATIM_TIMEOUT', 10), max_wait=max_wait,
+    )
+    if not res:
+        return None
+    adr = (getattr(res, 'raw', None) or {}).get('address', {})
+    cc = adr.get('country_code')
+    return {'lat': res.latitude, 'lng': res.longitude, 'country_code': cc.upper() if cc else None, 'provider': 'osm'}
+
+
+def geocode_place(place):
+    """
+    Resolve a place to {'lat', 'lng', 'country_code', 'provider'} through the cache.
+    Prefers Google Geocoding, falls back to Nominatim; returns None when neither
+    backend can resolve it. Failed lookups are not cached.
+    Concurrent misses for the same place share one provider lookup.
+    """
+    cached = geocode_cache.get(place)
+    if cached is not None:
+        return cached
+    return geocode_flight.do(
+        normalize_place(place), lambda: _geocode_uncached(place), recheck=lambda: geocode_cache.get(place),
+    )
+
+
+def _geocode_uncached(place):
+    result = None
+    osm_available = _geopy and _Nominatim is not None
+    hedge_delay = getattr(settings, 'GEOCODE_HEDGE_DELAY', None)
+    if google_configured() and hedge_delay is not None and osm_available and governor.available('nominatim'):
+        # Race Nominatim against a slow Google answer (without queueing for its
+        # rate limit); an answer without a country also triggers it
+        result = hedged(
+            [lambda: _geocode_google(place), lambda: _geocode_nominatim(place, max_wait=0)],
+            hedge_delay, accept=lambda r: bool(r and r.get('country_code')),
+        )
+        osm_available = False
+    elif google_configured():
+        try:
+            result = _geocode_google(place)
+        except Exception:
+            result = None
+
+    # A Google hit without a country is still worth a second opinion from OSM
+    if (result is None or not result.get('country_code')) and osm_available:
+        try:
+            result = _geocode_nominatim(place) or result
+        except Exception:
+            pass
+
+    if result is not None and result.get('lat') is not None and result.get('lng') is not None:
+        geocode_cache.set(place, result)
+        return result
+    return None
@@ -0,0 +1,279 @@
+"""
+Outbound request governor for the geocoding/routing backends
+- TokenBucket: client-side rate limit (Nominatim's usage policy is 1 req/s)
+- CircuitBreaker: after repeated failures a backend is skipped outright for
+  a cool-down, then a single probe call decides whether it has recovered
+- `hedged`: start a second provider when the first is slow, keep the first
+  acceptable answer
+`governor.call('google', func, ...)` applies both guards and raises
+BackendUnavailable instead of waiting out a timeout on a backend known to be
+down. Only backend faults (transport errors, timeouts, 5xx, quota/rate
+limits) count towards opening a circuit; a rejected query is the caller's
+problem. State is per process.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from .instrumentation import registry
+
+# Client libraries are optional; their exception types are only used to classify failures
+try:
+    from googlemaps import exceptions as _gmaps_exc
+except Exception:
+    _gmaps_exc = None
+try:
+    from geopy import exc as _geopy_exc
+except Exception:
+    _geopy_exc = None
+
+try:
+    from requests import exceptions as _requests_exc
+except Exception:
+    _requests_exc = None
+
+# Google API statuses that mean the service (not the query) is the problem
+GOOGLE_FAILURE_STATUSES = frozenset(('OVER_QUERY_LIMIT', 'OVER_DAILY_LIMIT', 'UNKNOWN_ERROR'))
+
+registry.describe('greentravel_outbound_rejected_total', 'Outbound calls refused by the governor (circuit open or rate limited)')
+registry.describe('greentravel_circuit_transitions_total', 'Circuit breaker state changes per backend')
+registry.describe('greentravel_hedged_total', 'Hedged lookups by which provider answered')
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class BackendUnavailable(Exception):
+    """Raised when the governor refuses an outbound call"""
+
+    def __init__(self, backend, reason):
+        super().__init__(f'{backend} unavailable ({reason})')
+        self.backend = backend
+        self.reason = reason
+
+
+def is_backend_failure(exc):
+    """
+    True when `exc` says the backend is unhealthy (unreachable, timing out,
+    5xx, out of quota) rather than that the request itself was bad
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if _gmaps_exc is not None:
+        # HTTPError is a TransportError subclass, so check it first
+        if isinstance(exc, _gmaps_exc.HTTPError):
+            return exc.status_code >= 500 or exc.status_code == 429
+        if isinstance(exc, (_gmaps_exc.Timeout, _gmaps_exc.TransportError)):
+            return True
+        if isinstance(exc, _gmaps_exc.ApiError):
+            return exc.status in GOOGLE_FAILURE_STATUSES
+    if _geopy_exc is not None and isinstance(exc, _geopy_exc.GeopyError):
+        failures = (
+            _geopy_exc.GeocoderTimedOut, _geopy_exc.GeocoderUnavailable,
+            _geopy_exc.GeocoderRateLimited, _geopy_exc.GeocoderQuotaExceeded,
+        )
+        # geopy raises the bare GeocoderServiceError for unexpected HTTP errors
+        return isinstance(exc, failures) or type(exc) is _geopy_exc.GeocoderServiceError
+    if _requests_exc is not None and isinstance(exc, (_requests_exc.ConnectionError, _requests_exc.Timeout)):
+        return True
+    return isinstance(exc, OSError)
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait=0.0):
+        """
+        Take a token, sleeping up to `max_wait` seconds for one.
+        Returns False (taking nothing) when the wait would be longer.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            delay = (1.0 - self._tokens) / self.rate if self._tokens < 1.0 else 0.0
+            if delay > max_wait:
+                return False
+            # Reserve the token now so concurrent callers queue up behind it
+            self._tokens -= 1.0
+        if delay:
+            time.sleep(delay)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open once `reset_timeout` has passed, letting one probe through;
+    the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        """True while calls are being refused outright (cool-down not yet over)"""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def release_probe(self):
+        """Hand back a half-open probe slot that was not used"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def _transition(self, state):
+        self.state = state
+        registry.inc('greentravel_circuit_transitions_total', backend=self.name, state=state)
+
+
+class Governor:
+    """Per-backend rate limits and circuit breakers, configured from settings"""
+
+    def __init__(self):
+        self._breakers = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, backend):
+        with self._lock:
+            if backend not in self._breakers:
+                self._breakers[backend] = CircuitBreaker(
+                    backend,
+                    failure_threshold=getattr(settings, 'OUTBOUND_FAILURE_THRESHOLD', 5),
+                    reset_timeout=getattr(settings, 'OUTBOUND_RESET_TIMEOUT', 30.0),
+                )
+            return self._breakers[backend]
+
+    def bucket(self, backend):
+        with self._lock:
+            if backend not in self._buckets:
+                limit = getattr(settings, 'OUTBOUND_RATE_LIMITS', {}).get(backend)
+                self._buckets[backend] = TokenBucket(*limit) if limit else None
+            return self._buckets[backend]
+
+    def call(self, backend, func, *args, max_wait=None, **kwargs):
+        """
+        Run `func` against `backend` if its circuit admits it and a rate-limit
+        token is available within `max_wait` seconds (OUTBOUND_MAX_WAIT_SECONDS
+        by default). Exceptions from `func` that indicate a backend fault
+        (is_backend_failure) count towards opening its circuit; others are
+        re-raised without penalizing the backend.
+        """
+        breaker = self.breaker(backend)
+        if not breaker.allow():
+            registry.inc('greentravel_outbound_rejected_total', backend=backend, reason='circuit_open')
+            raise BackendUnavailable(backend, 'circuit open')
+        bucket = self.bucket(backend)
+        if max_wait is None:
+            max_wait = getattr(settings, 'OUTBOUND_MAX_WAIT_SECONDS', 2.0)
+        if bucket is not None and not bucket.acquire(max_wait):
+            # Not the backend's fault; give a half-open probe slot back
+            breaker.release_probe()
+            registry.inc('greentravel_outbound_rejected_total', backend=backend, reason='rate_limited')
+            raise BackendUnavailable(backend, 'rate limited')
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            if is_backend_failure(exc):
+                breaker.record_failure()
+            else:
+                # The backend answered; the query was the problem
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+    def available(self, backend):
+        """False while the backend's circuit is open (no probe is taken)"""
+        return not self.breaker(backend).is_open()
+
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+            self._buckets.clear()
+
+
+governor = Governor()
+
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+
+
+def hedged(attempts, delay, accept=bool):
+    """
+    Run `attempts` (zero-argument callables, in preference order), starting
+    each next one only if nothing acceptable has arrived `delay` seconds after
+    the previous start. Returns the first result passing `accept`; otherwise
+    the first non-None result of the earliest attempt, or None. Exceptions
+    count as no result.
+    """
+    pending = {}
+    results = {}
+    remaining = list(enumerate(attempts))
+
+    def launch():
+        index, attempt = remaining.pop(0)
+        # Carry the request's context (stage timings) into the worker thread
+        context = contextvars.copy_context()
+        pending[_hedge_executor.submit(context.run, attempt)] = index
+
+    launch()
+    while pending:
+        done, _ = wait(pending, timeout=delay if remaining else None, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            try:
+                results[index] = future.result()
+            except Exception:
+                results[index] = None
+            if accept(results[index]):
+                registry.inc('greentravel_hedged_total', winner='primary' if index == 0 else 'hedge')
+                return results[index]
+        # Either the delay passed or an attempt came back empty: hedge now
+        if remaining:
+            launch()
+    for index in sorted(results):
+        if results[index] is not None:
+            return results[index]
+    return None
@@ -0,0 +1,253 @@
+"""
+Bulk import of historical trips
+Streams CSV or JSONL trip logs in chunks. Each chunk resolves distances
+(given in the file, else the shared route cache, else the offline gazetteer),
+is scored in one vectorized pass (ScoringEngine.best: recommended transport,
+emission and savings vs flight), and is written with bulk_create in its own
+transaction together with a JobCheckpoint, so an interrupted import resumes
+after the last committed chunk.
+
+Input columns: source, destination (required); distance_km, passenger_count,
+selected_travel_type, user (username or id), created_at (ISO 8601) optional.
+"""
+import csv
+import json
+import math
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .ai_logic import GreenTravelAI
+from .gazetteer import DEFAULT_ROAD_FACTOR, get_gazetteer
+from .ingest import write_records
+from .models import JobCheckpoint, TravelRecord
+from .rollups import local_day
+from .routecache import route_cache
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path, fmt=None):
+    """
+    Dicts from a CSV (header row) or JSONL file, streamed. A JSONL line that
+    doesn't parse is yielded as a RowError, so it's reported like any other
+    bad row instead of stopping the import.
+    """
+    fmt = fmt or ('jsonl' if Path(path).suffix.lower() in ('.jsonl', '.ndjson', '.json') else 'csv')
+    with open(path, encoding='utf-8', newline='') as fh:
+        if fmt == 'csv':
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield RowError('invalid JSON')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    stamp = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    return stamp if timezone.is_aware(stamp) else timezone.make_aware(stamp)
+
+
+def _parse_row(row):
+    """(source, destination, distance_km or None, passengers, travel_type, user, created_at)"""
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError('expected an object')
+    source = str(row.get('source') or '').strip()
+    destination = str(row.get('destination') or '').strip()
+    if not source or not destination:
+        raise RowError('source and destination are required')
+    try:
+        distance = row.get('distance_km')
+        distance = float(distance) if distance not in (None, '') else None
+        passengers = max(1, int(row.get('passenger_count') or 1))
+        created_at = _parse_time(row.get('created_at'))
+    except (TypeError, ValueError) as exc:
+        raise RowError(str(exc)) from exc
+    # float() accepts 'nan'/'inf', which would reach the NOT NULL column as NULL
+    if distance is not None and (not math.isfinite(distance) or distance <= 0):
+        raise RowError('distance_km must be a positive number')
+    user = str(row.get('user') or '').strip()
+    return source, destination, distance, passengers, str(row.get('selected_travel_type') or '').strip(), user, created_at
+
+
+class TripImporter:
+    """Turns chunks of raw rows into scored, unsaved TravelRecords"""
+
+    def __init__(self, default_user=None):
+        self.default_user = default_user
+        self.road_factor = getattr(settings, 'OFFLINE_ROAD_FACTOR', DEFAULT_ROAD_FACTOR)
+        self.engine = GreenTravelAI.get_engine()
+        self._users = {}
+        self._distances = {}
+
+    def _user_ids(self, keys):
+        """Map 'user' column values (username or numeric id) to user ids (None if unknown), cached across chunks"""
+        missing = {k for k in keys if k and k not in self._users}
+        if missing:
+            User = get_user_model()
+            ids = {int(k) for k in missing if k.isdigit()}
+            for pk in User.objects.filter(pk__in=ids).values_list('pk', flat=True):
+                self._users[str(pk)] = pk
+            for pk, username in User.objects.filter(**{f'{User.USERNAME_FIELD}__in': missing}).values_list('pk', User.USERNAME_FIELD):
+                self._users[username] = pk
+            for k in missing:
+                self._users.setdefault(k, None)
+        return self._users
+
+    def resolve_distances(self, pairs):
+        """
+        Distance per (source, destination): route cache first, then the
+        gazetteer; None if unknown. Memoized for the whole import, since trip
+        logs repeat the same routes.
+        """
+        todo = {pair for pair in pairs if pair not in self._distances}
+        for backend in ('google', 'osm'):
+            if not todo:
+                break
+            for pair, cached in route_cache.get_many(todo, backend).items():
+                if cached and cached.get('distance_km'):
+                    self._distances[pair] = float(cached['distance_km'])
+                    todo.discard(pair)
+        if todo:
+            todo = list(todo)
+            self._distances.update(zip(todo, get_gazetteer().distances_km(todo, self.road_factor)))
+        return [self._distances[pair] for pair in pairs]
+
+    def _score(self, distances, passengers):
+        """(transport, emission_kg, co2_saved_kg) per trip"""
+        if self.engine is not None:
+            best = self.engine.best(distances, passengers)
+            return list(zip(
+                best['transport'].tolist(), best['emission_kg'].tolist(), best['co2_saved_kg'].tolist(),
+            ))
+        out = []
+        for km, pax in zip(distances, passengers):
+            option = GreenTravelAI.get_best_recommendation(km, None, pax)
+            out.append((option['transport'], option['emission_kg'], GreenTravelAI.compare_with_flight(option, km)))
+        return out
+
+    def build(self, rows):
+        """Returns (records, errors) where errors is a list of (row index, message)"""
+        parsed, errors = [], []
+        for i, row in enumerate(rows):
+            try:
+                parsed.append((i, _parse_row(row)))
+            except RowError as exc:
+                errors.append((i, str(exc)))
+
+        need = [(p[0], p[1]) for _, p in parsed if p[2] is None]
+        resolved = iter(self.resolve_distances(need))
+        trips = []
+        for i, p in parsed:
+            distance = p[2] if p[2] is not None else next(resolved)
+            if distance is None:
+                errors.append((i, f'unknown route {p[0]} → {p[1]}'))
+                continue
+            trips.append((i, p, round(distance, 2)))
+
+        users = self._user_ids({p[5] for _, p, _ in trips})
+        known = []
+        for i, p, km in trips:
+            # Importing a named but unknown user's trips as anonymous would hide them
+            if p[5] and users.get(p[5]) is None:
+                errors.append((i, f'unknown user {p[5]}'))
+            else:
+                known.append((p, km))
+        trips = known
+        errors.sort()
+        if not trips:
+            return [], errors
+        now = timezone.now()
+        scores = self._score([km for _, km in trips], [p[3] for p, _ in trips])
+        records = []
+        for (p, km), (transport, emission, saved) in zip(trips, scores):
+            source, destination, _, passengers, travel_type, user, created_at = p
+            records.append(TravelRecord(
+                user_id=users.get(user) if user else self.default_user,
+                source=source[:200],
+                destination=destination[:200],
+                distance_km=km,
+                passenger_count=passengers,
+                selected_travel_type=travel_type[:50],
+                recommended_transport=transport,
+                co2_estimated_kg=float(emission),
+                co2_saved_kg=float(saved),
+                created_at=created_at or now,
+            ))
+        return records, errors
+
+
+def import_trips(path, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE, job=None, restart=False, default_user=None, progress=None):
+    """
+    Import a trip log. `job` names the checkpoint (default: the file path);
+    a rerun skips rows already committed unless `restart` is set.
+    Returns a stats dict: rows, imported, skipped, resumed_from, seconds, errors (first few).
+    """
+    job = job or f'import_trips:{Path(path).resolve()}'
+    checkpoint, _ = JobCheckpoint.objects.get_or_create(name=job)
+    if restart:
+        checkpoint.position = 0
+        checkpoint.state = {}
+        checkpoint.save()
+    start_at = checkpoint.position
+    stats = {'rows': start_at, 'imported': 0, 'skipped': 0, 'resumed_from': start_at, 'errors': []}
+    # First/last created_at day imported so far (for rebuilding rollups afterwards)
+    days = [date.fromisoformat(d) for d in checkpoint.state.get('days', [])]
+
+    importer = TripImporter(default_user)
+    started = time.monotonic()
+    rows = read_rows(path, fmt)
+    for _ in range(start_at):
+        if next(rows, None) is None:
+            break
+    for chunk in _chunks(rows, chunk_size):
+        records, errors = importer.build(chunk)
+        for i, message in errors:
+            if len(stats['errors']) < 20:
+                stats['errors'].append(f'row {stats["rows"] + i + 1}: {message}')
+        if records:
+            chunk_days = [local_day(min(r.created_at for r in records)), local_day(max(r.created_at for r in records))]
+            days = [min(days[0], chunk_days[0]), max(days[1], chunk_days[1])] if days else chunk_days
+        stats['rows'] += len(chunk)
+        stats['imported'] += len(records)
+        stats['skipped'] += len(errors)
+        with transaction.atomic():
+            if records:
+                write_records(records)
+            checkpoint.position = stats['rows']
+            checkpoint.state = {'days': [d.isoformat() for d in days]}
+            checkpoint.save()
+        if progress:
+            progress(stats, time.monotonic() - started)
+
+    stats['seconds'] = round(time.monotonic() - started, 2)
+    stats['days'] = days
+    return stats
+
@@ -0,0 +1,182 @@
+"""
+Write-behind TravelRecord ingestion
+Requests hand finished TravelRecord instances to a bounded in-process queue;
+one background thread writes them with bulk_create in batches, flushing when
+a batch fills or has waited `flush_interval` seconds. A full queue pushes back
+on the caller (bounded wait, then a direct write), and the queue is drained
+at interpreter exit. A batch that fails is retried row by row, so one bad
+record only loses itself.
+Queued records are not visible until written: pages showing a user's own
+trips call `flush_user()` first (this covers records queued in the same
+worker process; other workers see them within `flush_interval`).
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_FLUSH = object()
+
+
+class RecordWriter:
+    """Buffered, batched writer for TravelRecord rows"""
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10000, put_timeout=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        # Queued-but-unwritten records per user, for flush_user()
+        self._pending = Counter()
+        self._written = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_worker(self):
+        # Started lazily, and again in each forked worker process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                    self._pending = Counter()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='travel-record-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, record):
+        """
+        Queue an unsaved TravelRecord. When the queue stays full for
+        `put_timeout` seconds the record is written directly instead, so
+        nothing is dropped and callers slow down to the writer's pace.
+        """
+        self._ensure_worker()
+        with self._written:
+            self._pending[record.user_id] += 1
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            self._done([record])
+            write_records([record])
+
+    def flush(self):
+        """Write the pending batch now and block until every queued record has been written"""
+        if self._thread is not None and self._thread.is_alive():
+            # Without the marker a partial batch would wait out flush_interval
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def flush_user(self, user_id, timeout=5.0):
+        """
+        Write this user's queued records now, waiting up to `timeout` seconds,
+        so the page they load next includes the trip they just submitted
+        """
+        with self._written:
+            if not self._pending[user_id]:
+                return True
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        try:
+            self._queue.put(_FLUSH, timeout=timeout)
+        except queue.Full:
+            return False
+        with self._written:
+            return self._written.wait_for(lambda: not self._pending[user_id], timeout)
+
+    def close(self, timeout=10):
+        """Drain the queue and stop the worker"""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            stop = item is _STOP
+            flush = item is _FLUSH
+            if item is not None and not stop and not flush:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (stop or flush or len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+            if stop or flush:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        try:
+            try:
+                write_records(batch)
+            except Exception:
+                # One bad row fails the whole bulk insert; retry them one by one
+                # so only the rows that still fail are lost
+                for record in batch:
+                    record.pk = None
+                    record._state.adding = True
+                    try:
+                        write_records([record])
+                    except Exception as e:
+                        # Don't kill the writer on DB errors
+                        logger.exception(
+                            "Database Error: dropped TravelRecord %s -> %s (user %s): %s",
+                            record.source, record.destination, record.user_id, e,
+                        )
+        finally:
+            close_old_connections()
+            self._done(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _done(self, records):
+        with self._written:
+            for record in records:
+                self._pending[record.user_id] -= 1
+                if self._pending[record.user_id] <= 0:
+                    del self._pending[record.user_id]
+            self._written.notify_all()
+
+
+def write_records(records):
+    """
+    bulk_create TravelRecords and fold them into the per-user summaries (and
+    into rollup days the watermark has already passed). bulk_create skips
+    post_save, so those updates happen here, in the same transaction.
+    """
+    from .models import TravelRecord
+    from .rollups import apply_late_records
+    from .summaries import apply_records
+    with transaction.atomic():
+        TravelRecord.objects.bulk_create(records)
+        apply_records(records)
+        apply_late_records(records)
+
+
+record_writer = RecordWriter(
+    batch_size=getattr(settings, 'WRITE_BEHIND_BATCH_SIZE', 200),
+    flush_interval=getattr(settings, 'WRITE_BEHIND_FLUSH_SECONDS', 1.0),
+    max_queue=getattr(settings, 'WRITE_BEHIND_MAX_QUEUE', 10000),
+    put_timeout=getattr(settings, 'WRITE_BEHIND_PUT_TIMEOUT', 0.5),
+)
+atexit.register(record_writer.close)
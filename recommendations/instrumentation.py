@@ -0,0 +1,269 @@
+"""
+Request and stage latency instrumentation
+- `stage(name, **labels)`: times a block (context manager or decorator) into
+  the `greentravel_stage_seconds` histogram and the current request's
+  breakdown; labels (e.g. backend) can be filled in while the block runs
+- RequestTimingMiddleware: per-view request histograms, a `Server-Timing`
+  header and one structured log line per request with the stage breakdown
+- `metrics_view`: Prometheus text exposition of everything recorded
+Metrics are per process; scrape every worker (or run one per host).
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger('greentravel.requests')
+
+# Seconds; route lookups can take several seconds on a cold cache
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Methods recorded as themselves; anything else a client sends is 'other', so
+# made-up methods can't grow the registry without bound
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# {stage: seconds} for the request being served (None outside requests)
+_request_stages = ContextVar('greentravel_request_stages', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Process-local histograms and counters keyed by (name, sorted labels)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def value(self, name, **labels):
+        """Current value of a counter (0 if never incremented)"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Prometheus text format (version 0.0.4)"""
+        with self._lock:
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        for kind, names in (('histogram', {k[0] for k in histograms}), ('counter', {k[0] for k in counters})):
+            for name in sorted(names):
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+                if kind == 'counter':
+                    for (n, labels), value in sorted(counters.items()):
+                        if n == name:
+                            lines.append(f'{name}{_labels(labels)} {value}')
+                    continue
+                for (n, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {total}')
+                    lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    # Label value escaping per the text exposition format: backslash, quote, newline
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+registry = MetricsRegistry()
+registry.describe('greentravel_request_seconds', 'Request latency by view, method and status')
+registry.describe('greentravel_stage_seconds', 'Latency of route finder stages (geocode, route, score, db_write, render)')
+registry.describe('greentravel_stage_errors_total', 'Exceptions raised inside an instrumented stage')
+
+
+class _Stage:
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+
+@contextmanager
+def _timed(name, labels):
+    current = _Stage(name, dict(labels))
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception:
+        registry.inc('greentravel_stage_errors_total', stage=name, **current.labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe('greentravel_stage_seconds', elapsed, stage=name, **current.labels)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + elapsed
+
+
+class stage:
+    """
+    Time a block or function as route finder stage `name`:
+        with stage('route') as s:
+            ...
+            s.labels['backend'] = 'google'
+    or @stage('score') on a function.
+    """
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+        self._context = None
+
+    def __enter__(self):
+        self._context = _timed(self.name, self.labels)
+        return self._context.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self._context.__exit__(*exc_info)
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed(self.name, self.labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class RequestTimingMiddleware:
+    """
+    Times every request (sync or async views), records it per view, and
+    reports the stage breakdown in a Server-Timing header and a JSON log line.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, start = self._begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            stages = self._end(token)
+        return self._finish(request, response, start, stages)
+
+    async def __acall__(self, request):
+        token, start = self._begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stages = self._end(token)
+        return self._finish(request, response, start, stages)
+
+    def _begin(self):
+        return _request_stages.set({}), time.perf_counter()
+
+    def _end(self, token):
+        stages = _request_stages.get()
+        _request_stages.reset(token)
+        return stages
+
+    def _finish(self, request, response, start, stages):
+        elapsed = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else '') or 'unmatched'
+        method = request.method if request.method in KNOWN_METHODS else 'other'
+        registry.observe(
+            'greentravel_request_seconds', elapsed, view=view, method=method, status=response.status_code,
+        )
+        if stages:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={seconds * 1000:.1f}' for name, seconds in stages.items()
+            ) + f', total;dur={elapsed * 1000:.1f}'
+        logger.info('request', extra={'data': {
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2),
+            'stages_ms': {name: round(seconds * 1000, 2) for name, seconds in stages.items()},
+        }})
+        return response
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per log line; structured fields come from `extra={'data': {...}}`"""
+
+    def format(self, record):
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update(getattr(record, 'data', None) or {})
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; limited to METRICS_ALLOWED_IPS"""
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden('Forbidden')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
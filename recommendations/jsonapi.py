@@ -0,0 +1,46 @@
+"""
+JSON responses for the public API
+Serialized with orjson when it is installed (stdlib json otherwise). GET/HEAD
+responses carry an ETag of the body and answer a matching If-None-Match
+with 304, so clients polling the same query skip the download.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+# orjson is optional; it is several times faster on float-heavy payloads
+try:
+    import orjson as _orjson
+except Exception:
+    _orjson = None
+
+_encoder = DjangoJSONEncoder()
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes"""
+    if _orjson is not None:
+        # Datetimes go through DjangoJSONEncoder too, so both paths format them alike
+        return _orjson.dumps(data, default=_encoder.default, option=_orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_response(request, data, status=200, max_age=None, private=False):
+    """
+    HttpResponse with `data` as JSON. Successful GET/HEAD responses get an
+    ETag (and `Cache-Control: public, max-age` when given, or `private` for
+    responses that depend on the caller's credentials) and become a 304 when
+    the client already has the same body.
+    """
+    response = HttpResponse(dumps(data), status=status, content_type='application/json')
+    if status != 200 or request.method not in ('GET', 'HEAD'):
+        return response
+    etag = '"%s"' % hashlib.sha1(response.content).hexdigest()[:32]
+    response['ETag'] = etag
+    if max_age is not None:
+        # Shared caches may ignore Vary: Authorization; keep keyed answers out of them
+        patch_cache_control(response, max_age=max_age, **({'private': True} if private else {'public': True}))
+    return get_conditional_response(request, etag=etag, response=response)
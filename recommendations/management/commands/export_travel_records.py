@@ -0,0 +1,47 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.export import DEFAULT_CHUNK_SIZE, FORMATS, available_formats, export_queryset, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream TravelRecord rows to CSV, Parquet or Arrow (parquet/arrow need pyarrow)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help='Output file (defaults to stdout)')
+        parser.add_argument('--user', dest='user_id', type=int, help='Only this user id')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD)')
+        parser.add_argument('--transport', help='Only this recommended transport')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['format']
+        if fmt not in available_formats():
+            raise CommandError(f"{fmt} export needs pyarrow: pip install pyarrow")
+        # Binary formats go to the byte stream underneath stdout
+        binary_out = None
+        if fmt != 'csv' and not options['output']:
+            binary_out = getattr(self.stdout, 'buffer', None)
+            if binary_out is None:
+                raise CommandError(f"{fmt} export needs --output when stdout is not a byte stream")
+        if options['chunk_size'] < 1:
+            raise CommandError('Expected --chunk-size >= 1')
+
+        rows = export_queryset(options['user_id'], options['start'], options['end'], options['transport'])
+        chunks = stream_export(rows, fmt, options['chunk_size'])
+        if options['output']:
+            mode, encoding = ('w', 'utf-8') if fmt == 'csv' else ('wb', None)
+            with open(options['output'], mode, encoding=encoding, newline='' if fmt == 'csv' else None) as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported travel records to {options['output']}"))
+        elif binary_out is not None:
+            for chunk in chunks:
+                binary_out.write(chunk)
+            binary_out.flush()
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
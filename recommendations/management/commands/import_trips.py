@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.importer import DEFAULT_CHUNK_SIZE, import_trips
+from recommendations.rollups import recompute_rollups, rollup_days_behind
+
+
+class Command(BaseCommand):
+    help = (
+        "Import historical trips from CSV/JSONL: distances from the route cache or offline "
+        "gazetteer, vectorized scoring, chunked bulk inserts, resumable"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or JSONL trip log')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Default: from the file extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--user', help='Username for rows without a user column')
+        parser.add_argument('--job', help='Checkpoint name (default: derived from the file path)')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the first row')
+
+    def handle(self, *args, **options):
+        default_user = None
+        if options['user']:
+            User = get_user_model()
+            try:
+                default_user = User.objects.get(**{User.USERNAME_FIELD: options['user']}).pk
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user {options['user']}")
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        def progress(stats, elapsed):
+            rate = (stats['rows'] - stats['resumed_from']) / elapsed * 60 if elapsed else 0
+            self.stdout.write(
+                f"  {stats['rows']} rows read, {stats['imported']} imported, "
+                f"{stats['skipped']} skipped ({rate:,.0f} rows/min)"
+            )
+
+        try:
+            stats = import_trips(
+                options['path'], options['format'], options['chunk_size'], options['job'],
+                options['restart'], default_user, progress,
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        if stats['resumed_from']:
+            self.stdout.write(f"Resumed after row {stats['resumed_from']}")
+        for error in stats['errors']:
+            self.stderr.write(f"  skipped {error}")
+        behind = rollup_days_behind(stats['days'])
+        if behind and stats['imported']:
+            self.stdout.write(f"Rebuilding rollups for {behind[0]} .. {behind[1]}")
+            recompute_rollups(*behind)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['imported']} trip(s), skipped {stats['skipped']}, in {stats['seconds']}s"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recommendations.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user travel summaries (TravelSummary / TravelModeSummary) from TravelRecord"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', dest='user_ids', type=int, action='append',
+            help='Only rebuild this user id (repeatable); default is every user',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt travel summaries for {count} user(s)"))
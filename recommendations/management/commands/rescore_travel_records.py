@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.factors import current_factor_version, get_factor_set
+from recommendations.rescore import DEFAULT_BATCH_SIZE, rescore_records, stale_records
+from recommendations.rollups import recompute_rollups, rollup_days_behind
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute stored CO2 values of TravelRecords scored with another emission factor "
+        "version (keyset batches, throttled, resumable)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factor-version', dest='version', help='Target factor set (default: the current one)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to sleep between batches')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and rescan from the first record')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the records to rescore')
+
+    def handle(self, *args, **options):
+        version = options['version'] or current_factor_version()
+        try:
+            get_factor_set(version)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['batch_size'] < 1 or options['pause'] < 0:
+            raise CommandError('Expected --batch-size >= 1 and --pause >= 0')
+
+        if options['dry_run']:
+            self.stdout.write(f"{stale_records(version).count()} record(s) to rescore to factor set {version}")
+            return
+
+        def progress(stats, last_id):
+            self.stdout.write(f"  up to id {last_id}: {stats['scanned']} scanned, {stats['updated']} changed")
+
+        stats = rescore_records(
+            version, options['batch_size'], options['pause'], restart=options['restart'], progress=progress,
+        )
+        if stats['resumed_from']:
+            self.stdout.write(f"Resumed after id {stats['resumed_from']}")
+        behind = rollup_days_behind(stats['days'])
+        if behind and stats['updated']:
+            self.stdout.write(f"Rebuilding rollups for {behind[0]} .. {behind[1]}")
+            recompute_rollups(*behind)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {stats['scanned']} record(s) to factor set {version} "
+            f"({stats['updated']} changed) in {stats['seconds']}s"
+        ))
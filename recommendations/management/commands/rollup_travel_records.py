@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recommendations.rollups import recompute_rollups, update_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the daily TravelRecord rollups from the watermark, or recompute "
+        "a date range with --start/--end"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First day to recompute (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day to recompute (YYYY-MM-DD), default today')
+        parser.add_argument('--chunk-days', type=int, default=7, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        if options['start'] is None:
+            if options['end'] is not None:
+                raise CommandError('--end needs --start')
+            count = update_rollups()
+            self.stdout.write(self.style.SUCCESS(f"Applied {count} new travel record(s) to the rollups"))
+            return
+
+        start, end = options['start'], options['end'] or date.today()
+        if end < start or options['chunk_days'] < 1:
+            raise CommandError('Expected --start <= --end and --chunk-days >= 1')
+
+        def progress(first, last):
+            self.stdout.write(f"  rebuilt {first} .. {last}")
+
+        days = recompute_rollups(start, end, options['chunk_days'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed rollups for {days} day(s)"))
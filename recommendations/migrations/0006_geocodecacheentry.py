@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0005_travelrecord_passenger_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='Normalized place string', max_length=255, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('country_code', models.CharField(blank=True, max_length=8)),
+                ('provider', models.CharField(blank=True, max_length=20)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
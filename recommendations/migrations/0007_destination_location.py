@@ -0,0 +1,90 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:36
+
+import csv
+import re
+from pathlib import Path
+
+from django.db import migrations, models
+
+# Frozen copies of the app helpers this migration needs, so later changes to
+# recommendations.gazetteer / recommendations.spatial can't break it
+CITIES_CSV = Path(__file__).resolve().parent.parent / 'data' / 'india_cities.csv'
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def _normalize(text):
+    return ' '.join(re.findall(r'[a-z]+', str(text or '').lower()))
+
+
+def _geohash(lat, lng, length=9):
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < length:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            bits = (bits << 1) | (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bits = (bits << 1) | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def _city_coordinates():
+    """{normalized name or alias: (lat, lon)} from the bundled city list"""
+    cities = {}
+    if not CITIES_CSV.exists():
+        return cities
+    with open(CITIES_CSV, encoding='utf-8', newline='') as fh:
+        for row in csv.DictReader(fh):
+            coords = (float(row['lat']), float(row['lon']))
+            for key in [row['name']] + [a for a in row['aliases'].split('|') if a]:
+                cities.setdefault(_normalize(key), coords)
+    return cities
+
+
+def backfill_locations(apps, schema_editor):
+    """Place existing destinations using the bundled city list and index them"""
+    Destination = apps.get_model('recommendations', 'Destination')
+    cities = _city_coordinates()
+    for dest in Destination.objects.filter(latitude=None):
+        coords = cities.get(_normalize(dest.name)) or cities.get(_normalize(dest.name.split(',')[0]))
+        if coords is None:
+            continue
+        dest.latitude, dest.longitude = coords
+        dest.geohash = _geohash(dest.latitude, dest.longitude)
+        dest.save(update_fields=['latitude', 'longitude', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0006_geocodecacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Derived from latitude/longitude on save', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
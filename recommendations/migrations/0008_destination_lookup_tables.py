@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+from django.db import migrations, models
+
+
+def backfill_lookups(apps, schema_editor):
+    Destination = apps.get_model('recommendations', 'Destination')
+    Tag = apps.get_model('recommendations', 'Tag')
+    TransportMode = apps.get_model('recommendations', 'TransportMode')
+    for dest in Destination.objects.all():
+        tags = sorted({t.strip().lower() for t in dest.tags.split(',') if t.strip()})
+        transports = sorted({t.strip().lower() for t in dest.transport_options.split(',') if t.strip()})
+        dest.tag_items.set([Tag.objects.get_or_create(name=n)[0] for n in tags])
+        dest.transport_items.set([TransportMode.objects.get_or_create(name=n)[0] for n in transports])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0007_destination_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransportMode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='tag_items',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='destinations', to='recommendations.tag'),
+        ),
+        migrations.AddField(
+            model_name='destination',
+            name='transport_items',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='destinations', to='recommendations.transportmode'),
+        ),
+        migrations.RunPython(backfill_lookups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    TravelRecord = apps.get_model('recommendations', 'TravelRecord')
+    TravelSummary = apps.get_model('recommendations', 'TravelSummary')
+    TravelModeSummary = apps.get_model('recommendations', 'TravelModeSummary')
+    rows = TravelRecord.objects.exclude(user=None).values('user_id', 'recommended_transport').annotate(
+        trips=Count('id'), km=Sum('distance_km'), emitted=Sum('co2_estimated_kg'), saved=Sum('co2_saved_kg'),
+    ).order_by()
+    summaries = {}
+    for row in rows:
+        summary = summaries.setdefault(row['user_id'], TravelSummary(user_id=row['user_id']))
+        summary.trip_count += row['trips']
+        summary.total_distance_km += row['km'] or 0.0
+        summary.total_co2_estimated_kg += row['emitted'] or 0.0
+        summary.total_co2_saved_kg += row['saved'] or 0.0
+        TravelModeSummary.objects.create(
+            user_id=row['user_id'], transport=row['recommended_transport'], trip_count=row['trips'],
+            total_distance_km=row['km'] or 0.0, total_co2_estimated_kg=row['emitted'] or 0.0,
+            total_co2_saved_kg=row['saved'] or 0.0,
+        )
+    TravelSummary.objects.bulk_create(summaries.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0008_destination_lookup_tables'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TravelSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trip_count', models.PositiveIntegerField(default=0)),
+                ('total_distance_km', models.FloatField(default=0)),
+                ('total_co2_estimated_kg', models.FloatField(default=0)),
+                ('total_co2_saved_kg', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='travel_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TravelModeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transport', models.CharField(max_length=50)),
+                ('trip_count', models.PositiveIntegerField(default=0)),
+                ('total_distance_km', models.FloatField(default=0)),
+                ('total_co2_estimated_kg', models.FloatField(default=0)),
+                ('total_co2_saved_kg', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='travel_mode_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-trip_count', 'transport'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'transport'), name='unique_travel_mode_summary')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
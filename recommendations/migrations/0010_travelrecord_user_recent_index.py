@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0009_travel_summaries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='travelrecord',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='travelrecord_user_recent'),
+        ),
+    ]
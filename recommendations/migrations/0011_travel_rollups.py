@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0010_travelrecord_user_recent_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyModeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('recommended_transport', models.CharField(max_length=50)),
+                ('selected_travel_type', models.CharField(blank=True, max_length=50)),
+                ('trip_count', models.PositiveIntegerField(default=0)),
+                ('passenger_count', models.PositiveIntegerField(default=0)),
+                ('total_distance_km', models.FloatField(default=0)),
+                ('total_co2_estimated_kg', models.FloatField(default=0)),
+                ('total_co2_saved_kg', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', 'recommended_transport', 'selected_travel_type'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRouteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('source', models.CharField(max_length=200)),
+                ('destination', models.CharField(max_length=200)),
+                ('trip_count', models.PositiveIntegerField(default=0)),
+                ('total_distance_km', models.FloatField(default=0)),
+                ('total_co2_estimated_kg', models.FloatField(default=0)),
+                ('total_co2_saved_kg', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', '-trip_count'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('position', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='travelrecord',
+            index=models.Index(fields=['created_at', 'id'], name='travelrecord_created'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailymoderollup',
+            constraint=models.UniqueConstraint(fields=('day', 'recommended_transport', 'selected_travel_type'), name='unique_daily_mode_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrouterollup',
+            constraint=models.UniqueConstraint(fields=('day', 'source', 'destination'), name='unique_daily_route_rollup'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:55
+
+import recommendations.factors
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0012_trip_import_checkpoints'),
+    ]
+
+    operations = [
+        # Existing rows were scored with the original factors
+        migrations.AddField(
+            model_name='travelrecord',
+            name='factor_version',
+            field=models.CharField(default='v1', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='travelrecord',
+            name='factor_version',
+            field=models.CharField(default=recommendations.factors.current_factor_version, max_length=20),
+        ),
+    ]
@@ -1,7 +1,25 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .factors import current_factor_version
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class TransportMode(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
 
 class Destination(models.Model):
     name = models.CharField(max_length=200)
@@ -10,6 +28,20 @@ class Destination(models.Model):
     carbon_score = models.IntegerField(help_text='Lower is greener', default=50)
     transport_options = models.CharField(max_length=200, blank=True, help_text='Comma-separated transports: train,bus,bike')
     tags = models.CharField(max_length=200, blank=True, help_text='Comma-separated tags: nature,city,coast')
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False, help_text='Derived from latitude/longitude on save')
+    # Normalized (lowercase) copies of the comma-separated fields, kept in sync on save
+    tag_items = models.ManyToManyField(Tag, blank=True, related_name='destinations', editable=False)
+    transport_items = models.ManyToManyField(TransportMode, blank=True, related_name='destinations', editable=False)
+
+    def save(self, *args, **kwargs):
+        from .spatial import encode_geohash
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        super().save(*args, **kwargs)
 
     def transports(self):
         return [t.strip() for t in self.transport_options.split(',') if t.strip()]
@@ -17,10 +49,38 @@ class Destination(models.Model):
     def tag_list(self):
         return [t.strip() for t in self.tags.split(',') if t.strip()]
 
+    def sync_lookups(self):
+        """Mirror `tags`/`transport_options` into the indexed Tag/TransportMode tables"""
+        tag_names = {t.lower() for t in self.tag_list()}
+        transport_names = {t.lower() for t in self.transports()}
+        self.tag_items.set([Tag.objects.get_or_create(name=n)[0] for n in sorted(tag_names)])
+        self.transport_items.set([TransportMode.objects.get_or_create(name=n)[0] for n in sorted(transport_names)])
+
     def __str__(self):
         return f"{self.name} ({self.country})"
 
 
+@receiver(post_save, sender=Destination)
+def sync_destination_lookups(sender, instance, **kwargs):
+    # Also runs for fixture loads (raw=True), which bypass Destination.save()
+    instance.sync_lookups()
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_delete, sender=Destination)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=TransportMode)
+@receiver(post_delete, sender=TransportMode)
+@receiver(m2m_changed, sender=Destination.tag_items.through)
+@receiver(m2m_changed, sender=Destination.transport_items.through)
+def invalidate_cached_pages(sender, action=None, **kwargs):
+    # New catalog version: cached browse results, pages and ETags all go stale
+    if action is None or action.startswith('post_'):
+        from .catalog import bump_catalog_version
+        bump_catalog_version()
+
+
 class TravelRecord(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
     source = models.CharField(max_length=200)
@@ -31,11 +91,173 @@ class TravelRecord(models.Model):
     recommended_transport = models.CharField(max_length=50)
     co2_estimated_kg = models.FloatField()
     co2_saved_kg = models.FloatField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Emission factor set the CO2 values were computed with (factors.py)
+    factor_version = models.CharField(max_length=20, default=current_factor_version)
+    # Set when the record is built (not on insert), so queued and imported
+    # records keep their own time
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     def __str__(self):
         return f"{self.source}→{self.destination} ({self.distance_km} km)"
 
+    class Meta:
+        indexes = [
+            # Per-user history, newest first (keyset pagination in pagination.py)
+            models.Index(fields=['user', '-created_at', '-id'], name='travelrecord_user_recent'),
+            # Time-window scans for the analytics rollups (rollups.py)
+            models.Index(fields=['created_at', 'id'], name='travelrecord_created'),
+        ]
+
+
+class TravelSummary(models.Model):
+    """Per-user totals over TravelRecord, maintained incrementally (see summaries.py)"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='travel_summary')
+    trip_count = models.PositiveIntegerField(default=0)
+    total_distance_km = models.FloatField(default=0)
+    total_co2_estimated_kg = models.FloatField(default=0)
+    total_co2_saved_kg = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary: {self.user} ({self.trip_count} trips)"
+
+
+class TravelModeSummary(models.Model):
+    """Per-user, per-recommended-transport totals over TravelRecord"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='travel_mode_summaries')
+    transport = models.CharField(max_length=50)
+    trip_count = models.PositiveIntegerField(default=0)
+    total_distance_km = models.FloatField(default=0)
+    total_co2_estimated_kg = models.FloatField(default=0)
+    total_co2_saved_kg = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.user} / {self.transport} ({self.trip_count} trips)"
+
+    class Meta:
+        ordering = ['-trip_count', 'transport']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'transport'], name='unique_travel_mode_summary'),
+        ]
+
+
+class DailyModeRollup(models.Model):
+    """Per-day TravelRecord totals by recommended transport and user-selected travel type (see rollups.py)"""
+    day = models.DateField()
+    recommended_transport = models.CharField(max_length=50)
+    selected_travel_type = models.CharField(max_length=50, blank=True)
+    trip_count = models.PositiveIntegerField(default=0)
+    passenger_count = models.PositiveIntegerField(default=0)
+    total_distance_km = models.FloatField(default=0)
+    total_co2_estimated_kg = models.FloatField(default=0)
+    total_co2_saved_kg = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.day} {self.recommended_transport}/{self.selected_travel_type or '-'} ({self.trip_count} trips)"
+
+    class Meta:
+        ordering = ['-day', 'recommended_transport', 'selected_travel_type']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'recommended_transport', 'selected_travel_type'], name='unique_daily_mode_rollup',
+            ),
+        ]
+
+
+class DailyRouteRollup(models.Model):
+    """Per-day TravelRecord totals by route (normalized source/destination)"""
+    day = models.DateField()
+    source = models.CharField(max_length=200)
+    destination = models.CharField(max_length=200)
+    trip_count = models.PositiveIntegerField(default=0)
+    total_distance_km = models.FloatField(default=0)
+    total_co2_estimated_kg = models.FloatField(default=0)
+    total_co2_saved_kg = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.day} {self.source}→{self.destination} ({self.trip_count} trips)"
+
+    class Meta:
+        ordering = ['-day', '-trip_count']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'source', 'destination'], name='unique_daily_route_rollup'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """How far (TravelRecord.created_at) a rollup has been applied incrementally"""
+    name = models.CharField(max_length=50, unique=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+@receiver(pre_save, sender=TravelRecord)
+def remember_travel_record_totals(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Snapshot what the summaries currently count for this record, so an edit
+    # can be applied as "take the old row out, put the new one in"
+    instance._summary_before = None
+    if raw or instance.pk is None:
+        return
+    from .summaries import SUMMARY_SOURCE_FIELDS
+    if update_fields is not None and not set(update_fields) & {*SUMMARY_SOURCE_FIELDS, 'user_id'}:
+        return
+    instance._summary_before = TravelRecord.objects.filter(pk=instance.pk).only(*SUMMARY_SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=TravelRecord)
+def add_travel_record_to_summary(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .summaries import apply_records, replace_record
+    if created:
+        apply_records([instance])
+    elif getattr(instance, '_summary_before', None) is not None:
+        replace_record(instance._summary_before, instance)
+
+
+@receiver(post_delete, sender=TravelRecord)
+def remove_travel_record_from_summary(sender, instance, **kwargs):
+    from .summaries import apply_records
+    apply_records([instance], sign=-1)
+
+
+@receiver(pre_save, sender=TravelRecord)
+@receiver(pre_delete, sender=TravelRecord)
+def remember_travel_record_rollup(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Rollup days the watermark has passed are never re-read by the incremental
+    # update, so an edit or delete adjusts them directly: snapshot the old row's share
+    instance._rollup_before = None
+    instance._rollup_tracked = not raw and instance.pk is not None
+    if not instance._rollup_tracked:
+        return
+    from .rollups import ROLLUP_SOURCE_FIELDS, passed_contributions
+    if update_fields is not None and not set(update_fields) & set(ROLLUP_SOURCE_FIELDS):
+        instance._rollup_tracked = False
+        return
+    instance._rollup_before = passed_contributions([instance.pk])
+
+
+@receiver(post_save, sender=TravelRecord)
+def update_travel_record_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .rollups import apply_contributions, apply_late_records, passed_contributions
+    if created:
+        apply_late_records([instance])
+    elif getattr(instance, '_rollup_tracked', False):
+        with transaction.atomic():
+            apply_contributions(instance._rollup_before, sign=-1)
+            apply_contributions(passed_contributions([instance.pk]))
+
+
+@receiver(post_delete, sender=TravelRecord)
+def remove_travel_record_from_rollup(sender, instance, **kwargs):
+    from .rollups import apply_contributions
+    apply_contributions(getattr(instance, '_rollup_before', None), sign=-1)
+
 
 class Profile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -76,3 +298,36 @@ class LoginAttempt(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+
+
+class GeocodeCacheEntry(models.Model):
+    """Durable tier of the geocode cache (see geocoding.GeocodeCache)"""
+    key = models.CharField(max_length=255, unique=True, help_text='Normalized place string')
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    country_code = models.CharField(max_length=8, blank=True)
+    provider = models.CharField(max_length=20, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def as_result(self):
+        return {
+            'lat': self.latitude,
+            'lng': self.longitude,
+            'country_code': self.country_code or None,
+            'provider': self.provider,
+        }
+
+    def __str__(self):
+        return f"{self.key} ({self.provider})"
+
+
+class JobCheckpoint(models.Model):
+    """Resume point for long-running batch jobs (trip imports, rescoring)"""
+    name = models.CharField(max_length=255, unique=True)
+    position = models.BigIntegerField(default=0)
+    state = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
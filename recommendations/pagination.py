@@ -0,0 +1,51 @@
+"""
+Keyset (cursor) pagination
+Pages through a queryset ordered by (-created_at, -id) by filtering on the
+last row seen instead of using OFFSET, so every page is one index range scan
+no matter how deep into the history it is. Cursors are opaque URL-safe tokens.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+ORDERING = ('-created_at', '-id')
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(created_at, pk) from a cursor token; raises ValueError when malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        stamp, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(stamp), int(pk)
+    except (TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _key(row):
+    if isinstance(row, dict):
+        return row['created_at'], row['id']
+    return row.created_at, row.pk
+
+
+def keyset_page(queryset, cursor=None, page_size=50):
+    """
+    One page of `queryset` (model instances or values() rows, which must
+    include created_at and id) after `cursor`.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    qs = queryset.order_by(*ORDERING)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(qs[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(*_key(rows[-1]))
+    return rows, next_cursor
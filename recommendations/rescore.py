@@ -0,0 +1,105 @@
+"""
+Rescoring TravelRecords after a factor change
+Walks records whose factor_version differs from the target version in primary
+key order (keyset batches), recomputes co2_estimated_kg / co2_saved_kg for the
+stored recommended transport with that version's ScoringEngine, and writes
+each batch with bulk_update in its own short transaction together with a
+JobCheckpoint. A pause between batches leaves the writer lock to live
+traffic; an interrupted run resumes after the last committed batch.
+"""
+import time
+from datetime import date
+
+from django.db import transaction
+
+from .ai_logic import GreenTravelAI
+from .factors import current_factor_version, get_factor_set
+from .models import JobCheckpoint, TravelRecord
+from .rollups import local_day
+from .summaries import apply_records
+
+FIELDS = ('id', 'user_id', 'recommended_transport', 'distance_km', 'co2_estimated_kg', 'co2_saved_kg', 'created_at')
+DEFAULT_BATCH_SIZE = 1000
+
+
+def stale_records(version):
+    return TravelRecord.objects.exclude(factor_version=version)
+
+
+def rescored_values(rows, version):
+    """{id: (co2_estimated_kg, co2_saved_kg)} under `version`; rows with unknown transports are left out"""
+    engine = GreenTravelAI.get_engine_for_version(version)
+    if engine is not None:
+        known = [row for row in rows if row[2] in engine.mode_index]
+        if not known:
+            return {}
+        emission, saved = engine.trip_emissions([row[2] for row in known], [row[3] for row in known])
+        return dict(zip((row[0] for row in known), zip(emission.tolist(), saved.tolist())))
+
+    transports = GreenTravelAI.transports_for_version(version)
+    values = {}
+    for row in rows:
+        if row[2] in transports:
+            emission = transports[row[2]].calculate_emission(row[3])
+            flight = transports['flight'].calculate_emission(row[3])
+            values[row[0]] = (emission, max(0, round(flight - emission, 2)))
+    return values
+
+
+def rescore_records(version=None, batch_size=DEFAULT_BATCH_SIZE, pause=0.1, job=None, restart=False, progress=None):
+    """
+    Bring every record to factor set `version` (default: the current one).
+    Per-user summaries are adjusted in the same transaction as each batch.
+    Returns a stats dict: scanned, updated, batches, resumed_from, seconds,
+    days (first/last created_at day that changed, for rebuilding rollups).
+    """
+    version = version or current_factor_version()
+    get_factor_set(version)
+    checkpoint, _ = JobCheckpoint.objects.get_or_create(name=job or f'rescore:{version}')
+    if restart:
+        checkpoint.position = 0
+        checkpoint.state = {}
+        checkpoint.save()
+    days = [date.fromisoformat(d) for d in checkpoint.state.get('days', [])]
+    stats = {'scanned': 0, 'updated': 0, 'batches': 0, 'resumed_from': checkpoint.position}
+    started = time.monotonic()
+
+    while True:
+        rows = list(
+            stale_records(version).filter(id__gt=checkpoint.position).order_by('id').values_list(*FIELDS)[:batch_size]
+        )
+        if not rows:
+            break
+        values = rescored_values(rows, version)
+        updates, removed, added = [], [], []
+        for pk, user_id, transport, distance, old_emission, old_saved, created_at in rows:
+            # Unknown transports keep their values but are stamped, so they aren't revisited
+            emission, saved = values.get(pk, (old_emission, old_saved))
+            updates.append(TravelRecord(id=pk, co2_estimated_kg=emission, co2_saved_kg=saved, factor_version=version))
+            if (emission, saved) != (old_emission, old_saved):
+                removed.append(TravelRecord(user_id=user_id, recommended_transport=transport, distance_km=distance,
+                                            co2_estimated_kg=old_emission, co2_saved_kg=old_saved))
+                added.append(TravelRecord(user_id=user_id, recommended_transport=transport, distance_km=distance,
+                                          co2_estimated_kg=emission, co2_saved_kg=saved))
+                day = local_day(created_at)
+                days = [min(days[0], day), max(days[1], day)] if days else [day, day]
+
+        with transaction.atomic():
+            TravelRecord.objects.bulk_update(updates, ['co2_estimated_kg', 'co2_saved_kg', 'factor_version'])
+            apply_records(removed, sign=-1)
+            apply_records(added)
+            checkpoint.position = rows[-1][0]
+            checkpoint.state = {'days': [d.isoformat() for d in days]}
+            checkpoint.save()
+
+        stats['scanned'] += len(rows)
+        stats['updated'] += len(added)
+        stats['batches'] += 1
+        if progress:
+            progress(stats, checkpoint.position)
+        if pause:
+            time.sleep(pause)
+
+    stats['seconds'] = round(time.monotonic() - started, 2)
+    stats['days'] = days
+    return stats
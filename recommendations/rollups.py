@@ -0,0 +1,256 @@
+"""
+Analytics rollups over TravelRecord
+Daily aggregates by (recommended_transport, selected_travel_type) and by
+route live in DailyModeRollup / DailyRouteRollup, so dashboard queries scan
+one row per day and key instead of every trip.
+- update_rollups(): incremental; folds in records created since the
+  watermark, up to ROLLUP_LAG_SECONDS ago (leaves room for in-flight and
+  write-behind inserts to commit)
+- recompute_rollups(start, end): rebuilds whole days in chunks, e.g. after
+  a backfill or rescoring
+Records the watermark has already passed are kept in step as they change:
+saves and deletes (signals in models.py) and bulk inserts (write_records)
+take their old contribution out and put the new one in. Queryset .update()
+and bulk_update() send no signals; recompute the affected days after them.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Lower, Trim, TruncDate
+from django.utils import timezone
+
+from .models import DailyModeRollup, DailyRouteRollup, RollupWatermark, TravelRecord
+
+WATERMARK = 'travel_daily'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+MODE_KEYS = ('day', 'recommended_transport', 'selected_travel_type')
+ROUTE_KEYS = ('day', 'source', 'destination')
+MODE_FIELDS = ('trip_count', 'passenger_count', 'total_distance_km', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+ROUTE_FIELDS = ('trip_count', 'total_distance_km', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+# Unsigned rollup columns; taking records out stops at zero if totals have drifted
+COUNT_FIELDS = ('trip_count', 'passenger_count')
+# TravelRecord fields the rollups are computed from
+ROLLUP_SOURCE_FIELDS = (
+    'created_at', 'recommended_transport', 'selected_travel_type', 'source', 'destination',
+    'passenger_count', 'distance_km', 'co2_estimated_kg', 'co2_saved_kg',
+)
+
+# Aggregate expressions per rollup field; aliased because some rollup field
+# names clash with TravelRecord fields
+_AGGREGATES = {
+    'trip_count': ('_trips', Count('id')),
+    'passenger_count': ('_passengers', Sum('passenger_count')),
+    'total_distance_km': ('_km', Sum('distance_km')),
+    'total_co2_estimated_kg': ('_emitted', Sum('co2_estimated_kg')),
+    'total_co2_saved_kg': ('_saved', Sum('co2_saved_kg')),
+}
+
+
+def _grouped(records, columns, fields, **expressions):
+    """
+    One GROUP BY over `records`.
+    columns maps rollup key -> grouped column/annotation; returns dicts with
+    the rollup keys and every rollup field.
+    """
+    qs = records.annotate(day=TruncDate('created_at'), **expressions).values(*columns.values())
+    qs = qs.annotate(**{alias: expr for alias, expr in (_AGGREGATES[f] for f in fields)}).order_by()
+    rows = []
+    for row in qs:
+        out = {key: row[column] for key, column in columns.items()}
+        for field in fields:
+            out[field] = row[_AGGREGATES[field][0]] or 0
+        rows.append(out)
+    return rows
+
+
+def _mode_rows(records):
+    return _grouped(records, {key: key for key in MODE_KEYS}, MODE_FIELDS)
+
+
+def _route_rows(records):
+    # Routes are grouped case/whitespace-insensitively
+    return _grouped(
+        records,
+        {'day': 'day', 'source': 'route_source', 'destination': 'route_destination'},
+        ROUTE_FIELDS,
+        route_source=Lower(Trim('source')),
+        route_destination=Lower(Trim('destination')),
+    )
+
+
+def _merge(model, keys, fields, rows):
+    """Add aggregate rows into a rollup table: bulk_update existing keys, bulk_create new ones"""
+    if not rows:
+        return
+    existing = {
+        tuple(getattr(obj, k) for k in keys): obj
+        for obj in model.objects.filter(day__in={row['day'] for row in rows})
+    }
+    created, updated = [], {}
+    for row in rows:
+        key = tuple(row[k] for k in keys)
+        obj = existing.get(key)
+        if obj is None:
+            obj = existing[key] = model(**dict(zip(keys, key)))
+            created.append(obj)
+        elif obj.pk is not None:
+            updated[obj.pk] = obj
+        for field in fields:
+            value = getattr(obj, field) + row[field]
+            setattr(obj, field, max(0, value) if field in COUNT_FIELDS else value)
+    model.objects.bulk_create(created, batch_size=500)
+    model.objects.bulk_update(list(updated.values()), fields, batch_size=500)
+
+
+def update_rollups(now=None):
+    """
+    Fold records created after the watermark (up to now - ROLLUP_LAG_SECONDS)
+    into the daily rollups and advance the watermark. Returns the number of
+    records applied.
+    """
+    upper = (now or timezone.now()) - timedelta(seconds=getattr(settings, 'ROLLUP_LAG_SECONDS', 120))
+    with transaction.atomic():
+        mark, _ = RollupWatermark.objects.select_for_update().get_or_create(
+            name=WATERMARK, defaults={'position': EPOCH},
+        )
+        if upper <= mark.position:
+            return 0
+        records = TravelRecord.objects.filter(created_at__gt=mark.position, created_at__lte=upper)
+        count = records.count()
+        if count:
+            _merge(DailyModeRollup, MODE_KEYS, MODE_FIELDS, _mode_rows(records))
+            _merge(DailyRouteRollup, ROUTE_KEYS, ROUTE_FIELDS, _route_rows(records))
+        mark.position = upper
+        mark.save()
+    return count
+
+
+def rollup_watermark():
+    """created_at up to which update_rollups has applied records, or None before its first run"""
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('position', flat=True).first()
+
+
+def local_day(moment):
+    """Rollup day of a created_at timestamp (TruncDate uses the current time zone too)"""
+    return timezone.localtime(moment).date()
+
+
+def passed_contributions(pks, mark=None):
+    """
+    What the TravelRecords with these pks currently add to the rollups,
+    counting only those at or below the watermark (newer ones are still
+    update_rollups' job). Grouped by the same query as update_rollups, so the
+    keys match exactly. Returns (mode rows, route rows), or None.
+    """
+    mark = mark or rollup_watermark()
+    if mark is None or not pks:
+        return None
+    with transaction.atomic():
+        records = TravelRecord.objects.filter(pk__in=pks, created_at__lte=mark)
+        mode_rows = _mode_rows(records)
+        if not mode_rows:
+            return None
+        return mode_rows, _route_rows(records)
+
+
+def apply_contributions(contributions, sign=1):
+    """Add rows from passed_contributions() to the rollups, or take them out with sign=-1"""
+    if not contributions:
+        return
+    mode_rows, route_rows = contributions
+    if sign < 0:
+        mode_rows = [{**row, **{f: -row[f] for f in MODE_FIELDS}} for row in mode_rows]
+        route_rows = [{**row, **{f: -row[f] for f in ROUTE_FIELDS}} for row in route_rows]
+    with transaction.atomic():
+        _merge(DailyModeRollup, MODE_KEYS, MODE_FIELDS, mode_rows)
+        _merge(DailyRouteRollup, ROUTE_KEYS, ROUTE_FIELDS, route_rows)
+
+
+def apply_late_records(records):
+    """
+    Fold newly inserted records that are already behind the watermark
+    (backdated, imported or delayed by the write-behind queue) into the
+    rollups; update_rollups only reads forward from the watermark.
+    """
+    mark = rollup_watermark()
+    if mark is None:
+        return
+    pks = [r.pk for r in records if r.pk is not None and r.created_at <= mark]
+    if pks:
+        apply_contributions(passed_contributions(pks, mark))
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def recompute_rollups(start, end, chunk_days=7, progress=None):
+    """
+    Rebuild the rollups for days start..end (inclusive), `chunk_days` per
+    transaction. Only records at or below the watermark are counted; newer
+    ones are left to update_rollups so nothing is counted twice.
+    Returns the number of days rebuilt.
+    """
+    update_rollups()
+    mark = RollupWatermark.objects.get(name=WATERMARK).position
+    day = start
+    while day <= end:
+        chunk_end = min(end, day + timedelta(days=chunk_days - 1))
+        records = TravelRecord.objects.filter(
+            created_at__gte=_day_start(day),
+            created_at__lt=_day_start(chunk_end + timedelta(days=1)),
+            created_at__lte=mark,
+        )
+        with transaction.atomic():
+            DailyModeRollup.objects.filter(day__range=(day, chunk_end)).delete()
+            DailyRouteRollup.objects.filter(day__range=(day, chunk_end)).delete()
+            _merge(DailyModeRollup, MODE_KEYS, MODE_FIELDS, _mode_rows(records))
+            _merge(DailyRouteRollup, ROUTE_KEYS, ROUTE_FIELDS, _route_rows(records))
+        if progress:
+            progress(day, chunk_end)
+        day = chunk_end + timedelta(days=1)
+    return (end - start).days + 1 if end >= start else 0
+
+
+def rollup_days_behind(days):
+    """
+    The (first, last) day range of changed records when the incremental
+    rollup has already passed it (those days need recompute_rollups), else None.
+    """
+    mark = RollupWatermark.objects.filter(name=WATERMARK).first()
+    if not days or mark is None or local_day(mark.position) < days[0]:
+        return None
+    return days[0], days[1]
+
+
+def daily_totals(start, end):
+    """Per-day totals across all modes"""
+    return (
+        DailyModeRollup.objects.filter(day__range=(start, end))
+        .values('day')
+        .annotate(trips=Sum('trip_count'), co2_kg=Sum('total_co2_estimated_kg'), saved_kg=Sum('total_co2_saved_kg'))
+        .order_by('day')
+    )
+
+
+def mode_totals(start, end):
+    """Totals per recommended transport over a date range"""
+    return (
+        DailyModeRollup.objects.filter(day__range=(start, end))
+        .values('recommended_transport')
+        .annotate(trips=Sum('trip_count'), co2_kg=Sum('total_co2_estimated_kg'), saved_kg=Sum('total_co2_saved_kg'))
+        .order_by('-trips')
+    )
+
+
+def top_routes(start, end, limit=10):
+    """Most travelled routes over a date range"""
+    return (
+        DailyRouteRollup.objects.filter(day__range=(start, end))
+        .values('source', 'destination')
+        .annotate(trips=Sum('trip_count'), co2_kg=Sum('total_co2_estimated_kg'), saved_kg=Sum('total_co2_saved_kg'))
+        .order_by('-trips', 'source', 'destination')[:limit]
+    )
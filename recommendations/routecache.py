@@ -0,0 +1,98 @@
+"""
+Route-level memoization of distance/duration lookups
+Stored in a Django cache alias so every worker process shares the same entries.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .geocoding import normalize_place
+from .instrumentation import registry
+
+registry.describe('greentravel_route_cache_total', 'Route cache lookups by result (hit or miss)')
+
+
+class RouteCache:
+    """
+    Cache of `get_distance_from_api` results keyed on
+    (normalized source, normalized destination, backend).
+    - Backends listed in `symmetric_backends` store A→B and B→A under one key
+      (straight-line distances); road/transit routes stay directional.
+    - Hit/miss counters are per process and exported through /metrics/; keeping
+      them out of the cache keeps a hit to a single read.
+    """
+
+    def __init__(self, alias='default', ttl_seconds=7 * 24 * 3600, symmetric_backends=('osm',)):
+        self.alias = alias
+        self.ttl_seconds = ttl_seconds
+        self.symmetric_backends = tuple(symmetric_backends)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, source, destination, backend):
+        src = normalize_place(source)
+        dst = normalize_place(destination)
+        if backend in self.symmetric_backends and dst < src:
+            src, dst = dst, src
+        digest = hashlib.sha1(f"{src}\x1f{dst}".encode('utf-8')).hexdigest()
+        return f"route:{backend}:{digest}"
+
+    def get(self, source, destination, backend, count=True):
+        """Return the cached route dict or None, updating the hit/miss counters unless `count` is False"""
+        try:
+            value = self.cache.get(self.make_key(source, destination, backend))
+        except Exception:
+            return None
+        if count:
+            self._count('hits' if value is not None else 'misses')
+        return value
+
+    def get_many(self, pairs, backend):
+        """Cached routes for many (source, destination) pairs in one cache round-trip: {pair: value} for hits"""
+        keys = {self.make_key(src, dst, backend): (src, dst) for src, dst in pairs}
+        if not keys:
+            return {}
+        try:
+            found = self.cache.get_many(list(keys))
+        except Exception:
+            return {}
+        if found:
+            self._count('hits', len(found))
+        if len(found) < len(keys):
+            self._count('misses', len(keys) - len(found))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, source, destination, backend, value, ttl_seconds=None):
+        if value is None:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            self.cache.set(self.make_key(source, destination, backend), value, ttl)
+        except Exception:
+            pass
+
+    def delete(self, source, destination, backend):
+        try:
+            self.cache.delete(self.make_key(source, destination, backend))
+        except Exception:
+            pass
+
+    def stats(self):
+        """Return {'hits': int, 'misses': int, 'hit_ratio': float} for this process"""
+        hits = registry.value('greentravel_route_cache_total', result='hit')
+        misses = registry.value('greentravel_route_cache_total', result='miss')
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / total, 4) if total else 0.0}
+
+    def _count(self, name, delta=1):
+        registry.inc('greentravel_route_cache_total', delta, result='hit' if name == 'hits' else 'miss')
+
+
+route_cache = RouteCache(
+    alias=getattr(settings, 'ROUTE_CACHE_ALIAS', 'default'),
+    ttl_seconds=getattr(settings, 'ROUTE_CACHE_TTL', 7 * 24 * 3600),
+    symmetric_backends=getattr(settings, 'ROUTE_CACHE_SYMMETRIC_BACKENDS', ('osm',)),
+)
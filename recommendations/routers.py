@@ -0,0 +1,39 @@
+"""
+Database routing for the production SQLite profile
+History/analytics models are read through the 'readonly' alias (a read-only
+connection to the same file, so readers never queue behind the writer under
+WAL); every write goes to 'default', the single writer.
+"""
+from django.db import connections
+
+READONLY_ALIAS = 'readonly'
+
+# label_lower of models whose reads may go to the read-only connection
+READ_MODELS = {
+    'recommendations.travelrecord',
+    'recommendations.travelsummary',
+    'recommendations.travelmodesummary',
+    # Reporting tables; the rollup job reads them inside its write transaction,
+    # which stays on 'default'
+    'recommendations.dailymoderollup',
+    'recommendations.dailyrouterollup',
+}
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in READ_MODELS and READONLY_ALIAS in connections.databases:
+            # Reads inside a write transaction must see its own uncommitted rows
+            if not connections['default'].in_atomic_block:
+                return READONLY_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases point at the same database file
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
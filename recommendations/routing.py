@@ -0,0 +1,141 @@
+"""
+Concurrent Google Distance Matrix fetches
+All travel modes are requested in parallel on a shared thread pool under one
+deadline, so a lookup costs one round-trip instead of four.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from .geocoding import get_gmaps_client
+from .governor import governor
+
+ROUTE_MODES = ('driving', 'transit', 'bicycling', 'walking')
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ROUTING_MAX_WORKERS', 16),
+    thread_name_prefix='routing',
+)
+
+
+def _first_element(response):
+    """Return the single origin/destination element of a matrix response, or None"""
+    if not (response and response.get('status') == 'OK' and response.get('rows')):
+        return None
+    elem = response['rows'][0]['elements'][0]
+    if not (elem and elem.get('status') == 'OK'):
+        return None
+    return elem
+
+
+def _fetch_mode(source, destination, mode):
+    gmaps = get_gmaps_client()
+    response = governor.call(
+        'google', gmaps.distance_matrix, origins=source, destinations=destination, mode=mode, units='metric',
+    )
+    return _first_element(response)
+
+
+def fetch_google_route(source, destination, deadline=None):
+    """
+    Fetch distance and per-mode durations from Google in parallel.
+    Driving is canonical for distance and is required; other modes are dropped
+    if they fail or miss the deadline, in which case the result is marked
+    `partial` and lists `missing_modes`.
+    Returns {'distance_km': float, 'durations': dict, ...} or None.
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'ROUTING_DEADLINE_SECONDS', 8)
+
+    futures = {mode: _executor.submit(_fetch_mode, source, destination, mode) for mode in ROUTE_MODES}
+    wait(futures.values(), timeout=deadline)
+
+    elements = {}
+    for mode, future in futures.items():
+        if not future.done():
+            future.cancel()
+            continue
+        try:
+            elements[mode] = future.result()
+        except Exception:
+            # A failed request says nothing about the route: leave the mode
+            # missing (partial, so not cached) rather than "no route"
+            continue
+
+    driving = elements.get('driving')
+    if not (driving and 'distance' in driving):
+        return None
+
+    distance_km = round(driving['distance']['value'] / 1000, 2)
+    durations = {}
+    missing = []
+    for mode in ROUTE_MODES:
+        elem = elements.get(mode)
+        if elem and elem.get('duration'):
+            durations[mode] = elem['duration']['value']
+            durations[f'{mode}_text'] = elem['duration']['text']
+        elif mode not in elements:
+            missing.append(mode)
+
+    info = {'distance_km': distance_km, 'durations': durations}
+    if missing:
+        info['partial'] = True
+        info['missing_modes'] = missing
+    return info
+
+
+def _fetch_matrix_mode(origins, destinations, mode):
+    gmaps = get_gmaps_client()
+    response = governor.call(
+        'google', gmaps.distance_matrix,
+        origins=list(origins), destinations=list(destinations), mode=mode, units='metric',
+    )
+    if not (response and response.get('status') == 'OK'):
+        return {}
+    elements = {}
+    for origin, row in zip(origins, response.get('rows', [])):
+        for destination, elem in zip(destinations, row.get('elements', [])):
+            if elem and elem.get('status') == 'OK':
+                elements[(origin, destination)] = elem
+    return elements
+
+
+def fetch_google_matrix(origins, destinations, deadline=None):
+    """
+    Fetch one origins × destinations block for every mode in parallel.
+    The block must already fit the Distance Matrix element limits.
+    Returns {(origin, destination): route info} for pairs with a driving distance.
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'ROUTING_DEADLINE_SECONDS', 8)
+
+    futures = {mode: _executor.submit(_fetch_matrix_mode, origins, destinations, mode) for mode in ROUTE_MODES}
+    wait(futures.values(), timeout=deadline)
+
+    by_mode = {}
+    for mode, future in futures.items():
+        if not future.done():
+            future.cancel()
+            continue
+        try:
+            by_mode[mode] = future.result()
+        except Exception:
+            continue
+
+    results = {}
+    for pair, driving in by_mode.get('driving', {}).items():
+        if 'distance' not in driving:
+            continue
+        durations = {}
+        for mode in ROUTE_MODES:
+            elem = by_mode.get(mode, {}).get(pair)
+            if elem and elem.get('duration'):
+                durations[mode] = elem['duration']['value']
+                durations[f'{mode}_text'] = elem['duration']['text']
+        info = {'distance_km': round(driving['distance']['value'] / 1000, 2), 'durations': durations}
+        missing = [mode for mode in ROUTE_MODES if mode not in by_mode]
+        if missing:
+            info['partial'] = True
+            info['missing_modes'] = missing
+        results[pair] = info
+    return results
@@ -0,0 +1,122 @@
+"""
+Distance-band rule tables for GreenTravelAI
+The distance thresholds behind transport suitability, score bonuses and
+city/highway speeds are compiled once into an immutable band table. A lookup
+is a bisect over the band edges and returns precomputed, pre-ordered data.
+"""
+import json
+import math
+from bisect import bisect_left
+from collections import namedtuple
+from types import MappingProxyType
+
+# Default rules. Override with settings.GREEN_TRAVEL_DISTANCE_RULES (a dict in
+# this shape) or settings.GREEN_TRAVEL_DISTANCE_RULES_FILE (a JSON file).
+DEFAULT_DISTANCE_RULES = {
+    # Eligible modes in priority order; `max_km` is inclusive, None = no limit
+    'suitability': [
+        {'max_km': 100, 'modes': ['bike', 'bus', 'train', 'car', 'ev']},
+        {'max_km': 300, 'modes': ['train', 'ev', 'bus', 'car', 'flight']},
+        {'max_km': None, 'modes': ['flight', 'train', 'ev', 'car']},
+    ],
+    # Green score bonuses for min_km <= distance < max_km (None = open ended)
+    'score_offsets': [
+        {'min_km': None, 'max_km': 300, 'modes': ['bus', 'bike'], 'offset': 10},
+        {'min_km': 300, 'max_km': 700, 'modes': ['train', 'ev'], 'offset': 5},
+    ],
+    # Speeds (km/h) for distance < below_km, overriding the average speeds
+    'speeds': [
+        {'below_km': 50, 'speeds': {'car': 40.0, 'ev': 40.0, 'bus': 50.0, 'train': 50.0, 'bike': 15.0}},
+    ],
+    'max_score': 100,
+}
+
+ModeRule = namedtuple('ModeRule', ['name', 'rank', 'score', 'speed'])
+Band = namedtuple('Band', ['low', 'high', 'modes', 'options'])
+
+
+def _below(value):
+    """Inclusive upper bound equivalent to `distance < value`"""
+    return math.nextafter(float(value), -math.inf)
+
+
+def _rule_edges(config):
+    for rule in config.get('suitability', []):
+        if rule.get('max_km') is not None:
+            yield float(rule['max_km'])
+    for rule in config.get('score_offsets', []):
+        if rule.get('min_km') is not None:
+            yield _below(rule['min_km'])
+        if rule.get('max_km') is not None:
+            yield _below(rule['max_km'])
+    for rule in config.get('speeds', []):
+        yield _below(rule['below_km'])
+
+
+class BandTable:
+    """
+    Immutable distance-band index.
+    Band i covers (edges[i-1], edges[i]]; every band holds its eligible modes
+    as a tuple of ModeRule (priority order, adjusted score, speed) and a
+    read-only {name: TransportOption} mapping for get_transport_options.
+    """
+
+    def __init__(self, config, transports, average_speed):
+        self.config = config
+        self.edges = tuple(sorted(set(_rule_edges(config))))
+        max_score = config.get('max_score', 100)
+
+        bands = []
+        for i in range(len(self.edges) + 1):
+            low = self.edges[i - 1] if i else -math.inf
+            high = self.edges[i] if i < len(self.edges) else math.inf
+            # Any point inside the band evaluates every rule the same way
+            probe = high if high != math.inf else math.nextafter(low, math.inf)
+
+            suitable = ()
+            for rule in config.get('suitability', []):
+                if rule.get('max_km') is None or probe <= rule['max_km']:
+                    suitable = tuple(m for m in rule['modes'] if m in transports)
+                    break
+
+            modes = []
+            for rank, name in enumerate(suitable):
+                score = transports[name].base_score
+                for rule in config.get('score_offsets', []):
+                    above_min = rule.get('min_km') is None or probe >= rule['min_km']
+                    below_max = rule.get('max_km') is None or probe < rule['max_km']
+                    if above_min and below_max and name in rule['modes']:
+                        score = min(max_score, score + rule['offset'])
+                speed = float(average_speed.get(name, 50))
+                for rule in config.get('speeds', []):
+                    if probe < rule['below_km'] and name in rule['speeds']:
+                        speed = float(rule['speeds'][name])
+                        break
+                modes.append(ModeRule(name, rank, score, speed))
+
+            options = MappingProxyType({name: transports[name] for name in suitable})
+            bands.append(Band(low, high, tuple(modes), options))
+        self.bands = tuple(bands)
+
+    def band_index(self, distance_km):
+        return bisect_left(self.edges, distance_km)
+
+    def lookup(self, distance_km):
+        """Band for a distance: O(log bands), no allocation"""
+        return self.bands[bisect_left(self.edges, distance_km)]
+
+
+def load_distance_rules():
+    """Rule config from settings (dict or JSON file), else the defaults"""
+    try:
+        from django.conf import settings
+        rules = getattr(settings, 'GREEN_TRAVEL_DISTANCE_RULES', None)
+        path = getattr(settings, 'GREEN_TRAVEL_DISTANCE_RULES_FILE', None)
+    except Exception:
+        rules, path = None, None
+    if rules:
+        return rules
+    if path:
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+    return DEFAULT_DISTANCE_RULES
@@ -0,0 +1,135 @@
+"""
+Single-flight coalescing of identical concurrent lookups
+Callers asking for the same key while a lookup is in flight wait for it and
+share its result instead of making their own outbound call.
+- `do(key, func)`: threads (sync views, and async views' offloaded lookups)
+- `ado(key, factory)`: coroutines on one event loop
+- Across worker processes (optional, SINGLEFLIGHT_CACHE_ALIAS): the leader
+  holds a lock taken with cache.add(); other workers poll `recheck` (the
+  shared result cache) until the leader has stored its answer
+Shared results are the same object for every caller; treat them as read-only.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .instrumentation import registry
+
+registry.describe('greentravel_singleflight_total', 'Coalesced lookups by role (leader ran it, follower shared it)')
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """One in-flight call per key; `name` scopes keys and metrics"""
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._tasks = weakref.WeakKeyDictionary()
+
+    def do(self, key, func, recheck=None):
+        """
+        Return func(), or the result of an identical call already in flight.
+        `recheck` (returns the stored result or None) enables the cross-worker
+        lock. A follower that waits longer than SINGLEFLIGHT_WAIT_SECONDS runs
+        func itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(getattr(settings, 'SINGLEFLIGHT_WAIT_SECONDS', 10)):
+                self._count('follower')
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            return func()
+
+        try:
+            call.result = self._run_shared(key, func, recheck)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    async def ado(self, key, factory):
+        """
+        Await factory() (a coroutine function), or join an identical call in
+        flight on this event loop. The shared task is shielded, so one caller
+        being cancelled doesn't cancel it for the others.
+        """
+        tasks = self._tasks.setdefault(asyncio.get_running_loop(), {})
+        task = tasks.get(key)
+        if task is None:
+            self._count('leader')
+            task = tasks[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+        else:
+            self._count('follower')
+        return await asyncio.shield(task)
+
+    def _run_shared(self, key, func, recheck):
+        alias = getattr(settings, 'SINGLEFLIGHT_CACHE_ALIAS', None)
+        if alias is None or recheck is None:
+            self._count('leader')
+            return func()
+
+        cache = caches[alias]
+        lock_key = f'singleflight:{self.name}:' + hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        try:
+            acquired = cache.add(lock_key, 1, getattr(settings, 'SINGLEFLIGHT_LOCK_TIMEOUT', 15))
+        except Exception:
+            acquired = None
+        if acquired is False:
+            # Another worker is fetching: wait for its result to land in the shared cache
+            deadline = time.monotonic() + getattr(settings, 'SINGLEFLIGHT_WAIT_SECONDS', 10)
+            poll = getattr(settings, 'SINGLEFLIGHT_POLL_SECONDS', 0.05)
+            while time.monotonic() < deadline:
+                time.sleep(poll)
+                value = recheck()
+                if value is not None:
+                    self._count('remote_follower')
+                    return value
+                try:
+                    if cache.get(lock_key) is None:
+                        # Leader finished without storing (failure, mock or partial result)
+                        break
+                except Exception:
+                    break
+        self._count('leader')
+        try:
+            return func()
+        finally:
+            if acquired:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    pass
+
+    def _count(self, role):
+        registry.inc('greentravel_singleflight_total', flight=self.name, role=role)
+
+
+route_flight = SingleFlight('route')
+geocode_flight = SingleFlight('geocode')
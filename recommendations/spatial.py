@@ -0,0 +1,144 @@
+"""
+Spatial index for Destination
+Destinations carry a geohash column (indexed). A radius query covers the
+search bounding box with a handful of geohash cells, fetches candidates with
+indexed prefix-range scans, then filters by exact haversine distance and ranks
+by GreenTravelAI emissions for the trip.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Q
+
+from .ai_logic import GreenTravelAI
+from .gazetteer import DEFAULT_ROAD_FACTOR, haversine_km, np
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_LENGTH = 9
+# Upper bound on prefix-range scans per query; larger radii use coarser cells
+MAX_QUERY_CELLS = 16
+
+
+def encode_geohash(lat, lng, length=GEOHASH_LENGTH):
+    """Standard base32 geohash of a coordinate"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < length:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            bits = (bits << 1) | (lng >= mid)
+            lng_lo, lng_hi = (mid, lng_hi) if lng >= mid else (lng_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            bits = (bits << 1) | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    """(lat degrees, lng degrees) spanned by one geohash cell"""
+    total = 5 * precision
+    lng_bits = (total + 1) // 2
+    lat_bits = total // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_cells(lat, lng, radius_km, max_cells=MAX_QUERY_CELLS):
+    """Geohash prefixes whose cells together cover the radius' bounding box"""
+    dlat = radius_km / 111.32
+    dlng = radius_km / max(1e-6, 111.32 * math.cos(math.radians(lat)))
+    south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    west, east = max(-180.0, lng - dlng), min(180.0, lng + dlng)
+
+    precision = 1
+    for p in range(GEOHASH_LENGTH, 0, -1):
+        cell_lat, cell_lng = _cell_size(p)
+        rows = math.floor(north / cell_lat) - math.floor(south / cell_lat) + 1
+        cols = math.floor(east / cell_lng) - math.floor(west / cell_lng) + 1
+        if rows * cols <= max_cells:
+            precision = p
+            break
+
+    cell_lat, cell_lng = _cell_size(precision)
+    cells = set()
+    y = (math.floor(south / cell_lat) + 0.5) * cell_lat
+    while y - cell_lat / 2 <= north:
+        x = (math.floor(west / cell_lng) + 0.5) * cell_lng
+        while x - cell_lng / 2 <= east:
+            cells.add(encode_geohash(min(y, 89.999999), min(x, 179.999999), precision))
+            x += cell_lng
+        y += cell_lat
+    return sorted(cells)
+
+
+def nearby_destinations(lat, lng, radius_km, limit=20, max_carbon=None, passengers=1):
+    """
+    Green destinations within `radius_km` of (lat, lng).
+    Ranked by the CO2 of the recommended transport for the estimated trip
+    distance (lowest first), then carbon_score, then distance.
+    Returns a list of dicts with the Destination and its trip estimate.
+    """
+    from .models import Destination
+
+    # Prefix match as an index-friendly range scan: cell <= geohash < cell + '{'
+    covering = covering_cells(lat, lng, radius_km)
+    if not covering:
+        # An empty Q() would match every row
+        return []
+    cells = Q()
+    for cell in covering:
+        cells |= Q(geohash__gte=cell, geohash__lt=cell + '{')
+    qs = Destination.objects.filter(cells).exclude(latitude=None).exclude(longitude=None)
+    if max_carbon is not None:
+        qs = qs.filter(carbon_score__lte=max_carbon)
+    # Plain tuples for the candidate scan; model instances only for the winners
+    candidates = list(qs.values_list('id', 'latitude', 'longitude', 'carbon_score'))
+    if not candidates:
+        return []
+
+    if np is not None:
+        coords = np.array([(c[1], c[2]) for c in candidates], dtype=float)
+        straight = haversine_km(lat, lng, coords[:, 0], coords[:, 1]).tolist()
+    else:
+        straight = [haversine_km(lat, lng, c[1], c[2]) for c in candidates]
+    within = [(c, km) for c, km in zip(candidates, straight) if km <= radius_km]
+    if not within:
+        return []
+
+    road_factor = getattr(settings, 'OFFLINE_ROAD_FACTOR', DEFAULT_ROAD_FACTOR)
+    trips = [round(km * road_factor, 2) for _, km in within]
+    engine = GreenTravelAI.get_engine()
+    if engine is not None:
+        best = engine.best(trips, passengers)
+        picks = [(str(t), float(e)) for t, e in zip(best['transport'], best['emission_kg'])]
+    else:
+        picks = []
+        for km in trips:
+            option = GreenTravelAI.get_best_recommendation(km, None, passengers)
+            picks.append((option['transport'], option['emission_kg']) if option else (None, 0.0))
+
+    ranked = []
+    for (cand, km), trip_km, (transport, emission) in zip(within, trips, picks):
+        ranked.append({
+            'id': cand[0],
+            'carbon_score': cand[3],
+            'distance_km': round(km, 2),
+            'trip_km': trip_km,
+            'recommended': transport,
+            'co2_kg': round(emission, 2),
+        })
+    ranked.sort(key=lambda r: (r['co2_kg'], r['carbon_score'], r['distance_km']))
+    ranked = ranked[:limit]
+
+    destinations = Destination.objects.in_bulk([r['id'] for r in ranked])
+    for r in ranked:
+        r['destination'] = destinations[r.pop('id')]
+        del r['carbon_score']
+    return ranked
@@ -0,0 +1,211 @@
+"""
+Fingerprinted, precompressed static files served from the app process
+- CompressedManifestStaticFilesStorage: `collectstatic` writes content-hashed
+  copies (style.3f2a9c1b7e4d.css) plus .gz and, when `brotli` is installed,
+  .br siblings next to them
+- PrecompressedStaticMiddleware: serves STATIC_ROOT with the best encoding
+  the client accepts; hashed names get far-future immutable cache headers.
+  The .gz/.br variants are only served as encodings of their original, never
+  by their own URL
+Useful when no CDN or front proxy sits in front of the app.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotFound, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+logger = logging.getLogger(__name__)
+
+# brotli is listed in requirements.txt; without it only .gz files are written
+# (collectstatic logs a warning)
+try:
+    import brotli as _brotli
+except Exception:
+    _brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.html', '.xml', '.ico', '.ttf', '.eot', '.otf')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Content-codings with a precompressed variant, in server preference order
+ENCODING_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+_ACCEPT_TOKEN = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([^\s;,]+))?')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage that also precompresses what it collects"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, done in super().post_process(paths, dry_run, **options):
+            names.add(name)
+            if isinstance(hashed_name, str):
+                names.add(hashed_name)
+            yield name, hashed_name, done
+        if dry_run:
+            return
+        if _brotli is None:
+            logger.warning('brotli is not installed; writing .gz variants only (pip install brotli)')
+        # Compress after every hashing pass has finished rewriting the files
+        for name in sorted(names):
+            self.compress(name)
+
+    def compress(self, name):
+        """
+        Write `name`.gz (and .br) when that is smaller; return the names written.
+        Variants not written this time are deleted, so a sibling left by an
+        earlier collectstatic can't be served in place of changed content.
+        """
+        written = []
+        if name.lower().endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+            with self.open(name) as handle:
+                data = handle.read()
+            if len(data) >= getattr(settings, 'STATIC_COMPRESS_MIN_SIZE', 256):
+                encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+                if _brotli is not None:
+                    encoders.append(('.br', lambda raw: _brotli.compress(raw, quality=11)))
+                for suffix, encode in encoders:
+                    compressed = encode(data)
+                    # Not worth a Content-Encoding unless it saves at least 5%
+                    if len(compressed) < len(data) * 0.95:
+                        path = self.path(name + suffix)
+                        with open(path, 'wb') as out:
+                            out.write(compressed)
+                        written.append(name + suffix)
+        for suffix in ('.gz', '.br'):
+            if name + suffix not in written and self.exists(name + suffix):
+                self.delete(name + suffix)
+        return written
+
+    def stored_name(self, name):
+        # Before the first collectstatic there is no manifest: use plain names
+        # rather than failing every {% static %} tag
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if self.hashed_files:
+                raise
+            return name
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header, including '*' and 'identity' entries"""
+    accepted = {}
+    for part in (header or '').lower().split(','):
+        match = _ACCEPT_TOKEN.match(part)
+        if not match:
+            continue
+        try:
+            accepted[match.group(1)] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+    return accepted
+
+
+def negotiate_encoding(header, available):
+    """
+    Best of the `available` codings (ENCODING_SUFFIXES order) and 'identity'
+    for an Accept-Encoding header, or None when the client refuses them all
+    (e.g. "identity;q=0" and no usable variant). Codings not listed get the
+    '*' quality; identity stays acceptable unless excluded (RFC 9110 12.5.3).
+    """
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get('*')
+
+    def quality(coding):
+        if coding in accepted:
+            return accepted[coding]
+        if wildcard is not None:
+            return wildcard
+        return 1.0 if coding == 'identity' else 0.0
+
+    best, best_q = None, 0.0
+    for coding in [c for c, _ in ENCODING_SUFFIXES if c in available] + ['identity']:
+        q = quality(coding)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Serve files under STATIC_URL from STATIC_ROOT (after collectstatic),
+    picking .br/.gz variants by Accept-Encoding. Requests for anything not in
+    STATIC_ROOT fall through to the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL or '/static/'
+        if not self.prefix.startswith('/'):
+            self.prefix = '/' + self.prefix
+        root = getattr(settings, 'STATIC_ROOT', None)
+        self.root = os.path.realpath(root) if root else None
+        self._hashed = None
+        self._manifest_mtime = None
+
+    def __call__(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            response = self.serve(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def hashed_names(self):
+        """Fingerprinted names from the manifest, re-read when collectstatic rewrites it"""
+        manifest = os.path.join(self.root, getattr(staticfiles_storage, 'manifest_name', 'staticfiles.json'))
+        try:
+            mtime = os.stat(manifest).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._hashed is None or mtime != self._manifest_mtime:
+            load_manifest = getattr(staticfiles_storage, 'load_manifest', None)
+            hashed_files = load_manifest()[0] if mtime is not None and load_manifest else {}
+            self._hashed = set(hashed_files.values())
+            self._manifest_mtime = mtime
+        return self._hashed
+
+    def serve(self, request, name):
+        name = posixpath.normpath(name).lstrip('/')
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+
+        # A variant's own URL would be served without its Content-Encoding
+        for _, suffix in ENCODING_SUFFIXES:
+            if name.endswith(suffix) and os.path.isfile(path[:-len(suffix)]):
+                return HttpResponseNotFound()
+
+        stat = os.stat(path)
+        immutable = name in self.hashed_names()
+        if not immutable and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(path)
+        variants = {coding: path + suffix for coding, suffix in ENCODING_SUFFIXES if os.path.isfile(path + suffix)}
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), variants)
+        if encoding is None:
+            response = HttpResponse('Not Acceptable', status=406, content_type='text/plain')
+            response['Vary'] = 'Accept-Encoding'
+            return response
+        serve_path = variants.get(encoding, path)
+
+        response = FileResponse(open(serve_path, 'rb'), content_type=content_type or 'application/octet-stream')
+        if 'Content-Disposition' in response:
+            del response['Content-Disposition']
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if immutable:
+            # The name changes whenever the content does
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f"public, max-age={getattr(settings, 'STATIC_MAX_AGE', 60)}"
+        return response
@@ -0,0 +1,130 @@
+"""
+Per-user travel summaries
+TravelSummary / TravelModeSummary hold running totals over a user's
+TravelRecord rows so the history page reads one row instead of aggregating
+the whole trip log. Totals are applied incrementally as records are created,
+edited through save() (admin included) or deleted. Queryset .update() and
+bulk_update() send no signals: code using them must adjust the totals itself
+(as rescore.py does) or run `manage.py rebuild_travel_summaries` afterwards.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+
+from .models import TravelModeSummary, TravelRecord, TravelSummary
+
+_FIELDS = ('trip_count', 'total_distance_km', 'total_co2_estimated_kg', 'total_co2_saved_kg')
+# TravelRecord fields the totals are computed from
+SUMMARY_SOURCE_FIELDS = ('user', 'recommended_transport', 'distance_km', 'co2_estimated_kg', 'co2_saved_kg')
+
+
+def _totals(records):
+    """{user_id: {transport: [trips, km, emitted, saved]}} for records with a user"""
+    totals = defaultdict(lambda: defaultdict(lambda: [0, 0.0, 0.0, 0.0]))
+    for rec in records:
+        if rec.user_id is None:
+            continue
+        row = totals[rec.user_id][rec.recommended_transport]
+        row[0] += 1
+        row[1] += rec.distance_km or 0.0
+        row[2] += rec.co2_estimated_kg or 0.0
+        row[3] += rec.co2_saved_kg or 0.0
+    return totals
+
+
+def _increment(model, lookup, values, sign):
+    """Add `values` (aligned with _FIELDS) to the row for `lookup`, creating it if needed"""
+    model.objects.get_or_create(**lookup)
+    changes = {field: F(field) + sign * value for field, value in zip(_FIELDS, values)}
+    # trip_count is unsigned; if totals have drifted, stop at zero rather than
+    # failing the delete on the CHECK constraint (a rebuild fixes the rest)
+    changes['trip_count'] = Greatest(F('trip_count') + sign * values[0], 0)
+    model.objects.filter(**lookup).update(**changes)
+
+
+def apply_records(records, sign=1):
+    """
+    Fold TravelRecord instances into their users' summaries in one transaction.
+    Use sign=-1 to take deleted records back out. Records without a user are
+    ignored.
+    """
+    totals = _totals(records)
+    if not totals:
+        return
+    with transaction.atomic():
+        for user_id, by_mode in totals.items():
+            overall = [sum(row[i] for row in by_mode.values()) for i in range(len(_FIELDS))]
+            _increment(TravelSummary, {'user_id': user_id}, overall, sign)
+            for transport, row in by_mode.items():
+                _increment(TravelModeSummary, {'user_id': user_id, 'transport': transport}, row, sign)
+
+
+def replace_record(old, new):
+    """Swap an edited record's previous values for its new ones in the summaries"""
+    with transaction.atomic():
+        apply_records([old], sign=-1)
+        apply_records([new])
+
+
+def rebuild_summaries(user_ids=None):
+    """
+    Recompute summaries from TravelRecord with grouped SQL aggregates.
+    Rebuilds every user with records when `user_ids` is None. Returns the
+    number of users rebuilt.
+    """
+    records = TravelRecord.objects.exclude(user=None)
+    if user_ids is not None:
+        records = records.filter(user_id__in=user_ids)
+    rows = records.values('user_id', 'recommended_transport').annotate(
+        trips=Count('id'),
+        km=Sum('distance_km'),
+        emitted=Sum('co2_estimated_kg'),
+        saved=Sum('co2_saved_kg'),
+    ).order_by()
+
+    summaries = {}
+    modes = []
+    for row in rows:
+        values = [row['trips'], row['km'] or 0.0, row['emitted'] or 0.0, row['saved'] or 0.0]
+        summary = summaries.setdefault(row['user_id'], TravelSummary(user_id=row['user_id']))
+        for field, value in zip(_FIELDS, values):
+            setattr(summary, field, getattr(summary, field) + value)
+        modes.append(TravelModeSummary(
+            user_id=row['user_id'], transport=row['recommended_transport'], **dict(zip(_FIELDS, values))
+        ))
+
+    with transaction.atomic():
+        old_summaries = TravelSummary.objects.all()
+        old_modes = TravelModeSummary.objects.all()
+        if user_ids is not None:
+            old_summaries = old_summaries.filter(user_id__in=user_ids)
+            old_modes = old_modes.filter(user_id__in=user_ids)
+        old_summaries.delete()
+        old_modes.delete()
+        TravelSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+        TravelModeSummary.objects.bulk_create(modes, batch_size=1000)
+    return len(summaries)
+
+
+def summary_for_user(user):
+    """History-page totals for a user: one summary row plus the per-mode breakdown"""
+    summary = TravelSummary.objects.filter(user=user).first()
+    if summary is None:
+        summary = TravelSummary(user=user)
+    return {
+        'trip_count': summary.trip_count,
+        'total_distance_km': round(summary.total_distance_km, 2),
+        'total_emitted_kg': round(summary.total_co2_estimated_kg, 2),
+        'total_saved_kg': round(summary.total_co2_saved_kg, 2),
+        'modes': [
+            {
+                'transport': mode.transport,
+                'trip_count': mode.trip_count,
+                'total_co2_estimated_kg': round(mode.total_co2_estimated_kg, 2),
+                'total_co2_saved_kg': round(mode.total_co2_saved_kg, 2),
+            }
+            for mode in TravelModeSummary.objects.filter(user=user, trip_count__gt=0)
+        ],
+    }
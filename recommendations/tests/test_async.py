@@ -0,0 +1,91 @@
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+
+from recommendations.models import TravelRecord
+from recommendations.views import ROUTE_MESSAGES, aresolve_route, recommend_async
+
+from .utils import LOCAL_CACHES
+
+ROUTE = {'distance_km': 230.0, 'durations': {'driving': 12000}}
+
+
+def slow(value, delay=0.2):
+    def lookup(*args):
+        time.sleep(delay)
+        return value(*args) if callable(value) else value
+    return lookup
+
+
+@override_settings(CACHES=LOCAL_CACHES, OFFLINE_ROUTING=False, GOOGLE_MAPS_API_KEY='AIza-test-key')
+class AsyncResolveRouteTests(SimpleTestCase):
+    def patch(self, distance, country):
+        return mock.patch.multiple('recommendations.views', get_distance_from_api=distance, get_country_for_place=country)
+
+    async def test_lookups_run_concurrently(self):
+        with self.patch(slow(ROUTE), slow('IN')):
+            started = time.monotonic()
+            info, error, _ = await aresolve_route('Delhi', 'Agra')
+            elapsed = time.monotonic() - started
+        self.assertEqual((info, error), (ROUTE, None))
+        # Three 0.2 s lookups, overlapped
+        self.assertLess(elapsed, 0.5)
+
+    async def test_outside_india(self):
+        with self.patch(slow(ROUTE, 0), slow(lambda place: 'FR' if place == 'Paris' else 'IN', 0)):
+            self.assertEqual(await aresolve_route('Delhi', 'Paris'), (None, ROUTE_MESSAGES['outside_india'], None))
+
+    async def test_failed_lookup(self):
+        def boom(*args):
+            raise ConnectionError('backend down')
+        with self.patch(boom, slow('IN', 0)):
+            info, error, _ = await aresolve_route('Delhi', 'Agra')
+        self.assertIsNone(info)
+        self.assertEqual(error, ROUTE_MESSAGES['google_failed'])
+
+    @override_settings(ROUTE_LOOKUP_DEADLINE_SECONDS=0.05)
+    async def test_deadline(self):
+        with self.patch(slow(ROUTE, 0.3), slow('IN', 0)):
+            self.assertEqual(await aresolve_route('Delhi', 'Agra'), (None, ROUTE_MESSAGES['timeout'], None))
+
+    async def test_identical_concurrent_routes_share_one_lookup(self):
+        distance = mock.Mock(side_effect=slow(ROUTE, 0.1))
+        with self.patch(distance, slow('IN', 0)):
+            results = await asyncio.gather(aresolve_route('Delhi', 'Agra'), aresolve_route('delhi ', 'AGRA'))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(distance.call_count, 1)
+
+
+@override_settings(CACHES=LOCAL_CACHES, OFFLINE_ROUTING=True, WRITE_BEHIND_RECORDS=False)
+class RecommendAsyncViewTests(TestCase):
+    async def post(self, user):
+        request = AsyncRequestFactory().post('/', {'source': 'Delhi', 'destination': 'Agra', 'passenger_count': 2})
+        request.user = user
+
+        async def auser():
+            return user
+        request.auser = auser
+        return await recommend_async(request)
+
+    async def test_anonymous_users_must_log_in(self):
+        response = await self.post(AnonymousUser())
+        self.assertContains(response, 'Please log in to use the route finder.')
+        self.assertFalse(await TravelRecord.objects.aexists())
+
+    async def test_route_is_scored_and_saved(self):
+        user = await sync_to_async(User.objects.create_user)('traveller', password='x')
+        response = await self.post(user)
+        self.assertEqual(response.status_code, 200)
+        record = await TravelRecord.objects.aget(user=user)
+        self.assertEqual((record.source, record.destination, record.passenger_count), ('Delhi', 'Agra', 2))
+        self.assertContains(response, record.recommended_transport.title(), status_code=200)
+
+    async def test_get_renders_the_page(self):
+        request = AsyncRequestFactory().get('/')
+        request.user = AnonymousUser()
+        response = await recommend_async(request)
+        self.assertEqual(response.status_code, 200)
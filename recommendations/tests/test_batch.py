@@ -0,0 +1,125 @@
+import itertools
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recommendations.batch import MAX_DESTINATIONS, MAX_ELEMENTS, MAX_ORIGINS, evaluate_pairs, plan_chunks
+
+from .utils import LOCAL_CACHES
+
+
+class PlanChunksTests(SimpleTestCase):
+    def assertValidPlan(self, pairs, chunks):
+        covered = set()
+        for origins, destinations in chunks:
+            self.assertLessEqual(len(origins), MAX_ORIGINS)
+            self.assertLessEqual(len(destinations), MAX_DESTINATIONS)
+            self.assertLessEqual(len(origins) * len(destinations), MAX_ELEMENTS)
+            covered.update(itertools.product(origins, destinations))
+        self.assertLessEqual(set(pairs), covered)
+
+    def test_full_matrix_respects_limits(self):
+        origins = [f'o{i}' for i in range(30)]
+        destinations = [f'd{i}' for i in range(40)]
+        pairs = list(itertools.product(origins, destinations))
+        chunks = plan_chunks(pairs)
+        self.assertValidPlan(pairs, chunks)
+        # Destinations split 25 + 15: 8 blocks of 4×25 and 5 of 6×15
+        self.assertEqual(len(chunks), 13)
+
+    def test_one_origin_many_destinations(self):
+        pairs = [('Delhi', f'd{i}') for i in range(60)]
+        chunks = plan_chunks(pairs)
+        self.assertValidPlan(pairs, chunks)
+        self.assertEqual(len(chunks), 3)
+
+    def test_scattered_pairs_are_merged(self):
+        pairs = [(f'o{i}', f'd{i}') for i in range(9)]
+        chunks = plan_chunks(pairs)
+        self.assertValidPlan(pairs, chunks)
+        self.assertEqual(len(chunks), 1)
+
+    def test_duplicates_and_empty_input(self):
+        self.assertEqual(plan_chunks([]), [])
+        self.assertEqual(plan_chunks([('a', 'b'), ('a', 'b')]), [(['a'], ['b'])])
+
+    def test_custom_limits(self):
+        pairs = list(itertools.product('abcdef', 'uvwxyz'))
+        chunks = plan_chunks(pairs, max_origins=4, max_destinations=4, max_elements=8)
+        for origins, destinations in chunks:
+            self.assertLessEqual(len(origins) * len(destinations), 8)
+        self.assertLessEqual(set(pairs), {p for o, d in chunks for p in itertools.product(o, d)})
+
+
+@override_settings(CACHES=LOCAL_CACHES, GOOGLE_MAPS_API_KEY='', OFFLINE_ROUTING=True)
+class EvaluatePairsTests(SimpleTestCase):
+    def test_unknown_places_get_an_error_not_a_mock_score(self):
+        results = evaluate_pairs([('Delhi', 'Agra'), ('Foo', 'Bar'), ('Delhi', 'Agra')])
+        self.assertEqual(len(results), 3)
+        self.assertIn('recommended', results[0])
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[1], {'source': 'Foo', 'destination': 'Bar', 'error': 'route not found'})
+
+    def test_google_backend_skips_routes_outside_india(self):
+        countries = {'Delhi': 'IN', 'Agra': 'IN', 'Paris': 'FR'}
+        route = {'distance_km': 230.0, 'durations': {}}
+        with mock.patch('recommendations.batch.google_configured', return_value=True), \
+                mock.patch('recommendations.batch.geocode_place', side_effect=lambda p: {'country_code': countries[p]}), \
+                mock.patch('recommendations.batch.fetch_google_matrix', side_effect=lambda o, d: {(x, y): route for x in o for y in d}) as fetch:
+            results = evaluate_pairs([('Delhi', 'Agra'), ('Delhi', 'Paris')])
+        self.assertEqual(results[0]['distance_km'], 230.0)
+        self.assertEqual(results[1]['error'], 'route outside India')
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(fetch.call_args.args, (['Delhi'], ['Agra']))
+
+
+@override_settings(CACHES=LOCAL_CACHES, GOOGLE_MAPS_API_KEY='', OFFLINE_ROUTING=True,
+                   API_KEYS={'batch-key': 'nightly'}, BATCH_MAX_PAIRS=3)
+class BatchEndpointTests(TestCase):
+    def post(self, body, key='batch-key'):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {key}'} if key else {}
+        data = body if isinstance(body, (str, bytes)) else json.dumps(body)
+        return self.client.post('/batch/', data, content_type='application/json', **headers)
+
+    def test_scores_pairs_in_order(self):
+        response = self.post({'pairs': [['Delhi', 'Agra'], {'source': 'Mumbai', 'destination': 'Pune'}]})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([(r['source'], r['destination']) for r in results], [('Delhi', 'Agra'), ('Mumbai', 'Pune')])
+
+    def test_origins_destinations(self):
+        response = self.post({'origins': ['Delhi'], 'destinations': ['Agra', 'Jaipur'], 'passengers': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({r['passenger_count'] for r in response.json()['results']}, {2})
+
+    def test_requires_an_api_key(self):
+        self.assertEqual(self.post({'pairs': [['Delhi', 'Agra']]}, key=None).status_code, 401)
+        self.assertEqual(self.post({'pairs': [['Delhi', 'Agra']]}, key='wrong').status_code, 401)
+
+    def test_rejects_malformed_bodies(self):
+        bad = [
+            'not json',
+            ['Delhi', 'Agra'],
+            {'pairs': 'Delhi,Agra'},
+            {'pairs': ['ab']},
+            {'pairs': [['Delhi']]},
+            {'pairs': [['Delhi', 'Agra', 'Jaipur']]},
+            {'pairs': [['Delhi', '  ']]},
+            {'pairs': [['Delhi', 5]]},
+            {'pairs': [{'source': 'Delhi'}]},
+            {'origins': 'Delhi', 'destinations': ['Agra']},
+            {'pairs': [['Delhi', 'Agra']], 'passengers': 'many'},
+        ]
+        for body in bad:
+            with self.subTest(body=body):
+                self.assertEqual(self.post(body).status_code, 400)
+
+    def test_limits(self):
+        self.assertEqual(self.post({'pairs': []}).status_code, 400)
+        self.assertEqual(self.post({'pairs': [['Delhi', 'Agra']], 'passengers': 21}).status_code, 400)
+        self.assertEqual(self.post({'origins': ['Delhi', 'Pune'], 'destinations': ['Agra', 'Jaipur']}).status_code, 400)
+
+    def test_post_only(self):
+        response = self.client.get('/batch/', HTTP_AUTHORIZATION='Bearer batch-key')
+        self.assertEqual(response.status_code, 405)
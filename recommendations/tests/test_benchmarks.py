@@ -0,0 +1,137 @@
+import json
+from argparse import Namespace
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from benchmarks import recommend
+from benchmarks.stub_maps import StubMapsServer
+from recommendations.geocoding import geocode_cache
+from recommendations.governor import governor
+from recommendations.views import _fetch_distance
+
+from .utils import LOCAL_CACHES
+
+
+class StubMapsServerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubMapsServer(latency_ms=0, seed=1).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def get(self, path):
+        with urlopen(self.stub.url + path, timeout=5) as response:
+            return json.loads(response.read())
+
+    def test_nominatim_search(self):
+        [place] = self.get('/search?q=Delhi&format=json')
+        self.assertEqual(place['address']['country_code'], 'in')
+        self.assertAlmostEqual(float(place['lat']), 28.6, delta=0.5)
+        self.assertEqual(self.get('/search?q=Atlantis'), [])
+
+    def test_google_endpoints(self):
+        geocoded = self.get('/maps/api/geocode/json?address=Agra')
+        self.assertEqual(geocoded['status'], 'OK')
+        self.assertEqual(geocoded['results'][0]['address_components'][-1]['short_name'], 'IN')
+        self.assertEqual(self.get('/maps/api/geocode/json?address=Atlantis')['status'], 'ZERO_RESULTS')
+
+        [element] = self.get('/maps/api/distancematrix/json?origins=Delhi&destinations=Agra&mode=driving')['rows'][0]['elements']
+        self.assertEqual(element['status'], 'OK')
+        self.assertGreater(element['distance']['value'], 150_000)
+        self.assertGreater(element['duration']['value'], 0)
+        missing = self.get('/maps/api/distancematrix/json?origins=Delhi&destinations=Atlantis')
+        self.assertEqual(missing['rows'][0]['elements'][0]['status'], 'NOT_FOUND')
+
+    def test_counts_requests_and_404s_unknown_paths(self):
+        self.stub.counts.clear()
+        self.get('/search?q=Delhi')
+        self.get('/search?q=Pune')
+        with self.assertRaises(HTTPError) as raised:
+            self.get('/elsewhere')
+        self.assertEqual(raised.exception.code, 404)
+        self.assertEqual(dict(self.stub.counts), {'/search': 2})
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class StubScenarioTests(TestCase):
+    """The benchmark's osm/google scenarios route the real clients to the stub"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stub = StubMapsServer(latency_ms=0, seed=1).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        geocode_cache.clear()
+        governor.reset()
+        self.stub.counts.clear()
+        caches['routes'].clear()
+
+    def fetch(self, scenario):
+        reason = recommend._missing_client(scenario)
+        if reason:
+            self.skipTest(reason)
+        with self.settings(**recommend._scenario_settings(scenario, self.stub)):
+            return _fetch_distance('Delhi', 'Agra')
+
+    def test_osm(self):
+        with self.settings(GOOGLE_MAPS_API_KEY=''):
+            result = self.fetch('osm')
+        self.assertFalse(result.get('mock'))
+        self.assertGreater(result['distance_km'], 150)
+        self.assertEqual(self.stub.counts['/search'], 2)
+
+    def test_google(self):
+        result = self.fetch('google')
+        self.assertFalse(result.get('mock'))
+        self.assertGreater(self.stub.counts['/maps/api/distancematrix/json'], 0)
+
+
+class BenchmarkHelperTests(SimpleTestCase):
+    def test_percentile(self):
+        self.assertIsNone(recommend._percentile([], 50))
+        values = list(range(1, 101))
+        self.assertEqual((recommend._percentile(values, 50), recommend._percentile(values, 99)), (51, 100))
+
+    def test_server_timing(self):
+        header = 'geocode;dur=12.5, route;dur=80.0, total;dur=95.1'
+        self.assertEqual(recommend._server_timing(header), {'geocode': 12.5, 'route': 80.0})
+        self.assertEqual(recommend._server_timing(None), {})
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {
+            'micro': [{'name': 'get_transport_options', 'p50_us': 10.0, 'p99_us': 20.0, 'ops_per_sec': 1000.0}],
+            'e2e': [
+                {'scenario': 'offline', 'p50_ms': 5.0, 'p99_ms': 9.0, 'requests_per_sec': 200.0},
+                {'scenario': 'google', 'skipped': 'googlemaps is not installed'},
+            ],
+        }
+        current = {
+            'micro': [{'name': 'get_transport_options', 'p50_us': 11.0, 'p99_us': 30.0, 'ops_per_sec': 990.0}],
+            'e2e': [
+                {'scenario': 'offline', 'p50_ms': 5.0, 'p99_ms': 9.0, 'requests_per_sec': 100.0},
+                {'scenario': 'google', 'p50_ms': 90.0, 'p99_ms': 300.0, 'requests_per_sec': 10.0},
+            ],
+        }
+        regressions = recommend.compare(current, baseline, 0.15)
+        self.assertEqual(regressions, [
+            'micro get_transport_options p99_us: 20.0 -> 30.0 (+50.0%)',
+            'e2e offline requests_per_sec: 200.0 -> 100.0 (-50.0%)',
+        ])
+        self.assertEqual(recommend.compare(baseline, baseline, 0.0), [])
+
+    def test_meta_leaves_out_paths(self):
+        meta = recommend._meta(Namespace(output='run.json', compare='base.json', seed=42))
+        self.assertEqual(meta['args'], {'seed': 42})
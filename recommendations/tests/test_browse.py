@@ -0,0 +1,72 @@
+import re
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from recommendations.models import Destination, Tag
+
+from .utils import LOCAL_CACHES
+
+NAME = re.compile(r'<h3>(.*?) - ')
+
+
+@override_settings(CACHES=LOCAL_CACHES, DESTINATIONS_PER_PAGE=20)
+class BrowseRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, score, transports, tags in (
+            ('Rishikesh', 30, 'train,bus', 'Nature,River,Spiritual'),
+            ('Goa', 25, 'flight,train', 'coast,party'),
+            ('Munnar', 35, 'bus,car', 'nature,hills'),
+            ('Shimla', 40, 'Train,car', 'hills,nature,snow'),
+            ('Delhi', 60, 'train,flight,bus', 'city'),
+        ):
+            Destination.objects.create(name=name, country='India', carbon_score=score,
+                                       transport_options=transports, tags=tags)
+
+    def setUp(self):
+        # Cached fragments outlive each test's rolled-back edits
+        caches['pages'].clear()
+
+    def names(self, query='tags='):
+        response = self.client.get(f'/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return NAME.findall(response.content.decode())
+
+    def test_default_order_is_carbon_score(self):
+        self.assertEqual(self.names(), ['Goa', 'Rishikesh', 'Munnar', 'Shimla', 'Delhi'])
+
+    def test_tag_matches_lower_the_rank(self):
+        # rank = carbon_score - 5 × matching tags
+        self.assertEqual(self.names('tags=nature,hills'), ['Munnar', 'Rishikesh', 'Goa', 'Shimla', 'Delhi'])
+        self.assertEqual(self.names('tags=HILLS, Nature,,nature'), self.names('tags=nature,hills'))
+
+    def test_transport_and_carbon_filters(self):
+        self.assertEqual(self.names('transport=train'), ['Goa', 'Rishikesh', 'Shimla', 'Delhi'])
+        self.assertEqual(self.names('transport=train&max_carbon=35&tags=river'), ['Rishikesh', 'Goa'])
+
+    def test_lookup_tables_follow_edits(self):
+        goa = Destination.objects.get(name='Goa')
+        goa.tags = 'Coast, Nature'
+        goa.transport_options = 'bus'
+        goa.save()
+        self.assertEqual(sorted(goa.tag_items.values_list('name', flat=True)), ['coast', 'nature'])
+        self.assertEqual(self.names('transport=train'), ['Rishikesh', 'Shimla', 'Delhi'])
+        self.assertTrue(Tag.objects.filter(name='party').exists())
+
+    @override_settings(DESTINATIONS_PER_PAGE=2)
+    def test_pages(self):
+        self.assertEqual(self.names('page=2'), ['Munnar', 'Shimla'])
+        self.assertEqual(self.names('page=99'), ['Delhi'])
+
+    @override_settings(DESTINATIONS_PER_PAGE=2)
+    def test_page_links_use_the_normalized_filters(self):
+        first = self.client.get('/?tags=Nature,%20HILLS,&max_carbon=100&utm_source=<x>&page=2').content.decode()
+        self.assertIn('href="?max_carbon=100&amp;tags=hills%2Cnature&amp;page=1"', first)
+        self.assertIn('href="?max_carbon=100&amp;tags=hills%2Cnature&amp;page=3"', first)
+        # An equivalent query served from the cached fragment doesn't echo the first visitor's input
+        second = self.client.get('/?max_carbon=100&tags=hills,nature&page=2').content.decode()
+        self.assertNotIn('utm_source', second)
+        self.assertNotIn('HILLS', second)
+        self.assertIn('href="?max_carbon=100&amp;tags=hills%2Cnature&amp;page=3"', second)
+        self.assertIn('href="?page=2"', self.client.get('/?tags=').content.decode())
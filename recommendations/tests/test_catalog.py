@@ -0,0 +1,52 @@
+import re
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.middleware.csrf import _unmask_cipher_token
+from django.template import RequestContext, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from recommendations.catalog import bump_catalog_version, cache_anonymous_page, page_cache, page_key
+
+TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="([^"]*)"')
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-pages'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES, PAGE_CACHE_ALIAS='pages')
+class CachedPageCsrfTests(SimpleTestCase):
+    def setUp(self):
+        self.renders = 0
+
+        @cache_anonymous_page
+        def view(request):
+            self.renders += 1
+            page = Template('<form method="post">{% csrf_token %}</form>').render(RequestContext(request))
+            return HttpResponse(page)
+
+        self.view = view
+        bump_catalog_version()
+
+    def visit(self):
+        request = RequestFactory().get('/destinations/')
+        request.user = AnonymousUser()
+        response = self.view(request)
+        self.assertEqual(response.status_code, 200)
+        token = TOKEN.search(response.content.decode()).group(1)
+        return request, token
+
+    def test_each_visitor_gets_their_own_token(self):
+        first, first_token = self.visit()
+        second, second_token = self.visit()
+        self.assertEqual(self.renders, 1)
+        self.assertNotEqual(first.META['CSRF_COOKIE'], second.META['CSRF_COOKIE'])
+        for request, token in ((first, first_token), (second, second_token)):
+            self.assertEqual(_unmask_cipher_token(token), request.META['CSRF_COOKIE'])
+
+    def test_cached_page_stores_a_placeholder(self):
+        _, token = self.visit()
+        content, _ = page_cache().get(page_key('page:/destinations/', {}))
+        self.assertIn(b'__CSRF_TOKEN__', content)
+        self.assertNotIn(token.encode(), content)
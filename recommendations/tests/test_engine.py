@@ -0,0 +1,54 @@
+import unittest
+
+from django.test import SimpleTestCase
+
+from recommendations.ai_logic import GreenTravelAI
+from recommendations.engine import np
+
+# Band edges and both sides of them, plus fractional distances that exercise rounding
+DISTANCES = [0.4, 1, 12.345, 49.99, 50, 50.01, 99.99, 100, 100.01, 150.125, 299.99, 300, 300.01,
+             450.5, 699.99, 700, 700.01, 1234.567, 2500]
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class ScoringEngineTests(SimpleTestCase):
+    def test_matches_the_python_scorer(self):
+        durations = {'driving': 5400, 'transit': '7200', 'bicycling': 'n/a'}
+        for km in DISTANCES:
+            for passengers in (1, 3):
+                for given in (None, durations):
+                    with self.subTest(km=km, passengers=passengers, durations=given):
+                        self.assertEqual(
+                            GreenTravelAI.calculate_recommendations(km, given, passengers),
+                            GreenTravelAI._calculate_recommendations_python(km, given, passengers),
+                        )
+
+    def test_best_matches_the_top_recommendation(self):
+        engine = GreenTravelAI.get_engine()
+        best = engine.best(DISTANCES, [1, 2] * 9 + [4])
+        for i, km in enumerate(DISTANCES):
+            with self.subTest(km=km):
+                top = GreenTravelAI._calculate_recommendations_python(km)[0]
+                self.assertEqual(best['transport'][i], top['transport'])
+                self.assertEqual(best['emission_kg'][i], top['emission_kg'])
+                self.assertEqual(best['co2_saved_kg'][i], GreenTravelAI.compare_with_flight(top, km))
+
+    def test_trip_emissions(self):
+        engine = GreenTravelAI.get_engine()
+        emission, saved = engine.trip_emissions(['train', 'flight', 'car'], [230.0, 230.0, 12.5])
+        self.assertEqual(emission.tolist(), [
+            GreenTravelAI.TRANSPORTS['train'].calculate_emission(230.0),
+            GreenTravelAI.TRANSPORTS['flight'].calculate_emission(230.0),
+            GreenTravelAI.TRANSPORTS['car'].calculate_emission(12.5),
+        ])
+        self.assertEqual(saved.tolist()[1], 0)
+        self.assertEqual(saved.tolist()[0], round(58.65 - 9.43, 2))
+
+    def test_score_shapes_and_eligibility(self):
+        engine = GreenTravelAI.get_engine()
+        scores = engine.score([20, 200, 2000], passengers=[1, 2, 0])
+        self.assertEqual(scores['emission_kg'].shape, (3, len(engine.modes)))
+        eligible = {engine.modes[i] for i in np.flatnonzero(scores['eligible'][2])}
+        self.assertEqual(eligible, {'flight', 'train', 'ev', 'car'})
+        # Passenger counts are clamped to at least one
+        self.assertTrue((scores['emission_per_person_kg'][2] == scores['emission_kg'][2]).all())
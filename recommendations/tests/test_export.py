@@ -0,0 +1,108 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from recommendations.export import EXPORT_FIELDS, csv_cell, export_queryset, pa, pq, stream_export
+from recommendations.models import TravelRecord
+
+
+def create_record(day, **fields):
+    values = {
+        'source': 'Delhi', 'destination': 'Agra', 'distance_km': 230.0, 'passenger_count': 2,
+        'recommended_transport': 'train', 'co2_estimated_kg': 9.43, 'co2_saved_kg': 49.22,
+        'created_at': datetime(2026, 3, day, 9, 30, tzinfo=dt_timezone.utc),
+    }
+    values.update(fields)
+    return TravelRecord.objects.create(**values)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('traveller', password='pw')
+        create_record(1, user=self.user)
+        create_record(2, recommended_transport='bus', source='=HYPERLINK("http://evil")', destination='-1+2')
+        create_record(3, user=self.user, source='@SUM(A1)', destination='\tTab')
+
+    def export(self, *args):
+        out = io.StringIO()
+        call_command('export_travel_records', *args, stdout=out)
+        return list(csv.reader(io.StringIO(out.getvalue())))
+
+    def test_csv_header_rows_and_filters(self):
+        rows = self.export('--chunk-size', '2')
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][EXPORT_FIELDS.index('created_at')], '2026-03-01T09:30:00+00:00')
+        self.assertEqual(len(self.export('--user', str(self.user.pk))), 3)
+        self.assertEqual(len(self.export('--transport', 'bus')), 2)
+        self.assertEqual(len(self.export('--start', '2026-03-02', '--end', '2026-03-02')), 2)
+
+    def test_csv_escapes_formula_like_text(self):
+        rows = self.export()
+        source, destination = EXPORT_FIELDS.index('source'), EXPORT_FIELDS.index('destination')
+        self.assertEqual(rows[2][source], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(rows[2][destination], "'-1+2")
+        self.assertEqual((rows[3][source], rows[3][destination]), ("'@SUM(A1)", "'\tTab"))
+        self.assertEqual(rows[1][source], 'Delhi')
+        # Numbers are left alone, negative or not
+        self.assertEqual((csv_cell(-1.5), csv_cell('+91'), csv_cell('\rx')), (-1.5, "'+91", "'\rx"))
+
+    @skipUnless(pa is not None, 'pyarrow is not installed')
+    def test_parquet_to_stdout_buffer(self):
+        out = io.TextIOWrapper(io.BytesIO())
+        call_command('export_travel_records', '--format', 'parquet', '--chunk-size', '2', stdout=out)
+        table = pq.read_table(io.BytesIO(out.buffer.getvalue()))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column_names, list(EXPORT_FIELDS))
+        # Columnar formats keep values as typed, without the CSV escaping
+        self.assertEqual(table.column('source').to_pylist()[1], '=HYPERLINK("http://evil")')
+
+    @skipUnless(pa is not None, 'pyarrow is not installed')
+    def test_arrow_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'records.arrow')
+            call_command('export_travel_records', '--format', 'arrow', '--transport', 'train',
+                         '--output', path, stderr=io.StringIO())
+            with open(path, 'rb') as fh:
+                table = pa.ipc.open_stream(fh).read_all()
+        self.assertEqual(table.column('recommended_transport').to_pylist(), ['train', 'train'])
+        self.assertEqual(table.column('created_at').to_pylist()[0], datetime(2026, 3, 1, 9, 30, tzinfo=dt_timezone.utc))
+
+    def test_binary_format_needs_a_byte_stream(self):
+        with self.assertRaises(CommandError):
+            call_command('export_travel_records', '--format', 'parquet', stdout=io.StringIO())
+
+    def test_streams_in_chunks(self):
+        chunks = list(stream_export(export_queryset(start=date(2026, 3, 1)), 'csv', chunk_size=1))
+        self.assertEqual(len(chunks), 4)
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        create_record(1, source='+cmd')
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+
+    def test_staff_only(self):
+        response = self.client.get('/export/travel-records/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv_download(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/export/travel-records/', {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="travel_records.csv"', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][EXPORT_FIELDS.index('source')], "'+cmd")
+
+    def test_bad_input(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/export/travel-records/', {'format': 'xlsx'}).status_code, 400)
+        self.assertEqual(self.client.get('/export/travel-records/', {'start': '1 March'}).status_code, 400)
@@ -0,0 +1,72 @@
+import math
+
+from django.test import SimpleTestCase, override_settings
+
+from recommendations import gazetteer
+from recommendations.gazetteer import estimate_durations, get_gazetteer, haversine_km, offline_route
+from recommendations.views import mock_distance_calculation
+
+
+class HaversineTests(SimpleTestCase):
+    def test_known_distances(self):
+        # Delhi - Mumbai is about 1150 km as the crow flies
+        self.assertAlmostEqual(float(haversine_km(28.6139, 77.2090, 19.0760, 72.8777)), 1153, delta=5)
+        # One degree of latitude
+        self.assertAlmostEqual(float(haversine_km(0, 0, 1, 0)), 111.2, delta=0.1)
+        self.assertEqual(float(haversine_km(12.97, 77.59, 12.97, 77.59)), 0.0)
+
+    def test_symmetric_and_antimeridian(self):
+        self.assertAlmostEqual(float(haversine_km(10, 20, -5, 40)), float(haversine_km(-5, 40, 10, 20)))
+        self.assertAlmostEqual(float(haversine_km(0, 179.5, 0, -179.5)), 111.2, delta=0.1)
+        self.assertAlmostEqual(float(haversine_km(0, 0, 0, 180)), math.pi * gazetteer.EARTH_RADIUS_KM, places=3)
+
+    def test_arrays_match_scalars(self):
+        if gazetteer.np is None:
+            self.skipTest('numpy is not installed')
+        lat2 = [19.0760, 22.5726, 12.9716]
+        lon2 = [72.8777, 88.3639, 77.5946]
+        many = haversine_km(28.6139, 77.2090, lat2, lon2).tolist()
+        for km, (la, lo) in zip(many, zip(lat2, lon2)):
+            self.assertAlmostEqual(km, float(haversine_km(28.6139, 77.2090, la, lo)))
+
+
+class GazetteerTests(SimpleTestCase):
+    def setUp(self):
+        self.gazetteer = get_gazetteer()
+
+    def test_lookup(self):
+        delhi = self.gazetteer.lookup('Delhi')
+        for text in ('new delhi', 'New Delhi, DL', 'near Connaught Place Delhi', 'DILLI', 'Dilli.'):
+            with self.subTest(text=text):
+                self.assertEqual(self.gazetteer.lookup(text), delhi)
+        self.assertEqual(self.gazetteer.lookup('Bombay'), self.gazetteer.lookup('Mumbai'))
+        # Unique-ish prefix
+        self.assertEqual(self.gazetteer.lookup('Bengal'), self.gazetteer.lookup('Bengaluru'))
+        for text in ('', '  ', 'Xy', 'Atlantis'):
+            self.assertIsNone(self.gazetteer.lookup(text))
+
+    def test_distances(self):
+        km = self.gazetteer.distance_km('Delhi', 'Mumbai')
+        self.assertAlmostEqual(km, 1153 * gazetteer.DEFAULT_ROAD_FACTOR, delta=10)
+        self.assertEqual(self.gazetteer.distance_km('Delhi', 'Mumbai', road_factor=1.0), round(km / 1.2, 2))
+        self.assertIsNone(self.gazetteer.distance_km('Delhi', 'Atlantis'))
+        self.assertEqual(
+            self.gazetteer.distances_km([('Delhi', 'Mumbai'), ('Delhi', 'Atlantis'), ('Mumbai', 'Delhi')]),
+            [km, None, km],
+        )
+        self.assertEqual(self.gazetteer.distances_km([]), [])
+
+    @override_settings(OFFLINE_ROAD_FACTOR=1.0)
+    def test_offline_route(self):
+        info = offline_route('Delhi', 'Agra')
+        self.assertEqual(info['fallback'], 'offline')
+        self.assertEqual(info['durations'], estimate_durations(info['distance_km']))
+        self.assertIsNone(offline_route('Delhi', 'Atlantis'))
+
+    def test_mock_distance_uses_the_gazetteer(self):
+        self.assertEqual(mock_distance_calculation('Delhi', 'Agra')['distance_km'], offline_route('Delhi', 'Agra')['distance_km'])
+        self.assertEqual(mock_distance_calculation('Foo', 'Bar')['distance_km'], 500)
+
+    def test_durations_switch_to_highway_speeds_at_50_km(self):
+        self.assertEqual(estimate_durations(40)['driving'], 3600)
+        self.assertEqual(estimate_durations(60)['driving'], 3600)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recommendations.geocoding import GeocodeCache, normalize_place
+from recommendations.models import GeocodeCacheEntry
+
+DELHI = {'lat': 28.61, 'lng': 77.21, 'country_code': 'IN', 'provider': 'google'}
+
+
+class GeocodeCacheTests(TestCase):
+    def test_normalize_place(self):
+        self.assertEqual(normalize_place('  New   Delhi ,DL. '), 'new delhi, dl')
+        self.assertEqual(normalize_place(None), '')
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = GeocodeCache(max_entries=2)
+        cache.set('Delhi', DELHI)
+        cache.set('Agra', dict(DELHI, lat=27.18))
+        cache.get('Delhi')
+        cache.set('Pune', dict(DELHI, lat=18.52))
+        self.assertEqual(list(cache._lru), ['delhi', 'pune'])
+
+    def test_evicted_entries_come_back_from_the_table(self):
+        cache = GeocodeCache(max_entries=1)
+        cache.set('Delhi', DELHI)
+        cache.set('Agra', dict(DELHI, lat=27.18))
+        with self.assertNumQueries(1):
+            self.assertEqual(cache.get('delhi'), DELHI)
+        # ...and are promoted back into the LRU
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.get('Delhi'), DELHI)
+
+    def test_lru_entries_expire(self):
+        cache = GeocodeCache(ttl_seconds=60)
+        with mock.patch('recommendations.geocoding.monotonic', return_value=1000.0):
+            cache.set('Delhi', DELHI)
+        with mock.patch('recommendations.geocoding.monotonic', return_value=1059.0), self.assertNumQueries(0):
+            self.assertEqual(cache.get('Delhi'), DELHI)
+        # Expired in memory: dropped there and looked up in the table again
+        with mock.patch('recommendations.geocoding.monotonic', return_value=1061.0), self.assertNumQueries(1):
+            self.assertEqual(cache.get('Delhi'), DELHI)
+
+    def test_expired_rows_are_misses_and_pruned(self):
+        cache = GeocodeCache()
+        cache.set('Delhi', DELHI)
+        GeocodeCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        cache.clear()
+        self.assertIsNone(cache.get('Delhi'))
+        cache.prune()
+        self.assertFalse(GeocodeCacheEntry.objects.exists())
+
+    def test_prune_trims_the_table_oldest_first(self):
+        cache = GeocodeCache(db_max_entries=2, prune_every=3)
+        for i, place in enumerate(['Delhi', 'Agra', 'Pune']):
+            cache.set(place, DELHI, ttl_seconds=100 + i)
+        self.assertEqual(set(GeocodeCacheEntry.objects.values_list('key', flat=True)), {'agra', 'pune'})
+
+    def test_results_are_copies(self):
+        cache = GeocodeCache()
+        cache.set('Delhi', DELHI)
+        cache.get('Delhi')['lat'] = 0
+        self.assertEqual(cache.get('Delhi')['lat'], 28.61)
+        cache.clear()
+        cache.get('Delhi')['lat'] = 0
+        self.assertEqual(cache.get('Delhi')['lat'], 28.61)
+
+    def test_misses_and_empty_values(self):
+        cache = GeocodeCache()
+        self.assertIsNone(cache.get('Nowhere'))
+        self.assertIsNone(cache.get('  '))
+        cache.set('Nowhere', None)
+        self.assertFalse(GeocodeCacheEntry.objects.exists())
@@ -0,0 +1,209 @@
+import threading
+import time
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+
+from recommendations.governor import (
+    CLOSED, HALF_OPEN, OPEN, BackendUnavailable, CircuitBreaker, Governor, TokenBucket, hedged, is_backend_failure,
+    _geopy_exc as geopy_exc, _gmaps_exc as gmaps_exc,
+)
+from recommendations.instrumentation import registry
+
+
+class FakeClock:
+    """Stands in for the governor's `time` module; sleep() advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class ClockTestCase(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+        self.clock = FakeClock()
+        patcher = mock.patch('recommendations.governor.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TokenBucketTests(ClockTestCase):
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=2, burst=3)
+        self.assertEqual([bucket.acquire() for _ in range(4)], [True, True, True, False])
+        self.clock.now += 0.5
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire())
+        # Never refills beyond the burst
+        self.clock.now += 60
+        self.assertEqual([bucket.acquire() for _ in range(4)], [True, True, True, False])
+
+    def test_waits_up_to_max_wait(self):
+        bucket = TokenBucket(rate=1)
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire(max_wait=0.5))
+        self.assertEqual(self.clock.slept, [])
+        self.assertTrue(bucket.acquire(max_wait=1.0))
+        self.assertEqual(self.clock.slept, [1.0])
+
+
+class CircuitBreakerTests(ClockTestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker('google', failure_threshold=3, reset_timeout=30)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertTrue(breaker.is_open())
+        self.assertFalse(breaker.allow())
+        self.assertEqual(registry.value('greentravel_circuit_transitions_total', backend='google', state=OPEN), 1)
+
+    def test_one_probe_after_the_cool_down(self):
+        breaker = CircuitBreaker('osm', failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        self.clock.now += 30
+        self.assertFalse(breaker.is_open())
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        # A failed probe re-opens for another full cool-down
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.clock.now += 29
+        self.assertFalse(breaker.allow())
+        self.clock.now += 1
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_released_probe_can_be_retaken(self):
+        breaker = CircuitBreaker('osm', failure_threshold=1, reset_timeout=1)
+        breaker.record_failure()
+        self.clock.now += 1
+        self.assertTrue(breaker.allow())
+        breaker.release_probe()
+        self.assertTrue(breaker.allow())
+
+
+class FailureClassificationTests(SimpleTestCase):
+    def test_builtin_errors(self):
+        for exc in (TimeoutError(), ConnectionRefusedError(), OSError('network down')):
+            self.assertTrue(is_backend_failure(exc), repr(exc))
+        for exc in (ValueError('bad input'), KeyError('distance')):
+            self.assertFalse(is_backend_failure(exc), repr(exc))
+
+    @skipUnless(gmaps_exc is not None, 'googlemaps is not installed')
+    def test_googlemaps_errors(self):
+        for exc in (
+            gmaps_exc.Timeout(), gmaps_exc.TransportError('reset'), gmaps_exc.HTTPError(503),
+            gmaps_exc.HTTPError(429), gmaps_exc.ApiError('OVER_QUERY_LIMIT'),
+        ):
+            self.assertTrue(is_backend_failure(exc), repr(exc))
+        for exc in (gmaps_exc.HTTPError(400), gmaps_exc.ApiError('INVALID_REQUEST'), gmaps_exc.ApiError('NOT_FOUND')):
+            self.assertFalse(is_backend_failure(exc), repr(exc))
+
+    @skipUnless(geopy_exc is not None, 'geopy is not installed')
+    def test_geopy_errors(self):
+        for exc in (
+            geopy_exc.GeocoderTimedOut(), geopy_exc.GeocoderUnavailable(), geopy_exc.GeocoderRateLimited('slow down'),
+            geopy_exc.GeocoderServiceError('502'),
+        ):
+            self.assertTrue(is_backend_failure(exc), repr(exc))
+        for exc in (geopy_exc.GeocoderQueryError('bad query'), geopy_exc.GeocoderAuthenticationFailure('key')):
+            self.assertFalse(is_backend_failure(exc), repr(exc))
+
+
+@override_settings(OUTBOUND_FAILURE_THRESHOLD=2, OUTBOUND_RESET_TIMEOUT=30.0, OUTBOUND_RATE_LIMITS={'osm': (1, 1)})
+class GovernorTests(ClockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.governor = Governor()
+
+    def test_backend_faults_open_the_circuit(self):
+        def down():
+            raise TimeoutError()
+
+        for _ in range(2):
+            with self.assertRaises(TimeoutError):
+                self.governor.call('google', down)
+        self.assertFalse(self.governor.available('google'))
+        calls = mock.Mock()
+        with self.assertRaises(BackendUnavailable) as raised:
+            self.governor.call('google', calls)
+        self.assertEqual(raised.exception.reason, 'circuit open')
+        calls.assert_not_called()
+        self.assertEqual(registry.value('greentravel_outbound_rejected_total', backend='google', reason='circuit_open'), 1)
+
+    def test_bad_queries_do_not_count(self):
+        def reject():
+            raise ValueError('no such place')
+
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.governor.call('google', reject)
+        self.assertEqual(self.governor.call('google', lambda: 'ok'), 'ok')
+        self.assertTrue(self.governor.available('google'))
+
+    def test_rate_limited_calls_are_refused_without_penalty(self):
+        self.assertEqual(self.governor.call('osm', lambda x: x * 2, 21), 42)
+        with self.assertRaises(BackendUnavailable) as raised:
+            self.governor.call('osm', lambda: None, max_wait=0.1)
+        self.assertEqual(raised.exception.reason, 'rate limited')
+        self.assertEqual(self.governor.breaker('osm').state, CLOSED)
+        # Within max_wait the call waits for the next token instead
+        self.assertEqual(self.governor.call('osm', lambda: 'later', max_wait=1.0), 'later')
+        self.assertEqual(self.clock.slept, [1.0])
+        # Backends without a configured limit are not throttled
+        self.assertIsNone(self.governor.bucket('google'))
+
+
+class HedgedTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_fast_primary_wins_without_a_hedge(self):
+        hedge = mock.Mock(return_value='hedge')
+        self.assertEqual(hedged([lambda: 'primary', hedge], delay=1.0), 'primary')
+        hedge.assert_not_called()
+        self.assertEqual(registry.value('greentravel_hedged_total', winner='primary'), 1)
+
+    def test_slow_primary_is_hedged(self):
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return 'primary'
+
+        started = time.monotonic()
+        self.assertEqual(hedged([slow, lambda: 'hedge'], delay=0.05), 'hedge')
+        release.set()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(registry.value('greentravel_hedged_total', winner='hedge'), 1)
+
+    def test_empty_or_failing_primary_hedges_immediately(self):
+        def broken():
+            raise ConnectionError()
+
+        started = time.monotonic()
+        self.assertEqual(hedged([broken, lambda: 'hedge'], delay=5), 'hedge')
+        self.assertEqual(hedged([lambda: None, lambda: 'hedge'], delay=5), 'hedge')
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_unacceptable_results_fall_back_in_preference_order(self):
+        accept = lambda result: result is not None and not result.get('mock')  # noqa: E731
+        result = hedged([lambda: {'mock': True, 'from': 'primary'}, lambda: {'mock': True, 'from': 'hedge'}], 0.01, accept)
+        self.assertEqual(result, {'mock': True, 'from': 'primary'})
+        self.assertIsNone(hedged([lambda: None, lambda: None], 0.01))
@@ -0,0 +1,94 @@
+import csv
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from recommendations.importer import TripImporter, import_trips
+from recommendations.models import TravelRecord, TravelSummary
+
+
+class ImporterRowErrorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('importer', password='x')
+
+    def build(self, rows):
+        return TripImporter().build(rows)
+
+    def test_invalid_rows_are_reported_not_imported(self):
+        rows = [
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230'},
+            {'source': '', 'destination': 'Agra'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': 'far'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': 'nan'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': 'inf'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '-5'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230', 'passenger_count': 'two'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230', 'created_at': 'yesterday'},
+            {'source': 'Atlantis', 'destination': 'Lemuria'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230', 'user': 'nobody'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230', 'user': '999999'},
+        ]
+        records, errors = self.build(rows)
+        self.assertEqual(len(records), 1)
+        self.assertEqual([i for i, _ in errors], list(range(1, len(rows))))
+        messages = dict(errors)
+        self.assertIn('required', messages[1])
+        for i in (3, 4, 5):
+            self.assertEqual(messages[i], 'distance_km must be a positive number')
+        self.assertIn('unknown route', messages[8])
+        self.assertEqual(messages[9], 'unknown user nobody')
+        self.assertEqual(messages[10], 'unknown user 999999')
+
+    def test_users_resolve_by_username_and_id(self):
+        rows = [
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230', 'user': 'importer'},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230', 'user': str(self.user.pk)},
+            {'source': 'Delhi', 'destination': 'Agra', 'distance_km': '230'},
+        ]
+        records, errors = self.build(rows)
+        self.assertEqual(errors, [])
+        self.assertEqual([r.user_id for r in records], [self.user.pk, self.user.pk, None])
+
+    def test_import_skips_bad_rows_and_keeps_the_rest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'trips.csv'
+            with open(path, 'w', newline='', encoding='utf-8') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['source', 'destination', 'distance_km', 'user'])
+                writer.writerow(['Delhi', 'Agra', '230', 'importer'])
+                writer.writerow(['Delhi', 'Agra', 'nan', 'importer'])
+                writer.writerow(['Delhi', 'Agra', '230', 'ghost'])
+                writer.writerow(['Mumbai', 'Pune', '150', 'importer'])
+            stats = import_trips(path, chunk_size=2)
+
+        self.assertEqual((stats['rows'], stats['imported'], stats['skipped']), (4, 2, 2))
+        self.assertEqual(stats['errors'], [
+            'row 2: distance_km must be a positive number',
+            'row 3: unknown user ghost',
+        ])
+        self.assertEqual(TravelRecord.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(TravelSummary.objects.get(user=self.user).trip_count, 2)
+
+    def test_malformed_jsonl_lines_are_row_errors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'trips.jsonl'
+            path.write_text('\n'.join([
+                '{"source": "Delhi", "destination": "Agra", "distance_km": 230, "user": "importer"}',
+                '{"source": "Delhi", "destination": ',
+                '["Delhi", "Agra"]',
+                '',
+                '42',
+                '{"source": "Mumbai", "destination": "Pune", "distance_km": 150, "user": "importer"}',
+            ]), encoding='utf-8')
+            stats = import_trips(path, chunk_size=2)
+
+        self.assertEqual((stats['rows'], stats['imported'], stats['skipped']), (5, 2, 3))
+        self.assertEqual(stats['errors'], [
+            'row 2: invalid JSON',
+            'row 3: expected an object',
+            'row 4: expected an object',
+        ])
+        self.assertEqual(TravelRecord.objects.filter(user=self.user).count(), 2)
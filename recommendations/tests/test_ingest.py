@@ -0,0 +1,82 @@
+import time
+
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+
+from recommendations.ingest import RecordWriter
+from recommendations.models import TravelRecord, TravelSummary
+
+
+def record(user=None, **fields):
+    values = {
+        'user': user, 'source': 'Delhi', 'destination': 'Agra', 'distance_km': 230.0,
+        'recommended_transport': 'train', 'co2_estimated_kg': 9.43, 'co2_saved_kg': 49.22,
+    }
+    values.update(fields)
+    return TravelRecord(**values)
+
+
+# The writer thread uses its own connection, so rows must really be committed
+class RecordWriterTests(TransactionTestCase):
+    # Outside a transaction the production profile routes reads to 'readonly'
+    databases = '__all__'
+
+    def setUp(self):
+        self.user = User.objects.create_user('writer', password='x')
+
+    def writer(self, **options):
+        writer = RecordWriter(**options)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_flush_writes_everything_queued(self):
+        writer = self.writer(batch_size=3, flush_interval=10)
+        for _ in range(7):
+            writer.submit(record(self.user))
+        started = time.monotonic()
+        writer.flush()
+        # The last partial batch is written now, not after flush_interval
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(TravelRecord.objects.count(), 7)
+        self.assertEqual(TravelSummary.objects.get(user=self.user).trip_count, 7)
+
+    def test_batches_flush_on_their_own_after_the_interval(self):
+        writer = self.writer(batch_size=100, flush_interval=0.05)
+        writer.submit(record(self.user))
+        deadline = time.monotonic() + 5
+        while not TravelRecord.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(TravelRecord.objects.count(), 1)
+
+    def test_flush_user_writes_that_users_records(self):
+        writer = self.writer(batch_size=100, flush_interval=60)
+        writer.submit(record(self.user))
+        writer.submit(record(None))
+        started = time.monotonic()
+        self.assertTrue(writer.flush_user(self.user.pk, timeout=5))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(TravelRecord.objects.filter(user=self.user).exists())
+        # Nothing pending for a user is an immediate True
+        self.assertTrue(writer.flush_user(12345, timeout=0))
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        writer = self.writer(batch_size=4, flush_interval=10)
+        with self.assertLogs('recommendations.ingest', level='ERROR') as logs:
+            writer.submit(record(self.user, source='A'))
+            writer.submit(record(self.user, source='B', distance_km=None))
+            writer.submit(record(self.user, source='C'))
+            writer.submit(record(None, source='D'))
+            writer.flush()
+        self.assertEqual(sorted(TravelRecord.objects.values_list('source', flat=True)), ['A', 'C', 'D'])
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('B -> Agra', logs.output[0])
+        self.assertEqual(TravelSummary.objects.get(user=self.user).trip_count, 2)
+        self.assertTrue(writer.flush_user(self.user.pk, timeout=1))
+
+    def test_close_drains_the_queue(self):
+        writer = RecordWriter(batch_size=100, flush_interval=60)
+        for _ in range(3):
+            writer.submit(record(self.user))
+        writer.close()
+        self.assertEqual(TravelRecord.objects.count(), 3)
+        self.assertFalse(writer._thread.is_alive())
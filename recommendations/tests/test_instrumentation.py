@@ -0,0 +1,106 @@
+import asyncio
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from recommendations.instrumentation import Histogram, RequestTimingMiddleware, registry, stage
+
+
+def count_line(name, **labels):
+    """The `<name>_count{...}` sample line for these labels in the exposition"""
+    rendered = ','.join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    for line in registry.render().splitlines():
+        if line.startswith(f'{name}_count{{{rendered}}} '):
+            return int(line.rsplit(' ', 1)[1])
+    return 0
+
+
+class RegistryTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_histogram_buckets_are_upper_bounds(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual((histogram.count, histogram.sum), (4, 3.65))
+
+    def test_render_is_cumulative_and_escapes_labels(self):
+        registry.observe('demo_seconds', 0.002, view='a"b\\c\nd')
+        registry.observe('demo_seconds', 20.0, view='a"b\\c\nd')
+        registry.inc('demo_total', 3, kind='x')
+        text = registry.render()
+        self.assertIn('# TYPE demo_seconds histogram', text)
+        self.assertIn('demo_seconds_bucket{view="a\\"b\\\\c\\nd",le="0.005"} 1', text)
+        self.assertIn('demo_seconds_bucket{view="a\\"b\\\\c\\nd",le="+Inf"} 2', text)
+        self.assertIn('demo_seconds_count{view="a\\"b\\\\c\\nd"} 2', text)
+        self.assertIn('# TYPE demo_total counter\ndemo_total{kind="x"} 3', text)
+
+    def test_stage_counts_errors(self):
+        with self.assertRaises(KeyError):
+            with stage('geocode', backend='osm'):
+                raise KeyError('boom')
+        self.assertEqual(registry.value('greentravel_stage_errors_total', stage='geocode', backend='osm'), 1)
+        self.assertEqual(count_line('greentravel_stage_seconds', backend='osm', stage='geocode'), 1)
+
+
+class MiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+        self.factory = RequestFactory()
+
+    @staticmethod
+    def view(request):
+        with stage('route') as current:
+            current.labels['backend'] = 'google'
+        return HttpResponse('ok')
+
+    def test_server_timing_and_request_histogram(self):
+        request = self.factory.get('/x/')
+        with self.assertLogs('greentravel.requests') as logs:
+            response = RequestTimingMiddleware(self.view)(request)
+        self.assertRegex(response['Server-Timing'], r'^route;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertEqual(count_line('greentravel_request_seconds', method='GET', status='200', view='unmatched'), 1)
+        self.assertEqual(count_line('greentravel_stage_seconds', backend='google', stage='route'), 1)
+        self.assertEqual(logs.records[0].data['path'], '/x/')
+
+    def test_async_views(self):
+        async def view(request):
+            return self.view(request)
+
+        middleware = RequestTimingMiddleware(view)
+        response = asyncio.run(middleware(self.factory.get('/x/')))
+        self.assertIn('route;dur=', response['Server-Timing'])
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('BREW', 'PROPFIND', 'MKCOL'):
+            with self.assertLogs('greentravel.requests'):
+                status = self.client.generic(method, '/about/').status_code
+        self.assertEqual(
+            count_line('greentravel_request_seconds', method='other', status=str(status), view='recommendations:about'), 3,
+        )
+        text = registry.render()
+        self.assertNotIn('BREW', text)
+        self.assertNotIn('PROPFIND', text)
+        self.assertIn('method="other"', text)
+
+
+class MetricsViewTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_local_scrape(self):
+        self.client.get('/about/')
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('greentravel_request_seconds_count{method="GET",status="200",view="recommendations:about"} 1', response.content.decode())
+
+    def test_other_addresses_are_refused(self):
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='203.0.113.9').status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=('203.0.113.9',)):
+            self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='203.0.113.9').status_code, 200)
+            self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        with override_settings(METRICS_ALLOWED_IPS=None):
+            self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='203.0.113.9').status_code, 200)
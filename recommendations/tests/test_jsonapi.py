@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from recommendations import apiauth
+from recommendations.apiauth import SharedRateLimiter
+from recommendations.jsonapi import dumps
+
+from .utils import LOCAL_CACHES
+
+URL = '/api/recommend/'
+ROUTE = ({'distance_km': 233.4, 'durations': {}}, None, None)
+
+
+class DumpsTests(SimpleTestCase):
+    def test_compact_and_django_types(self):
+        data = {'km': Decimal('1.50'), 'at': datetime(2026, 3, 1, 9, 30, tzinfo=dt_timezone.utc), 'place': 'Mysuru'}
+        self.assertEqual(json.loads(dumps(data)), {'km': '1.50', 'at': '2026-03-01T09:30:00Z', 'place': 'Mysuru'})
+        self.assertNotIn(b' ', dumps({'a': [1, 2]}))
+        with mock.patch('recommendations.jsonapi._orjson', None):
+            self.assertEqual(json.loads(dumps(data)), {'km': '1.50', 'at': '2026-03-01T09:30:00Z', 'place': 'Mysuru'})
+
+
+@override_settings(
+    CACHES=LOCAL_CACHES,
+    API_KEYS={'partner-key': 'partner', 'other-key': 'other'},
+    API_RATE_LIMITS={'key': (100.0, 100), 'anonymous': (100.0, 100)},
+    RECOMMEND_API_MAX_AGE=300,
+)
+class RecommendApiTests(SimpleTestCase):
+    def setUp(self):
+        apiauth.rate_limiter.reset()
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(URL, {'distance_km': 230, 'passengers': 2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['distance_km'], body['passengers'], body['estimated']), (230.0, 2, False))
+        self.assertEqual(response['Cache-Control'], 'max-age=300, public')
+        self.assertIn('Authorization', response['Vary'])
+
+        again = self.client.get(URL, {'distance_km': 230, 'passengers': 2}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        other = self.client.get(URL, {'distance_km': 231, 'passengers': 2}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other.status_code, 200)
+        # POSTs and errors carry no validators
+        self.assertNotIn('ETag', self.client.post(URL, {'distance_km': 230}))
+        self.assertNotIn('ETag', self.client.get(URL, {'distance_km': -1}))
+
+    def test_keyed_responses_are_private(self):
+        for headers in ({'HTTP_X_API_KEY': 'partner-key'}, {'HTTP_AUTHORIZATION': 'Bearer partner-key'}):
+            response = self.client.get(URL, {'distance_km': 230}, **headers)
+            self.assertEqual(response['Cache-Control'], 'max-age=300, private')
+        # An unknown key is just an anonymous caller
+        self.assertIn('public', self.client.get(URL, {'distance_km': 230}, HTTP_X_API_KEY='guess')['Cache-Control'])
+
+    def test_place_lookups_need_a_key(self):
+        response = self.client.get(URL, {'source': 'Delhi', 'destination': 'Agra'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        self.assertEqual(self.client.get(URL, {'source': 'Delhi', 'destination': 'Agra'},
+                                         HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+        with mock.patch('recommendations.views.resolve_route', return_value=ROUTE) as resolve:
+            response = self.client.get(URL, {'source': 'Delhi', 'destination': 'Agra'},
+                                       HTTP_AUTHORIZATION='Bearer partner-key')
+        resolve.assert_called_once_with('Delhi', 'Agra')
+        self.assertEqual(response.json()['distance_km'], 233.4)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_json_body(self):
+        response = self.client.post(URL, {'distance_km': 120, 'passengers': 3}, content_type='application/json')
+        self.assertEqual(response.json()['passengers'], 3)
+        self.assertEqual(self.client.post(URL, '[1, 2]', content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(URL, '{bad', content_type='application/json').status_code, 400)
+
+    @override_settings(API_RATE_LIMITS={'key': (1.0, 3), 'anonymous': (0.5, 2)})
+    def test_rate_limits_per_client(self):
+        statuses = [self.client.get(URL, {'distance_km': 230}).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        limited = self.client.get(URL, {'distance_km': 230})
+        self.assertEqual(limited['Retry-After'], '2')
+        # Other addresses and keyed clients have their own budgets
+        self.assertEqual(self.client.get(URL, {'distance_km': 230}, REMOTE_ADDR='10.0.0.2').status_code, 200)
+        keyed = [self.client.get(URL, {'distance_km': 230}, HTTP_X_API_KEY='partner-key').status_code for _ in range(4)]
+        self.assertEqual(keyed, [200, 200, 200, 429])
+        self.assertEqual(self.client.get(URL, {'distance_km': 230}, HTTP_X_API_KEY='other-key').status_code, 200)
+
+    @override_settings(API_RATE_LIMITS={'key': (1.0, 3), 'anonymous': (0.5, 2)}, API_RATE_LIMIT_CACHE_ALIAS='default')
+    def test_shared_cache_limit(self):
+        caches['default'].clear()
+        statuses = [self.client.get(URL, {'distance_km': 230}).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        # The per-process buckets were not used
+        self.assertEqual(len(apiauth.rate_limiter._buckets), 0)
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class SharedRateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_workers_share_one_budget(self):
+        workers = [SharedRateLimiter('default'), SharedRateLimiter('default')]
+        with mock.patch('recommendations.apiauth.time.time', return_value=1000.0):
+            allowed = [workers[i % 2].allow('ip:10.0.0.1', 2.0, 4) for i in range(6)]
+            self.assertEqual(allowed, [True] * 4 + [False] * 2)
+            self.assertTrue(workers[0].allow('ip:10.0.0.2', 2.0, 4))
+        # The window is burst / rate seconds long
+        with mock.patch('recommendations.apiauth.time.time', return_value=1002.0):
+            self.assertTrue(workers[1].allow('ip:10.0.0.1', 2.0, 4))
+
+    def test_cache_errors_let_requests_through(self):
+        limiter = SharedRateLimiter('default')
+        with mock.patch.object(caches['default'], 'incr', side_effect=ConnectionError):
+            self.assertTrue(limiter.allow('ip:10.0.0.1', 1.0, 1))
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recommendations.models import TravelRecord
+from recommendations.pagination import decode_cursor, keyset_page
+
+
+def make_record(created_at):
+    return TravelRecord.objects.create(
+        source='Pune', destination='Mumbai', distance_km=150.0, recommended_transport='train',
+        co2_estimated_kg=6.15, created_at=created_at,
+    )
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.start = timezone.now().replace(microsecond=0)
+        # Groups of records share a timestamp, so pages have to break ties on id
+        for i in range(23):
+            make_record(cls.start - timedelta(minutes=i // 4))
+
+    def walk(self, queryset, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = keyset_page(queryset, cursor, page_size)
+            ids.extend(row['id'] if isinstance(row, dict) else row.pk for row in rows)
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(TravelRecord.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        for page_size in (1, 4, 5, 22, 23, 50):
+            with self.subTest(page_size=page_size):
+                ids, pages = self.walk(TravelRecord.objects.all(), page_size)
+                self.assertEqual(ids, expected)
+                self.assertEqual(pages, max(1, -(-len(expected) // page_size)))
+
+    def test_values_rows(self):
+        ids, _ = self.walk(TravelRecord.objects.values('id', 'created_at'), 7)
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 23)
+
+    def test_rows_added_while_paging_do_not_shift_later_pages(self):
+        rows, cursor = keyset_page(TravelRecord.objects.all(), None, 10)
+        seen = [row.pk for row in rows]
+        make_record(self.start + timedelta(minutes=5))
+        while cursor:
+            rows, cursor = keyset_page(TravelRecord.objects.all(), cursor, 10)
+            seen.extend(row.pk for row in rows)
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), 23)
+
+    def test_cursor_round_trip_and_malformed_cursor(self):
+        _, cursor = keyset_page(TravelRecord.objects.all(), None, 3)
+        created_at, pk = decode_cursor(cursor)
+        self.assertEqual(created_at, self.start)
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from recommendations.ai_logic import GreenTravelAI
+from recommendations.models import JobCheckpoint, TravelRecord
+from recommendations.rescore import rescore_records, stale_records
+from recommendations.summaries import rebuild_summaries
+
+from .utils import summary_snapshot
+
+FACTOR_SETS = {'test-v2': {'emission_factors': {'train': 0.02, 'bus': 0.2, 'car': 0.15}}}
+
+
+class Interrupted(Exception):
+    pass
+
+
+@override_settings(GREEN_TRAVEL_FACTOR_SETS=FACTOR_SETS)
+class RescoreResumeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = [User.objects.create_user(f'rider{i}', password='x') for i in range(3)]
+        transports = ['train', 'bus', 'car', 'flight']
+        for i in range(25):
+            km = 50.0 + 37 * i
+            emission = GreenTravelAI.TRANSPORTS[transports[i % 4]].calculate_emission(km)
+            TravelRecord.objects.create(
+                user=users[i % 3] if i % 5 else None,
+                source='Delhi', destination='Agra', distance_km=km,
+                recommended_transport=transports[i % 4],
+                co2_estimated_kg=emission, co2_saved_kg=round(0.255 * km - emission, 2),
+                factor_version='v1',
+            )
+
+    def tearDown(self):
+        GreenTravelAI._version_engines.pop('test-v2', None)
+
+    def test_resume_after_interrupted_batch(self):
+        def stop_after_first_batch(stats, position):
+            raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            rescore_records('test-v2', batch_size=10, pause=0, progress=stop_after_first_batch)
+        checkpoint = JobCheckpoint.objects.get(name='rescore:test-v2')
+        first_batch = list(TravelRecord.objects.order_by('id').values_list('id', flat=True)[:10])
+        self.assertEqual(checkpoint.position, first_batch[-1])
+        self.assertEqual(stale_records('test-v2').count(), 15)
+
+        stats = rescore_records('test-v2', batch_size=10, pause=0)
+        self.assertEqual(stats['resumed_from'], first_batch[-1])
+        self.assertEqual(stats['scanned'], 15)
+        self.assertFalse(stale_records('test-v2').exists())
+
+        train = TravelRecord.objects.filter(recommended_transport='train').first()
+        self.assertAlmostEqual(train.co2_estimated_kg, round(0.02 * train.distance_km, 2), places=2)
+
+        incremental = summary_snapshot()
+        rebuild_summaries()
+        self.assertEqual(incremental, summary_snapshot())
+
+    def test_rerun_is_a_no_op(self):
+        rescore_records('test-v2', batch_size=10, pause=0)
+        before = summary_snapshot()
+        stats = rescore_records('test-v2', batch_size=10, pause=0)
+        self.assertEqual(stats['scanned'], 0)
+        self.assertEqual(before, summary_snapshot())
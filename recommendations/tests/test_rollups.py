@@ -0,0 +1,107 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recommendations.ingest import write_records
+from recommendations.models import DailyModeRollup, DailyRouteRollup, TravelRecord
+from recommendations.rollups import (
+    local_day, mode_totals, recompute_rollups, rollup_days_behind, rollup_watermark, top_routes, update_rollups,
+)
+
+from .utils import rollup_snapshot
+
+START = datetime(2026, 3, 1, 9, 0, tzinfo=dt_timezone.utc)
+
+
+def record(created_at, **fields):
+    values = {
+        'source': 'Delhi', 'destination': 'Agra', 'distance_km': 230.0, 'passenger_count': 1,
+        'recommended_transport': 'train', 'co2_estimated_kg': 9.43, 'co2_saved_kg': 49.22,
+        'created_at': created_at,
+    }
+    values.update(fields)
+    return TravelRecord(**values)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        for i in range(12):
+            record(START + timedelta(hours=7 * i), passenger_count=1 + i % 3,
+                   recommended_transport=('train', 'bus', 'ev')[i % 3],
+                   source=(' Delhi', 'delhi', 'Pune')[i % 3]).save()
+        self.now = START + timedelta(days=10)
+
+    def assertMatchesRecompute(self):
+        incremental = rollup_snapshot()
+        recompute_rollups(date(2026, 2, 25), date(2026, 3, 20))
+        self.assertEqual(incremental, rollup_snapshot())
+
+    def test_incremental_update_and_watermark(self):
+        # Records at 0, 7, 14, 21 and 28 hours are older than the two-minute lag
+        self.assertEqual(update_rollups(now=START + timedelta(hours=30)), 5)
+        self.assertEqual(update_rollups(now=START + timedelta(hours=30)), 0)
+        self.assertEqual(update_rollups(now=self.now), 7)
+        self.assertEqual(rollup_watermark(), self.now - timedelta(seconds=120))
+        self.assertEqual(sum(DailyModeRollup.objects.values_list('trip_count', flat=True)), 12)
+        self.assertMatchesRecompute()
+
+    def test_routes_group_case_and_whitespace_insensitively(self):
+        update_rollups(now=self.now)
+        routes = list(top_routes(date(2026, 3, 1), date(2026, 3, 31)))
+        self.assertEqual([(r['source'], r['trips']) for r in routes], [('delhi', 8), ('pune', 4)])
+        self.assertEqual({r['recommended_transport']: r['trips'] for r in mode_totals(date(2026, 3, 1), date(2026, 3, 31))},
+                         {'train': 4, 'bus': 4, 'ev': 4})
+
+    def test_edits_and_deletes_behind_the_watermark(self):
+        update_rollups(now=self.now)
+        first = TravelRecord.objects.order_by('created_at').first()
+        first.recommended_transport = 'car'
+        first.created_at = START + timedelta(days=2)
+        first.source = 'Mumbai'
+        first.save()
+        self.assertMatchesRecompute()
+
+        TravelRecord.objects.order_by('created_at')[3].delete()
+        self.assertMatchesRecompute()
+        self.assertEqual(sum(DailyModeRollup.objects.values_list('trip_count', flat=True)), 11)
+
+        # Saves that don't touch rollup fields leave them alone
+        second = TravelRecord.objects.order_by('created_at')[1]
+        second.factor_version = 'v1'
+        with self.assertNumQueries(1):
+            second.save(update_fields=['factor_version'])
+
+    def test_edit_moving_a_record_past_the_watermark(self):
+        update_rollups(now=START + timedelta(days=2))
+        early = TravelRecord.objects.order_by('created_at').first()
+        early.created_at = START + timedelta(days=5)
+        early.save()
+        update_rollups(now=self.now)
+        self.assertMatchesRecompute()
+
+    def test_backdated_inserts_are_folded_in(self):
+        update_rollups(now=self.now)
+        record(START + timedelta(hours=1), recommended_transport='bike').save()
+        write_records([record(START + timedelta(hours=2), source='Goa'), record(self.now, source='Goa')])
+        self.assertEqual(DailyModeRollup.objects.get(day=date(2026, 3, 1), recommended_transport='bike').trip_count, 1)
+        self.assertEqual(DailyRouteRollup.objects.get(day=date(2026, 3, 1), source='goa').trip_count, 1)
+        # The record past the watermark is still left to the incremental update
+        self.assertEqual(update_rollups(now=self.now + timedelta(hours=1)), 1)
+        self.assertMatchesRecompute()
+
+    def test_before_the_first_run_nothing_is_applied_twice(self):
+        record(START, recommended_transport='bike').save()
+        self.assertFalse(DailyModeRollup.objects.exists())
+        update_rollups(now=self.now)
+        self.assertMatchesRecompute()
+
+    def test_days_follow_the_current_time_zone(self):
+        late = datetime(2026, 3, 1, 20, 0, tzinfo=dt_timezone.utc)
+        with timezone.override('Asia/Kolkata'):
+            self.assertEqual(local_day(late), date(2026, 3, 2))
+            record(late, recommended_transport='bike').save()
+            update_rollups(now=self.now)
+            self.assertEqual(DailyModeRollup.objects.get(recommended_transport='bike').day, date(2026, 3, 2))
+            self.assertEqual(rollup_days_behind([local_day(late), local_day(late)]), (date(2026, 3, 2), date(2026, 3, 2)))
+        self.assertIsNone(rollup_days_behind([date(2026, 3, 12), date(2026, 3, 12)]))
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recommendations.instrumentation import registry
+from recommendations.routecache import RouteCache, route_cache
+from recommendations.views import get_distance_from_api
+
+from .utils import LOCAL_CACHES
+
+ROUTE = {'distance_km': 230.0, 'durations': {'driving': 12000}}
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class RouteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = RouteCache(alias='routes', symmetric_backends=('osm',))
+        self.cache.cache.clear()
+
+    def test_keys_are_normalized(self):
+        self.assertEqual(self.cache.make_key('New  Delhi', 'AGRA', 'google'), self.cache.make_key('new delhi', 'agra ', 'google'))
+
+    def test_symmetric_backends_share_one_key_per_pair(self):
+        self.assertEqual(self.cache.make_key('Delhi', 'Agra', 'osm'), self.cache.make_key('Agra', 'Delhi', 'osm'))
+        self.cache.set('Delhi', 'Agra', 'osm', ROUTE)
+        self.assertEqual(self.cache.get('Agra', 'Delhi', 'osm'), ROUTE)
+
+    def test_other_backends_are_directional(self):
+        self.assertNotEqual(self.cache.make_key('Delhi', 'Agra', 'google'), self.cache.make_key('Agra', 'Delhi', 'google'))
+        self.assertNotEqual(self.cache.make_key('Delhi', 'Agra', 'google'), self.cache.make_key('Delhi', 'Agra', 'osm'))
+        self.cache.set('Delhi', 'Agra', 'google', ROUTE)
+        self.assertIsNone(self.cache.get('Agra', 'Delhi', 'google'))
+
+    def test_get_many_and_counters(self):
+        self.cache.set('Delhi', 'Agra', 'google', ROUTE)
+        before = self.cache.stats()
+        found = self.cache.get_many([('Delhi', 'Agra'), ('Pune', 'Goa')], 'google')
+        self.assertEqual(found, {('Delhi', 'Agra'): ROUTE})
+        self.cache.get('Pune', 'Goa', 'google')
+        self.cache.get('Pune', 'Goa', 'google', count=False)
+        after = self.cache.stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 2)
+
+    def test_none_is_not_stored(self):
+        self.cache.set('Delhi', 'Agra', 'google', None)
+        self.assertIsNone(self.cache.get('Delhi', 'Agra', 'google'))
+
+
+@override_settings(CACHES=LOCAL_CACHES, OFFLINE_ROUTING=False, GOOGLE_MAPS_API_KEY='AIza-test-key')
+class RouteLookupCachingTests(SimpleTestCase):
+    def setUp(self):
+        route_cache.cache.clear()
+
+    def lookup(self, info):
+        with mock.patch('recommendations.views._fetch_distance', return_value=info) as fetch:
+            first = get_distance_from_api('Delhi', 'Agra')
+            get_distance_from_api('Delhi', 'Agra')
+        return first, fetch.call_count
+
+    def test_complete_routes_are_cached(self):
+        result, calls = self.lookup(ROUTE)
+        self.assertEqual(result, ROUTE)
+        self.assertEqual(calls, 1)
+        self.assertEqual(route_cache.get('Delhi', 'Agra', 'google', count=False), ROUTE)
+
+    def test_partial_routes_are_not_cached(self):
+        partial = dict(ROUTE, partial=True, missing_modes=['transit'])
+        result, calls = self.lookup(partial)
+        self.assertTrue(result['partial'])
+        self.assertEqual(calls, 2)
+        self.assertIsNone(route_cache.get('Delhi', 'Agra', 'google', count=False))
+
+    def test_mock_and_failed_lookups_are_not_cached(self):
+        for info in (dict(ROUTE, mock=True), None):
+            with self.subTest(info=info):
+                _, calls = self.lookup(info)
+                self.assertEqual(calls, 2)
+                self.assertIsNone(route_cache.get('Delhi', 'Agra', 'google', count=False))
+
+    def test_hits_are_counted_per_process(self):
+        before = registry.value('greentravel_route_cache_total', result='hit')
+        self.lookup(ROUTE)
+        self.assertEqual(registry.value('greentravel_route_cache_total', result='hit') - before, 1)
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from recommendations.models import (
+    DailyModeRollup, DailyRouteRollup, Destination, JobCheckpoint, TravelModeSummary, TravelRecord, TravelSummary,
+)
+from recommendations.routers import ReadOnlyRouter
+
+
+class FakeConnections(dict):
+    """Just what the router looks at: the configured aliases and in_atomic_block"""
+
+    def __init__(self, aliases, in_atomic_block=False):
+        super().__init__({alias: SimpleNamespace(in_atomic_block=in_atomic_block) for alias in aliases})
+        self.databases = {alias: {} for alias in aliases}
+
+
+class ReadOnlyRouterTests(SimpleTestCase):
+    def route(self, model, aliases=('default', 'readonly'), in_atomic_block=False):
+        with mock.patch('recommendations.routers.connections', FakeConnections(aliases, in_atomic_block)):
+            return ReadOnlyRouter().db_for_read(model)
+
+    def test_history_and_reporting_reads_go_to_the_replica(self):
+        for model in (TravelRecord, TravelSummary, TravelModeSummary, DailyModeRollup, DailyRouteRollup):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.route(model), 'readonly')
+
+    def test_other_models_read_from_the_writer(self):
+        for model in (Destination, JobCheckpoint):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.route(model), 'default')
+
+    def test_reads_inside_a_write_transaction_stay_on_the_writer(self):
+        self.assertEqual(self.route(TravelRecord, in_atomic_block=True), 'default')
+
+    def test_without_the_readonly_alias(self):
+        self.assertEqual(self.route(TravelRecord, aliases=('default',)), 'default')
+
+    def test_writes_and_migrations_use_default(self):
+        router = ReadOnlyRouter()
+        self.assertEqual(router.db_for_write(TravelRecord), 'default')
+        self.assertTrue(router.allow_migrate('default', 'recommendations'))
+        self.assertFalse(router.allow_migrate('readonly', 'recommendations'))
+        self.assertTrue(router.allow_relation(TravelRecord(), Destination()))
@@ -0,0 +1,96 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from recommendations import geocoding
+from recommendations.routing import fetch_google_matrix, fetch_google_route
+
+
+def element(km, minutes):
+    return {
+        'status': 'OK',
+        'distance': {'value': km * 1000},
+        'duration': {'value': minutes * 60, 'text': f'{minutes} mins'},
+    }
+
+
+class FakeModes:
+    """Stands in for one Distance Matrix request per mode"""
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour
+        self.release = threading.Event()
+
+    def __call__(self, *args):
+        outcome = self.behaviour.get(args[-1])
+        if outcome == 'raise':
+            raise ConnectionError('backend down')
+        if outcome == 'hang':
+            self.release.wait(5)
+            return None
+        return outcome
+
+
+class FetchGoogleRouteTests(SimpleTestCase):
+    def fetch(self, fake, deadline=1):
+        try:
+            with mock.patch('recommendations.routing._fetch_mode', fake):
+                return fetch_google_route('Delhi', 'Agra', deadline=deadline)
+        finally:
+            fake.release.set()
+
+    def test_all_modes(self):
+        fake = FakeModes(driving=element(230, 240), transit=element(230, 300),
+                         bicycling=element(230, 900), walking=element(230, 2900))
+        info = self.fetch(fake)
+        self.assertEqual(info['distance_km'], 230)
+        self.assertEqual(info['durations']['transit'], 300 * 60)
+        self.assertNotIn('partial', info)
+
+    def test_modes_without_a_route_are_not_partial(self):
+        info = self.fetch(FakeModes(driving=element(230, 240)))
+        self.assertEqual(set(info['durations']), {'driving', 'driving_text'})
+        self.assertNotIn('partial', info)
+
+    def test_failed_and_late_modes_make_a_partial_result(self):
+        fake = FakeModes(driving=element(230, 240), transit='raise', bicycling='hang', walking=None)
+        info = self.fetch(fake, deadline=0.2)
+        self.assertEqual(info['distance_km'], 230)
+        self.assertTrue(info['partial'])
+        self.assertEqual(info['missing_modes'], ['transit', 'bicycling'])
+
+    def test_driving_is_required(self):
+        self.assertIsNone(self.fetch(FakeModes(driving='raise', transit=element(230, 300))))
+        self.assertIsNone(self.fetch(FakeModes(driving='hang', transit=element(230, 300)), deadline=0.2))
+
+
+class FetchGoogleMatrixTests(SimpleTestCase):
+    def test_partial_failure(self):
+        def fake(origins, destinations, mode):
+            if mode == 'transit':
+                raise ConnectionError('backend down')
+            if mode == 'driving':
+                return {('Delhi', 'Agra'): element(230, 240), ('Delhi', 'Goa'): {'status': 'OK'}}
+            return {('Delhi', 'Agra'): element(230, 600)}
+
+        with mock.patch('recommendations.routing._fetch_matrix_mode', fake):
+            results = fetch_google_matrix(['Delhi'], ['Agra', 'Goa'])
+        self.assertEqual(list(results), [('Delhi', 'Agra')])
+        info = results[('Delhi', 'Agra')]
+        self.assertEqual(info['missing_modes'], ['transit'])
+        self.assertEqual(info['durations']['walking'], 600 * 60)
+
+
+@override_settings(GOOGLE_MAPS_API_KEY='AIza-test-key', ROUTING_DEADLINE_SECONDS=8, GOOGLE_MAPS_TIMEOUT=10)
+class GmapsClientTests(SimpleTestCase):
+    def setUp(self):
+        geocoding._gmaps_client = None
+
+    tearDown = setUp
+
+    def test_timeouts_fit_inside_the_deadline(self):
+        client = geocoding.get_gmaps_client()
+        self.assertIs(client, geocoding.get_gmaps_client())
+        self.assertLessEqual(client.timeout, 8)
+        self.assertLessEqual(client.retry_timeout.total_seconds(), 8)
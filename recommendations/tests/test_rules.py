@@ -0,0 +1,68 @@
+import math
+
+from django.test import SimpleTestCase
+
+from recommendations.ai_logic import GreenTravelAI
+from recommendations.rules import DEFAULT_DISTANCE_RULES, BandTable
+
+
+def modes(table, km):
+    return [rule.name for rule in table.lookup(km).modes]
+
+
+def scores(table, km):
+    return {rule.name: rule.score for rule in table.lookup(km).modes}
+
+
+class BandTableTests(SimpleTestCase):
+    def setUp(self):
+        self.table = BandTable(DEFAULT_DISTANCE_RULES, GreenTravelAI.TRANSPORTS, GreenTravelAI.AVERAGE_SPEED_KMH)
+
+    def test_suitability_upper_bounds_are_inclusive(self):
+        self.assertEqual(modes(self.table, 100), ['bike', 'bus', 'train', 'car', 'ev'])
+        self.assertEqual(modes(self.table, math.nextafter(100, math.inf)), ['train', 'ev', 'bus', 'car', 'flight'])
+        self.assertEqual(modes(self.table, 300), ['train', 'ev', 'bus', 'car', 'flight'])
+        self.assertEqual(modes(self.table, 300.01), ['flight', 'train', 'ev', 'car'])
+        self.assertEqual(modes(self.table, 0), modes(self.table, 100))
+
+    def test_score_offsets_are_half_open(self):
+        self.assertEqual(scores(self.table, math.nextafter(300, -math.inf))['bus'], 100)
+        self.assertEqual(scores(self.table, 300)['bus'], 90)
+        self.assertEqual(scores(self.table, 300)['train'], 90)
+        self.assertEqual(scores(self.table, math.nextafter(700, -math.inf))['ev'], 85)
+        self.assertEqual(scores(self.table, 700)['train'], 85)
+
+    def test_scores_are_capped(self):
+        self.assertEqual(scores(self.table, 10)['bike'], 100)
+
+    def test_city_speeds_below_50_km(self):
+        below = {rule.name: rule.speed for rule in self.table.lookup(49.99).modes}
+        at = {rule.name: rule.speed for rule in self.table.lookup(50).modes}
+        self.assertEqual((below['car'], at['car']), (40.0, 60.0))
+        self.assertEqual((below['bike'], at['bike']), (15.0, 50.0))
+
+    def test_every_band_matches_a_direct_rule_evaluation(self):
+        for low, high, band_modes, _ in self.table.bands:
+            for km in (high, math.nextafter(low, math.inf)):
+                if math.isinf(km):
+                    continue
+                with self.subTest(km=km):
+                    self.assertEqual(self.table.lookup(km).modes, band_modes)
+
+    def test_options_are_read_only(self):
+        options = self.table.lookup(10).options
+        self.assertIn('bike', options)
+        with self.assertRaises(TypeError):
+            options['flight'] = GreenTravelAI.TRANSPORTS['flight']
+        self.assertIs(GreenTravelAI.get_transport_options(10), GreenTravelAI.get_transport_options(20))
+
+    def test_custom_rules(self):
+        config = {
+            'suitability': [{'max_km': 10, 'modes': ['bike', 'unknown']}, {'max_km': None, 'modes': ['car']}],
+            'score_offsets': [],
+            'speeds': [],
+        }
+        table = BandTable(config, GreenTravelAI.TRANSPORTS, GreenTravelAI.AVERAGE_SPEED_KMH)
+        self.assertEqual(table.edges, (10.0,))
+        self.assertEqual(modes(table, 10), ['bike'])
+        self.assertEqual(modes(table, 10.5), ['car'])
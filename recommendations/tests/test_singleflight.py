@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from recommendations.instrumentation import registry
+from recommendations.singleflight import SingleFlight
+
+from .utils import LOCAL_CACHES
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+        self.flight = SingleFlight('test')
+        self.calls = 0
+        self.release = threading.Event()
+
+    def lookup(self):
+        self.calls += 1
+        self.release.wait(5)
+        return {'distance_km': 230.0}
+
+    def roles(self):
+        return {role: registry.value('greentravel_singleflight_total', flight='test', role=role)
+                for role in ('leader', 'follower', 'remote_follower')}
+
+    def run_concurrently(self, count, key='Delhi|Agra', func=None):
+        with ThreadPoolExecutor(count) as pool:
+            futures = [pool.submit(self.flight.do, key, func or self.lookup) for _ in range(count)]
+            # Let every caller reach the flight before the lookup returns
+            time.sleep(0.2)
+            self.release.set()
+            return [f.exception() or f.result() for f in futures]
+
+    def test_concurrent_callers_share_one_lookup(self):
+        results = self.run_concurrently(6)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.roles(), {'leader': 1, 'follower': 5, 'remote_follower': 0})
+        # The flight is over; the next call looks up again
+        self.flight.do('Delhi|Agra', self.lookup)
+        self.assertEqual(self.calls, 2)
+
+    def test_different_keys_run_separately(self):
+        self.release.set()
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(lambda key: self.flight.do(key, self.lookup), ['Delhi|Agra', 'Mumbai|Pune']))
+        self.assertEqual(self.calls, 2)
+
+    def test_followers_get_the_leaders_error(self):
+        def failing():
+            self.calls += 1
+            self.release.wait(5)
+            raise TimeoutError('upstream')
+
+        results = self.run_concurrently(3, func=failing)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(result, TimeoutError) for result in results))
+
+    @override_settings(SINGLEFLIGHT_WAIT_SECONDS=0.05)
+    def test_slow_leader_stops_followers_waiting(self):
+        results = self.run_concurrently(2)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(results[0], results[1])
+
+    def test_async_callers_share_one_task(self):
+        async def lookup():
+            self.calls += 1
+            await asyncio.sleep(0.05)
+            return {'distance_km': 150.0}
+
+        async def main():
+            return await asyncio.gather(*(self.flight.ado('Mumbai|Pune', lookup) for _ in range(5)))
+
+        results = asyncio.run(main())
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.roles()['follower'], 4)
+
+    def test_cancelled_async_caller_leaves_the_lookup_running(self):
+        async def lookup():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        async def main():
+            first = asyncio.ensure_future(self.flight.ado('k', lookup))
+            second = asyncio.ensure_future(self.flight.ado('k', lookup))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), 'done')
+
+
+@override_settings(CACHES=LOCAL_CACHES, SINGLEFLIGHT_CACHE_ALIAS='default', SINGLEFLIGHT_POLL_SECONDS=0.01)
+class CrossWorkerTests(SimpleTestCase):
+    def setUp(self):
+        registry.reset()
+        caches['default'].clear()
+        self.flight = SingleFlight('test')
+        self.lock_key = 'singleflight:test:' + hashlib.sha1(b'Delhi|Agra').hexdigest()
+
+    def test_waits_for_another_workers_result(self):
+        caches['default'].add(self.lock_key, 1)
+        stored = iter([None, None, {'distance_km': 230.0}])
+        result = self.flight.do('Delhi|Agra', self.fail, recheck=lambda: next(stored))
+        self.assertEqual(result, {'distance_km': 230.0})
+        self.assertEqual(registry.value('greentravel_singleflight_total', flight='test', role='remote_follower'), 1)
+
+    def test_runs_itself_when_the_other_worker_stores_nothing(self):
+        caches['default'].add(self.lock_key, 1)
+
+        def recheck():
+            caches['default'].delete(self.lock_key)
+
+        self.assertEqual(self.flight.do('Delhi|Agra', lambda: 'fetched', recheck=recheck), 'fetched')
+
+    def test_leader_takes_and_releases_the_lock(self):
+        def lookup():
+            self.assertIsNotNone(caches['default'].get(self.lock_key))
+            return 'fetched'
+
+        self.assertEqual(self.flight.do('Delhi|Agra', lookup, recheck=lambda: None), 'fetched')
+        self.assertIsNone(caches['default'].get(self.lock_key))
+
+    def fail(self):
+        raise AssertionError('should have used the other worker\'s result')
@@ -0,0 +1,86 @@
+import math
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from recommendations.models import Destination
+from recommendations.spatial import _cell_size, covering_cells, encode_geohash, nearby_destinations
+
+from .utils import LOCAL_CACHES
+
+
+class GeohashTests(SimpleTestCase):
+    def test_reference_values(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode_geohash(0, 0, 5), 's0000')
+        self.assertEqual(encode_geohash(-0.0001, -0.0001, 5), '7zzzz')
+        self.assertEqual(encode_geohash(28.6139, 77.2090)[:4], 'ttnf')
+
+    def test_cell_sizes(self):
+        self.assertEqual(_cell_size(1), (45.0, 45.0))
+        lat, lng = _cell_size(5)
+        self.assertAlmostEqual(lat, 180 / 2 ** 12)
+        self.assertAlmostEqual(lng, 360 / 2 ** 13)
+
+    def test_cells_cover_the_bounding_box(self):
+        for lat, lng, radius in ((0.0, 0.0, 5), (28.61, 77.21, 300), (89.9, 10, 50), (10, 179.99, 20), (-33.9, 18.4, 1)):
+            with self.subTest(lat=lat, lng=lng, radius=radius):
+                cells = covering_cells(lat, lng, radius)
+                self.assertTrue(1 <= len(cells) <= 16)
+                dlat = radius / 111.32
+                dlng = radius / (111.32 * math.cos(math.radians(lat)))
+                for y in (lat - dlat, lat, lat + dlat):
+                    for x in (lng - dlng, lng, lng + dlng):
+                        y, x = max(-90, min(89.999999, y)), max(-180, min(179.999999, x))
+                        self.assertTrue(any(encode_geohash(y, x).startswith(c) for c in cells), (y, x))
+
+
+@override_settings(CACHES=LOCAL_CACHES)
+class NearbyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Around (0, 0) neighbouring points share no geohash prefix at all
+        cls.places = {
+            name: Destination.objects.create(name=name, latitude=lat, longitude=lng, carbon_score=score)
+            for name, lat, lng, score in (
+                ('north-east', 0.01, 0.01, 40),
+                ('south-west', -0.01, -0.01, 30),
+                ('north-west', 0.02, -0.02, 20),
+                ('far', 0.5, 0.5, 10),
+                ('no-coordinates', None, None, 10),
+            )
+        }
+
+    def names(self, results):
+        return [r['destination'].name for r in results]
+
+    def test_edge_cells_on_both_sides_of_the_equator_and_meridian(self):
+        self.assertEqual(self.places['north-east'].geohash[0], 's')
+        self.assertEqual(self.places['south-west'].geohash[0], '7')
+        self.assertEqual(self.places['north-west'].geohash[0], 'e')
+        results = nearby_destinations(0.0, 0.0, 5)
+        self.assertEqual(set(self.names(results)), {'north-east', 'south-west', 'north-west'})
+        for r in results:
+            self.assertLessEqual(r['distance_km'], 5)
+
+    def test_ranking_filters_and_limit(self):
+        results = nearby_destinations(0.0, 0.0, 100)
+        # Lowest trip CO2 first; equally distant places fall back to carbon_score
+        self.assertEqual(self.names(results), ['south-west', 'north-east', 'north-west', 'far'])
+        self.assertEqual(self.names(nearby_destinations(0.0, 0.0, 100, max_carbon=20)), ['north-west', 'far'])
+        self.assertEqual(len(nearby_destinations(0.0, 0.0, 100, limit=2)), 2)
+        self.assertEqual(nearby_destinations(0.0, 0.0, 0.5), [])
+
+    def test_endpoint_rejects_bad_input(self):
+        for query in ('radius_km=nan&lat=0&lng=0', 'radius_km=-5&lat=0&lng=0', 'radius_km=0&lat=0&lng=0',
+                      'lat=91&lng=0', 'lat=0&lng=-181', 'lat=inf&lng=0', 'lat=abc&lng=0', ''):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/nearby/?{query}').status_code, 400)
+        with self.settings(OFFLINE_ROUTING=True):
+            self.assertEqual(self.client.get('/nearby/?origin=Atlantis&radius_km=10').status_code, 404)
+
+    def test_endpoint(self):
+        response = self.client.get('/nearby/?lat=0&lng=0&radius_km=5&limit=2')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['radius_km'], 5)
+        self.assertEqual(len(body['results']), 2)
@@ -0,0 +1,133 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from recommendations.staticfiles import PrecompressedStaticMiddleware, _brotli, accepted_encodings, negotiate_encoding
+
+CSS = 'body { color: #222; margin: 0 auto; }\n' * 40
+
+
+class NegotiationTests(SimpleTestCase):
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, br;q=0.8, identity;q=0, *;q=0.1'),
+                         {'gzip': 1.0, 'br': 0.8, 'identity': 0.0, '*': 0.1})
+        self.assertEqual(accepted_encodings('gzip;q=abc, deflate'), {'deflate': 1.0})
+        self.assertEqual(accepted_encodings(None), {})
+
+    def test_negotiate(self):
+        both = {'br', 'gzip'}
+        self.assertEqual(negotiate_encoding('gzip, deflate, br', both), 'br')
+        self.assertEqual(negotiate_encoding('gzip, br;q=0.5', both), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip, br', {'gzip'}), 'gzip')
+        self.assertEqual(negotiate_encoding(None, both), 'identity')
+        self.assertEqual(negotiate_encoding('', both), 'identity')
+        self.assertEqual(negotiate_encoding('deflate', both), 'identity')
+
+    def test_wildcard(self):
+        self.assertEqual(negotiate_encoding('*', {'gzip'}), 'gzip')
+        self.assertEqual(negotiate_encoding('*;q=0.5, br;q=0', {'br', 'gzip'}), 'gzip')
+        # A refused wildcard refuses identity too unless it's listed
+        self.assertIsNone(negotiate_encoding('*;q=0', set()))
+        self.assertEqual(negotiate_encoding('identity, *;q=0', {'gzip'}), 'identity')
+
+    def test_identity_refused(self):
+        self.assertEqual(negotiate_encoding('gzip, identity;q=0', {'gzip'}), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip, identity;q=0', set()))
+        self.assertIsNone(negotiate_encoding('br, identity;q=0', {'gzip'}))
+
+
+class PrecompressedStaticTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = Path(tmp.name) / 'src'
+        self.root = Path(tmp.name) / 'root'
+        (self.source / 'css').mkdir(parents=True)
+        (self.source / 'css' / 'style.css').write_text(CSS)
+        (self.source / 'tiny.js').write_text('var x = 1;\n')
+        settings = override_settings(
+            STATIC_ROOT=str(self.root),
+            STATICFILES_DIRS=[str(self.source)],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.collect()
+        self.middleware = PrecompressedStaticMiddleware(lambda request: HttpResponse('app', status=404))
+        self.factory = RequestFactory()
+
+    def collect(self):
+        if _brotli is not None:
+            call_command('collectstatic', interactive=False, verbosity=0)
+            return
+        with self.assertLogs('recommendations.staticfiles', 'WARNING'):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+    def manifest(self):
+        return json.loads((self.root / 'staticfiles.json').read_text())['paths']
+
+    def get(self, path, **headers):
+        return self.middleware(self.factory.get(path, **headers))
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        hashed = self.manifest()['css/style.css']
+        self.assertTrue((self.root / (hashed + '.gz')).exists())
+        self.assertEqual((self.root / ('css/style.css.br')).exists(), _brotli is not None)
+        self.assertEqual(gzip.decompress((self.root / (hashed + '.gz')).read_bytes()).decode(), CSS)
+        # Too small to be worth compressing
+        self.assertFalse((self.root / 'tiny.js.gz').exists())
+
+    def test_serves_the_negotiated_variant(self):
+        hashed = self.manifest()['css/style.css']
+        response = self.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode(), CSS)
+
+        plain = self.get(f'/static/{hashed}')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(b''.join(plain.streaming_content).decode(), CSS)
+
+    def test_unhashed_names_get_short_cache_and_304(self):
+        response = self.get('/static/css/style.css', HTTP_ACCEPT_ENCODING='*')
+        self.assertIn(response['Content-Encoding'], ('br', 'gzip'))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        again = self.get('/static/css/style.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_identity_refused_without_a_variant(self):
+        response = self.get('/static/tiny.js', HTTP_ACCEPT_ENCODING='gzip, identity;q=0')
+        self.assertEqual(response.status_code, 406)
+        self.assertEqual(self.get('/static/css/style.css', HTTP_ACCEPT_ENCODING='gzip, identity;q=0')['Content-Encoding'],
+                         'gzip')
+
+    def test_variants_are_not_served_directly(self):
+        self.assertEqual(self.get('/static/css/style.css.gz').status_code, 404)
+        self.assertEqual(self.get('/static/css/style.css.gz', HTTP_ACCEPT_ENCODING='gzip')['Content-Type'],
+                         'text/html; charset=utf-8')
+
+    def test_unknown_and_escaping_paths_fall_through(self):
+        self.assertEqual(self.get('/static/missing.css').content, b'app')
+        self.assertEqual(self.get('/static/../settings.py').content, b'app')
+
+    def test_picks_up_a_new_collectstatic(self):
+        old = self.manifest()['css/style.css']
+        self.assertIn(old, self.middleware.hashed_names())
+        (self.source / 'css' / 'style.css').write_text(CSS + 'p { margin: 0; }\n')
+        # mtime granularity: make sure the rewritten manifest looks newer
+        time.sleep(0.01)
+        self.collect()
+        os.utime(self.root / 'staticfiles.json')
+        new = self.manifest()['css/style.css']
+        self.assertNotEqual(old, new)
+        self.assertEqual(self.get(f'/static/{new}')['Cache-Control'], 'public, max-age=31536000, immutable')
+
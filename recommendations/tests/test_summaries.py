@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from recommendations.models import TravelRecord, TravelSummary
+from recommendations.summaries import rebuild_summaries
+
+from .utils import summary_snapshot
+
+
+class SummaryMaintenanceTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', password='x')
+        self.bob = User.objects.create_user('bob', password='x')
+        self.records = [
+            TravelRecord.objects.create(
+                user=self.alice, source='Delhi', destination='Agra', distance_km=230.0 + i,
+                recommended_transport='train', co2_estimated_kg=9.43, co2_saved_kg=49.22,
+            )
+            for i in range(3)
+        ]
+
+    def assertMatchesRebuild(self):
+        incremental = summary_snapshot()
+        rebuild_summaries()
+        self.assertEqual(incremental, summary_snapshot())
+
+    def test_create_edit_and_delete(self):
+        record = self.records[0]
+        record.recommended_transport = 'bus'
+        record.distance_km = 300.0
+        record.co2_estimated_kg = 31.5
+        record.save()
+        self.assertMatchesRebuild()
+
+        record.user = self.bob
+        record.save()
+        self.assertEqual(TravelSummary.objects.get(user=self.bob).trip_count, 1)
+        self.assertMatchesRebuild()
+
+        self.records[1].delete()
+        self.assertMatchesRebuild()
+
+    def test_save_of_unrelated_fields_leaves_totals(self):
+        before = summary_snapshot()
+        record = self.records[2]
+        record.source = 'New Delhi'
+        record.save(update_fields=['source'])
+        self.assertEqual(before, summary_snapshot())
+
+    def test_delete_with_drifted_totals(self):
+        TravelSummary.objects.filter(user=self.alice).update(trip_count=0)
+        for record in self.records:
+            record.delete()
+        self.assertEqual(TravelSummary.objects.get(user=self.alice).trip_count, 0)
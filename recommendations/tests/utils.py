@@ -0,0 +1,38 @@
+"""Helpers shared by the test modules"""
+from recommendations.models import DailyModeRollup, DailyRouteRollup, TravelModeSummary, TravelSummary
+
+# In-memory stand-ins for the file-based caches, so tests never touch .cache/
+LOCAL_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-default'},
+    'routes': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-routes'},
+    'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-pages'},
+}
+
+
+def summary_snapshot():
+    """Comparable view of every TravelSummary / TravelModeSummary row"""
+    overall = {
+        row.user_id: (row.trip_count, round(row.total_distance_km, 6), round(row.total_co2_estimated_kg, 6),
+                      round(row.total_co2_saved_kg, 6))
+        for row in TravelSummary.objects.all()
+    }
+    modes = {
+        (row.user_id, row.transport): (row.trip_count, round(row.total_co2_estimated_kg, 6),
+                                       round(row.total_co2_saved_kg, 6))
+        for row in TravelModeSummary.objects.filter(trip_count__gt=0)
+    }
+    return overall, modes
+
+
+def rollup_snapshot():
+    """Comparable view of the non-empty DailyModeRollup / DailyRouteRollup rows"""
+    modes = {
+        (row.day, row.recommended_transport, row.selected_travel_type):
+            (row.trip_count, row.passenger_count, round(row.total_distance_km, 6), round(row.total_co2_estimated_kg, 6))
+        for row in DailyModeRollup.objects.filter(trip_count__gt=0)
+    }
+    routes = {
+        (row.day, row.source, row.destination): (row.trip_count, round(row.total_distance_km, 6))
+        for row in DailyRouteRollup.objects.filter(trip_count__gt=0)
+    }
+    return modes, routes
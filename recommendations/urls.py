@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
@@ -5,11 +6,16 @@ from . import views
 app_name = 'recommendations'
 
 urlpatterns = [
-    path('', views.recommend, name='index'),
+    path('', views.recommend_async if getattr(settings, 'ASYNC_ROUTE_FINDER', False) else views.recommend, name='index'),
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', views.custom_logout, name='logout'),
     path('signup/', views.signup, name='signup'),
     path('about/', views.about, name='about'),
     path('history/', views.history, name='history'),
+    path('history/api/', views.history_api, name='history_api'),
     path('profile/', views.profile, name='profile'),
+    path('batch/', views.batch_recommend, name='batch'),
+    path('api/recommend/', views.recommend_api, name='recommend_api'),
+    path('nearby/', views.nearby, name='nearby'),
+    path('export/travel-records/', views.export_travel_records, name='export_travel_records'),
 ]
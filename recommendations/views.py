@@ -1,4 +1,5 @@
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from .models import Destination
 from .forms import RecommendationForm
 from django.contrib.auth.forms import UserCreationForm
@@ -7,37 +8,91 @@ from django.contrib import messages
 from .forms import TravelInputForm
 from .models import TravelRecord
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.conf import settings
 from .ai_logic import GreenTravelAI
 
-# googlemaps is optional at runtime; if it's not installed we fall back to the
-# mock distance calculator below. This prevents an import-time crash.
-try:
-    import googlemaps as _googlemaps
-except Exception:
-    _googlemaps = None
-# Try to import geopy for OpenStreetMap fallback
-try:
-    from geopy.geocoders import Nominatim as _Nominatim
-    from geopy.distance import geodesic as _geodesic
-    _geopy = True
-except Exception:
-    _Nominatim = None
-    _geodesic = None
-    _geopy = False
+from .geocoding import _googlemaps, _geopy, _Nominatim, _geodesic, geocode_place, google_configured, normalize_place
+from .routecache import route_cache
+from .routing import fetch_google_route
+from .batch import evaluate_pairs
+from .gazetteer import estimate_durations, get_gazetteer, offline_route
+from .spatial import nearby_destinations
+from .summaries import summary_for_user
+from .pagination import keyset_page
+from .ingest import record_writer
+from .export import CONTENT_TYPES as EXPORT_CONTENT_TYPES, available_formats, export_queryset, stream_export
+from .instrumentation import stage
+from .singleflight import route_flight
+from .catalog import browse_params, cache_anonymous_page, page_cache, page_key
+from .jsonapi import json_response
+from .apiauth import api_key_required, rate_limited, unauthorized
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum
+from django.core.paginator import Paginator
+from django.db.models import Count, F, IntegerField, Q, Value
 from .forms import ProfileForm
 from django.contrib.auth import logout
-from django.http import HttpResponseRedirect
+import asyncio
+import json
+import math
+from datetime import date
+from urllib.parse import urlencode
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
 from django.urls import reverse
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 def get_distance_from_api(source, destination):
     """
     Fetch distance and duration from Google Maps Distance Matrix API
     Returns dict {'distance_km': float, 'duration_text': str, 'duration_seconds': int}
     or None if API fails
+    Results are memoized in the shared route cache; mock fallbacks and partial
+    results (some modes timed out) are not cached so a transient failure doesn't
+    pin a degraded answer.
     """
+    with stage('route') as timing:
+        if getattr(settings, 'OFFLINE_ROUTING', False):
+            # Gazetteer lookups are local and cheap; no network, no cache
+            info = offline_route(source, destination)
+            if info is None:
+                info = mock_distance_calculation(source, destination)
+                info['mock'] = True
+            timing.labels['backend'] = 'mock' if info.get('mock') else 'offline'
+            return info
+
+        backend = 'google' if google_configured() else 'osm'
+        cached = route_cache.get(source, destination, backend)
+        if cached is not None:
+            timing.labels['backend'] = 'cache'
+            return cached
+
+        # Identical concurrent misses share one outbound lookup
+        info = route_flight.do(
+            route_cache.make_key(source, destination, backend),
+            lambda: _fetch_and_cache(source, destination, backend),
+            recheck=lambda: route_cache.get(source, destination, backend, count=False),
+        )
+        timing.labels['backend'] = 'mock' if info and info.get('mock') else backend
+        return info
+
+
+def _fetch_and_cache(source, destination, backend):
+    info = _fetch_distance(source, destination)
+    if info is not None and not info.get('mock') and not info.get('partial'):
+        route_cache.set(source, destination, backend, info)
+    return info
+
+
+def _fetch_distance(source, destination):
+    """Uncached Google / OpenStreetMap / mock distance lookup"""
     try:
         api_key = settings.GOOGLE_MAPS_API_KEY
         # If Google Maps not available, try OpenStreetMap (Nominatim) fallback
@@ -45,27 +100,13 @@ def get_distance_from_api(source, destination):
             # Use geopy + Nominatim to geocode and compute straight-line distance
             try:
                 if _geopy and _Nominatim is not None and _geodesic is not None:
-                    geolocator = _Nominatim(user_agent="greentravel_app")
-                    src = geolocator.geocode(source, timeout=10)
-                    dst = geolocator.geocode(destination, timeout=10)
+                    src = geocode_place(source)
+                    dst = geocode_place(destination)
                     if src and dst:
-                        coords_1 = (src.latitude, src.longitude)
-                        coords_2 = (dst.latitude, dst.longitude)
+                        coords_1 = (src['lat'], src['lng'])
+                        coords_2 = (dst['lat'], dst['lng'])
                         distance_km = round(_geodesic(coords_1, coords_2).km, 2)
-                        durations = {}
-                        # Adjust speeds for city vs highway based on distance
-                        if distance_km < 50:
-                            # City speeds for short distances
-                            driving_speed = 40.0  # km/h
-                            transit_speed = 50.0  # km/h
-                        else:
-                            # Highway speeds for longer distances
-                            driving_speed = 60.0  # km/h
-                            transit_speed = 70.0  # km/h
-                        durations['driving'] = int((distance_km / driving_speed) * 3600)
-                        durations['transit'] = int((distance_km / transit_speed) * 3600)
-                        durations['bicycling'] = int((distance_km / 15.0) * 3600)
-                        durations['walking'] = int((distance_km / 5.0) * 3600)
+                        durations = estimate_durations(distance_km)
                         return {'distance_km': distance_km, 'durations': durations, 'fallback': 'osm'}
             except Exception:
                 pass
@@ -75,75 +116,24 @@ def get_distance_from_api(source, destination):
             info['mock'] = True
             return info
 
-        gmaps = _googlemaps.Client(key=api_key)
-
-        # Get driving distance (canonical) and collect durations for several modes
-        driving = gmaps.distance_matrix(origins=source, destinations=destination, mode='driving', units='metric')
-        if not (driving and driving.get('status') == 'OK' and driving.get('rows')):
-            return None
-
-        elem = driving['rows'][0]['elements'][0]
-        if not (elem and elem.get('status') == 'OK' and 'distance' in elem):
-            return None
-
-        distance_m = elem['distance']['value']
-        distance_km = round(distance_m / 1000, 2)
-
-        durations = {}
-        if 'duration' in elem and elem['duration']:
-            durations['driving'] = elem['duration']['value']
-            durations['driving_text'] = elem['duration']['text']
-
-        for mode in ['transit', 'bicycling', 'walking']:
-            try:
-                res = gmaps.distance_matrix(origins=source, destinations=destination, mode=mode, units='metric')
-                if res and res.get('status') == 'OK' and res.get('rows'):
-                    e = res['rows'][0]['elements'][0]
-                    if e.get('status') == 'OK' and 'duration' in e and e['duration']:
-                        durations[mode] = e['duration']['value']
-                        durations[f'{mode}_text'] = e['duration']['text']
-            except Exception:
-                pass
-
-        return {'distance_km': distance_km, 'durations': durations}
+        # All modes are fetched in parallel on one pooled client, under one deadline
+        return fetch_google_route(source, destination)
     except Exception as e:
-        print(f"API Error: {e}")
-    
+        logger.exception("API Error: %s", e)
+
     return None
 
 
 def get_country_for_place(place):
-    """Return country code (ISO short_name) for a place using Google Geocoding.
+    """Return country code (ISO short_name) for a place.
     Returns the two-letter country short name (e.g. 'IN') when available, else None.
-    Falls back to None when geocode not available or API key missing.
+    Lookups go through the geocode cache (Google first, then Nominatim).
     """
     try:
-        api_key = settings.GOOGLE_MAPS_API_KEY
-        # Prefer Google Geocoding when available
-        if api_key and _googlemaps is not None and api_key != 'YOUR_GOOGLE_MAPS_API_KEY_HERE':
-            try:
-                gmaps = _googlemaps.Client(key=api_key)
-                results = gmaps.geocode(place)
-                if results:
-                    for comp in results[0].get('address_components', []):
-                        if 'country' in comp.get('types', []):
-                            return comp.get('short_name')
-            except Exception:
-                pass
-
-        # Fallback: use Nominatim (OpenStreetMap) via geopy when available
-        if _geopy and _Nominatim is not None:
-            try:
-                geolocator = _Nominatim(user_agent="greentravel_app")
-                res = geolocator.geocode(place, addressdetails=True, timeout=10)
-                if res and getattr(res, 'raw', None):
-                    adr = res.raw.get('address', {})
-                    cc = adr.get('country_code')
-                    if cc:
-                        return cc.upper()
-            except Exception:
-                return None
-
+        with stage('geocode'):
+            result = geocode_place(place)
+        if result:
+            return result.get('country_code')
     except Exception:
         return None
     return None
@@ -171,95 +161,170 @@ def is_within_india(source, destination):
 def mock_distance_calculation(source, destination):
     """
     Mock distance calculation for demo when API key is not configured
-    Demonstrates API functionality without actual API calls
+    Uses the bundled offline gazetteer; unknown places default to 500 km
     """
-    # Simple hash-based mock distances for Indian cities
-    location_pairs = {
-        ('delhi', 'mumbai'): 1400,
-        ('delhi', 'kolkata'): 1500,
-        ('delhi', 'chennai'): 2200,
-        ('delhi', 'bangalore'): 2100,
-        ('delhi', 'ghaziabad'): 30,
-        ('delhi', 'noida'): 25,
-        ('delhi', 'gurgaon'): 30,
-        ('mumbai', 'bangalore'): 980,
-        ('mumbai', 'chennai'): 1330,
-        ('mumbai', 'kolkata'): 1900,
-        ('bangalore', 'chennai'): 350,
-        ('bangalore', 'kolkata'): 1900,
-        ('chennai', 'kolkata'): 1700,
-        ('delhi', 'jaipur'): 280,
-        ('mumbai', 'pune'): 150,
-        ('bangalore', 'mysore'): 140,
-        ('delhi', 'agra'): 200,
-        ('mumbai', 'goa'): 580,
-        ('delhi', 'rishikesh'): 240,
-        ('delhi', 'srinagar'): 800,
-    }
-
-    src = source.lower().strip()
-    dst = destination.lower().strip()
-
-    for (s, d), dist in location_pairs.items():
-        if (s in src and d in dst) or (d in src and s in dst):
-            distance_km = dist
-            durations = {}
-            # Adjust speeds for city vs highway based on distance
-            if distance_km < 50:
-                # City speeds for short distances
-                driving_speed = 40.0  # km/h
-                transit_speed = 50.0  # km/h
-            else:
-                # Highway speeds for longer distances
-                driving_speed = 60.0  # km/h
-                transit_speed = 70.0  # km/h
-            durations['driving'] = int((distance_km / driving_speed) * 3600)
-            durations['transit'] = int((distance_km / transit_speed) * 3600)
-            durations['bicycling'] = int((distance_km / 15.0) * 3600)
-            durations['walking'] = int((distance_km / 5.0) * 3600)
-            return {'distance_km': distance_km, 'durations': durations}
+    info = offline_route(source, destination)
+    if info is not None:
+        return {'distance_km': info['distance_km'], 'durations': info['durations']}
 
     # Default to a medium distance for demo (Indian context)
     distance_km = 500
-    durations = {}
-    durations['driving'] = int((distance_km / 60.0) * 3600)
-    durations['transit'] = int((distance_km / 70.0) * 3600)
-    durations['bicycling'] = int((distance_km / 15.0) * 3600)
-    durations['walking'] = int((distance_km / 5.0) * 3600)
-    return {'distance_km': distance_km, 'durations': durations}
+    return {'distance_km': distance_km, 'durations': estimate_durations(distance_km)}
+
+
+ROUTE_MESSAGES = {
+    'offline': "Using offline gazetteer distances (OFFLINE_ROUTING is enabled) — routes are estimated from city coordinates.",
+    'outside_india': "Route not found — the finder only supports routes within India (Google geocoding failed).",
+    'google_failed': (
+        "Could not calculate distance using Google Maps. "
+        "Verify `GOOGLE_MAPS_API_KEY`, billing, and that the `googlemaps` package is installed."
+    ),
+    'osm_failed': (
+        "Could not calculate distance using OpenStreetMap fallback. "
+        "For full India coverage and more accurate routing, set `GOOGLE_MAPS_API_KEY` and install `googlemaps`."
+    ),
+    'osm_used': (
+        "Using OpenStreetMap fallback (geopy) — results may be less accurate than Google Maps. "
+        "To enable Google Maps routing across India, set `GOOGLE_MAPS_API_KEY` and install `googlemaps`."
+    ),
+    'no_backend': (
+        "This route finder requires either a configured Google Maps API key with the `googlemaps` client, "
+        "or the `geopy` package for an OpenStreetMap fallback.\n\n"
+        "Please set `GOOGLE_MAPS_API_KEY` in settings (or as an environment variable) and install the dependencies:\n\n"
+        "pip install googlemaps geopy\n\n"
+        "Or set `GOOGLE_MAPS_API_KEY` only and install `googlemaps` for full routing coverage across India."
+    ),
+    'failed': "Could not calculate distance. Please enter valid locations or check your Google Maps API key.",
+    'mock': "Using mock distances (no Google Maps API key configured). Results may be inaccurate — set `GOOGLE_MAPS_API_KEY` in settings for accurate calculations.",
+    'timeout': "Route lookup timed out. Please try again in a moment.",
+}
+
+
+def route_backend():
+    """
+    Backend the route finder will use: 'offline', 'google', 'osm' or None.
+    Prefer Google Maps when key+client are available, otherwise attempt
+    OpenStreetMap via geopy as a fallback.
+    """
+    if getattr(settings, 'OFFLINE_ROUTING', False):
+        return 'offline'
+    api_key = settings.GOOGLE_MAPS_API_KEY
+    if bool(api_key) and api_key.strip() != '' and _googlemaps is not None:
+        return 'google'
+    if _geopy:
+        return 'osm'
+    return None
 
 
-def recommend(request):
-    # Keep the old recommendation form support for destination browsing
-    form = RecommendationForm(request.GET or None)
-    recommendations = []
-    if form.is_valid():
-        max_carbon = form.cleaned_data.get('max_carbon')
-        transport = form.cleaned_data.get('transport')
-        tags_raw = form.cleaned_data.get('tags')
-        tags = [t.strip().lower() for t in tags_raw.split(',')] if tags_raw else []
+def route_outcome(backend, distance_info, in_india=True):
+    """Turn a lookup result into (distance_info, api_error, api_info) for the route finder"""
+    api_error = None
+    api_info = None
+    if backend == 'offline':
+        api_info = ROUTE_MESSAGES['offline']
+    elif backend == 'google':
+        if not in_india:
+            return None, ROUTE_MESSAGES['outside_india'], None
+        if distance_info is None:
+            api_error = ROUTE_MESSAGES['google_failed']
+    elif backend == 'osm':
+        # Without Google we can't reliably assert India-membership; warn about reduced coverage/accuracy
+        if distance_info is None:
+            api_error = ROUTE_MESSAGES['osm_failed']
+        elif distance_info.get('fallback') == 'osm' or distance_info.get('mock'):
+            api_info = ROUTE_MESSAGES['osm_used']
+    else:
+        # Neither Google nor geopy available: actionable admin message
+        api_error = ROUTE_MESSAGES['no_backend']
+
+    if distance_info is None:
+        api_error = api_error or ROUTE_MESSAGES['failed']
+    elif distance_info.get('mock'):
+        # Warn when using mock data (no Google API key or client)
+        api_info = ROUTE_MESSAGES['mock']
+    return distance_info, api_error, api_info
+
+
+def resolve_route(source, destination):
+    """Look up a route with the configured backend; returns (distance_info, api_error, api_info)"""
+    backend = route_backend()
+    if backend == 'google' and not is_within_india(source, destination):
+        return route_outcome(backend, None, in_india=False)
+    distance_info = get_distance_from_api(source, destination) if backend else None
+    return route_outcome(backend, distance_info)
+
+
+@stage('score')
+def build_travel_result(source, destination, distance_info, passenger_count):
+    """Route finder result for the template, or None when no transport fits"""
+    distance_km = distance_info.get('distance_km')
+    google_durations = distance_info.get('durations') or {}
+    # Use AI Logic to get recommendations (pass Google per-mode durations)
+    all_recommendations = GreenTravelAI.calculate_recommendations(distance_km, google_durations, passenger_count)
+    if not all_recommendations:
+        return None
+    best_option = all_recommendations[0]
+
+    # Calculate CO2 saved compared to flight
+    co2_saved = GreenTravelAI.compare_with_flight(best_option, distance_km)
+
+    # Generate eco-friendly message
+    eco_message = GreenTravelAI.get_eco_message(
+        best_option['green_score'], 
+        best_option['transport'], 
+        distance_km
+    )
+
+    return {
+        'source': source,
+        'destination': destination,
+        'distance_km': distance_km,
+        'passenger_count': passenger_count,
+        'recommended': best_option['transport'],
+        'green_score': best_option['green_score'],
+        'co2_estimated_kg': best_option['emission_kg'],
+        'co2_per_person_kg': best_option.get('emission_per_person_kg'),
+        'co2_saved_kg': co2_saved,
+        'eco_message': eco_message,
+        'all_recommendations': all_recommendations,
+        'estimated_time': best_option.get('duration_text'),
+        'estimated_cost_inr': best_option.get('cost_inr'),
+        'cost_per_person_inr': best_option.get('cost_per_person_inr'),
+    }
 
-        qs = Destination.objects.all()
-        if max_carbon is not None:
-            qs = qs.filter(carbon_score__lte=max_carbon)
-        results = []
-        for d in qs:
-            score = d.carbon_score
-            transport_match = True
-            tag_score = 0
-            if transport:
-                transport_match = transport in [t.lower() for t in d.transports()]
-            if tags:
-                for tag in tags:
-                    if tag and tag in [t.lower() for t in d.tag_list()]:
-                        tag_score += 1
-            if transport and not transport_match:
-                continue
-            results.append((score - tag_score*5, tag_score, d))
-        # sort by computed score (lower better) then tag_score desc
-        results.sort(key=lambda x: (x[0], -x[1]))
-        recommendations = [r[2] for r in results]
 
+def save_travel_record(user, travel_result, user_choice=None):
+    """
+    Store a route finder result; DB errors never block the response.
+    With WRITE_BEHIND_RECORDS the row is queued for the batched background
+    writer (ingest.py) instead of written inside the request.
+    """
+    try:
+        with stage('db_write') as timing:
+            rec = TravelRecord(
+                user=user if user.is_authenticated else None,
+                source=travel_result['source'],
+                destination=travel_result['destination'],
+                distance_km=travel_result['distance_km'],
+                passenger_count=travel_result['passenger_count'],
+                selected_travel_type=user_choice or '',
+                recommended_transport=travel_result['recommended'],
+                co2_estimated_kg=travel_result['co2_estimated_kg'],
+                co2_saved_kg=travel_result['co2_saved_kg'],
+            )
+            if getattr(settings, 'WRITE_BEHIND_RECORDS', False):
+                timing.labels['backend'] = 'queue'
+                record_writer.submit(rec)
+            else:
+                timing.labels['backend'] = 'direct'
+                rec.save()
+    except Exception as e:
+        # Don't block on DB errors
+        logger.exception("Database Error: %s", e)
+
+
+@cache_anonymous_page
+def recommend(request):
     # Travel input form with Google Maps API integration
     travel_form = TravelInputForm(request.POST or None)
     travel_result = None
@@ -273,122 +338,344 @@ def recommend(request):
         else:
             source = travel_form.cleaned_data['source']
             destination = travel_form.cleaned_data['destination']
-            user_choice = travel_form.cleaned_data.get('travel_type')
             passenger_count = int(travel_form.cleaned_data.get('passenger_count') or 1)
 
-            # Determine which backend to use: prefer Google Maps when key+client available,
-            # otherwise attempt OpenStreetMap via geopy as a fallback and show clear admin guidance.
-            distance_info = None
-            api_key = settings.GOOGLE_MAPS_API_KEY
-            can_use_google = bool(api_key) and api_key.strip() != '' and _googlemaps is not None
-
-            if can_use_google:
-                # Use Google Maps for geocoding and distance calculations
-                if not is_within_india(source, destination):
-                    api_error = "Route not found — the finder only supports routes within India (Google geocoding failed)."
-                else:
-                    distance_info = get_distance_from_api(source, destination)
-                    if distance_info is None:
-                        api_error = (
-                            "Could not calculate distance using Google Maps. "
-                            "Verify `GOOGLE_MAPS_API_KEY`, billing, and that the `googlemaps` package is installed."
-                        )
-            else:
-                # Try geopy/OpenStreetMap fallback if available
-                if _geopy:
-                    # When Google is not available, we can't reliably assert India-membership.
-                    # Use OSM geocoding/distance and warn the user about reduced coverage/accuracy.
-                    distance_info = get_distance_from_api(source, destination)
-                    if distance_info is None:
-                        api_error = (
-                            "Could not calculate distance using OpenStreetMap fallback. "
-                            "For full India coverage and more accurate routing, set `GOOGLE_MAPS_API_KEY` and install `googlemaps`."
-                        )
-                    else:
-                        # Inform admin/user that fallback was used (non-blocking)
-                        if distance_info.get('fallback') == 'osm' or distance_info.get('mock'):
-                            api_info = (
-                                "Using OpenStreetMap fallback (geopy) — results may be less accurate than Google Maps. "
-                                "To enable Google Maps routing across India, set `GOOGLE_MAPS_API_KEY` and install `googlemaps`."
-                            )
-                else:
-                    # Neither Google nor geopy available: actionable admin message
-                    api_error = (
-                        "This route finder requires either a configured Google Maps API key with the `googlemaps` client, "
-                        "or the `geopy` package for an OpenStreetMap fallback.\n\n"
-                        "Please set `GOOGLE_MAPS_API_KEY` in settings (or as an environment variable) and install the dependencies:\n\n"
-                        "pip install googlemaps geopy\n\n"
-                        "Or set `GOOGLE_MAPS_API_KEY` only and install `googlemaps` for full routing coverage across India."
-                    )
-
-                if distance_info is None:
-                    api_error = "Could not calculate distance. Please enter valid locations or check your Google Maps API key."
-                else:
-                    # Warn when using mock data (no Google API key or client)
-                    if distance_info.get('mock'):
-                        api_info = "Using mock distances (no Google Maps API key configured). Results may be inaccurate — set `GOOGLE_MAPS_API_KEY` in settings for accurate calculations."
-                    distance_km = distance_info.get('distance_km')
-                    google_durations = distance_info.get('durations') or {}
-                    # Use AI Logic to get recommendations (pass Google per-mode durations)
-                    best_option = GreenTravelAI.get_best_recommendation(distance_km, google_durations, passenger_count)
-                    all_recommendations = GreenTravelAI.calculate_recommendations(distance_km, google_durations, passenger_count)
-
-                    if best_option:
-                        # Calculate CO2 saved compared to flight
-                        co2_saved = GreenTravelAI.compare_with_flight(best_option, distance_km)
-
-                        # Generate eco-friendly message
-                        eco_message = GreenTravelAI.get_eco_message(
-                            best_option['green_score'], 
-                            best_option['transport'], 
-                            distance_km
-                        )
-
-                        travel_result = {
-                            'source': source,
-                            'destination': destination,
-                            'distance_km': distance_km,
-                            'passenger_count': passenger_count,
-                            'recommended': best_option['transport'],
-                            'green_score': best_option['green_score'],
-                            'co2_estimated_kg': best_option['emission_kg'],
-                            'co2_per_person_kg': best_option.get('emission_per_person_kg'),
-                            'co2_saved_kg': co2_saved,
-                            'eco_message': eco_message,
-                            'all_recommendations': all_recommendations,
-                            'estimated_time': best_option.get('duration_text'),
-                            'estimated_cost_inr': best_option.get('cost_inr'),
-                            'cost_per_person_inr': best_option.get('cost_per_person_inr'),
-                        }
-
-                        # Store record in database
-                        try:
-                            rec = TravelRecord.objects.create(
-                                user=request.user if request.user.is_authenticated else None,
-                                source=source,
-                                destination=destination,
-                                distance_km=distance_km,
-                                passenger_count=passenger_count,
-                                selected_travel_type=user_choice or '',
-                                recommended_transport=best_option['transport'],
-                                co2_estimated_kg=best_option['emission_kg'],
-                                co2_saved_kg=co2_saved,
-                            )
-                            rec.save()
-                        except Exception as e:
-                            # Don't block on DB errors
-                            print(f"Database Error: {e}")
-    
+            distance_info, api_error, api_info = resolve_route(source, destination)
+            if distance_info is not None:
+                travel_result = build_travel_result(source, destination, distance_info, passenger_count)
+                if travel_result:
+                    save_travel_record(request.user, travel_result, travel_form.cleaned_data.get('travel_type'))
+
+    return render_index(request, travel_form, travel_result, api_error, api_info)
+
+
+def render_index(request, travel_form, travel_result=None, api_error=None, api_info=None):
+    """Render the index page: destination browsing plus the route finder"""
+    # Keep the old recommendation form support for destination browsing
+    form = RecommendationForm(request.GET or None)
     context = {
         'form': form,
-        'recommendations': recommendations,
+        'browse_html': render_browse_results(request, form),
         'travel_form': travel_form,
         'travel_result': travel_result,
         'api_error': api_error,
         'api_info': api_info,
     }
-    
-    return render(request, 'recommendations/index.html', context)
+
+    with stage('render'):
+        return render(request, 'recommendations/index.html', context)
+
+
+def render_browse_results(request, form):
+    """
+    Destination browse results as an HTML fragment, cached per normalized
+    filters and catalog version (catalog.py), so repeat searches skip SQL and
+    template rendering until a Destination changes. Pagination links are
+    built from the normalized filters too, since the cached HTML is shared by
+    every equivalent query.
+    """
+    recommendations = []
+    page_obj = None
+    cache_key = None
+    params = browse_params(request.GET)
+    if form.is_valid():
+        cache_key = page_key('browse', params)
+        cached = page_cache().get(cache_key)
+        if cached is not None:
+            return cached
+        max_carbon = form.cleaned_data.get('max_carbon')
+        transport = form.cleaned_data.get('transport')
+        tags_raw = form.cleaned_data.get('tags')
+        tags = [t.strip().lower() for t in tags_raw.split(',') if t.strip()] if tags_raw else []
+
+        # Filter, tag-match count and ranking run as one SQL query over the
+        # normalized Tag/TransportMode tables
+        qs = Destination.objects.all()
+        if max_carbon is not None:
+            qs = qs.filter(carbon_score__lte=max_carbon)
+        if transport:
+            qs = qs.filter(transport_items__name=transport.lower())
+        if tags:
+            qs = qs.annotate(tag_score=Count('tag_items', filter=Q(tag_items__name__in=tags), distinct=True))
+        else:
+            qs = qs.annotate(tag_score=Value(0, output_field=IntegerField()))
+        # lower computed score is better, then more tag matches
+        qs = qs.annotate(rank=F('carbon_score') - F('tag_score') * 5).order_by('rank', '-tag_score', 'pk')
+
+        paginator = Paginator(qs, getattr(settings, 'DESTINATIONS_PER_PAGE', 20))
+        page_obj = paginator.get_page(request.GET.get('page'))
+        recommendations = page_obj.object_list
+
+    filter_query = urlencode([(name, value) for name, value in params.items() if name != 'page'])
+    html = render_to_string(
+        'recommendations/browse_results.html',
+        {'recommendations': recommendations, 'page_obj': page_obj, 'filter_query': filter_query},
+        request,
+    )
+    if cache_key is not None:
+        page_cache().set(cache_key, html, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+    return html
+
+
+def _offloaded(func):
+    """
+    Run a blocking lookup (geocoding/routing HTTP, cache DB tier) on a worker
+    thread so it doesn't block the event loop. Worker threads are outside the
+    request cycle, so they release their DB connection themselves.
+    """
+    def call(*args):
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False)
+
+
+async def aresolve_route(source, destination):
+    """
+    Async resolve_route: the distance lookup and (for Google) both country
+    geocodes run concurrently under one per-request deadline. Identical
+    routes requested concurrently on this event loop share one resolution.
+    """
+    key = (route_backend(), normalize_place(source), normalize_place(destination))
+    return await route_flight.ado(key, lambda: _aresolve_route(source, destination))
+
+
+async def _aresolve_route(source, destination):
+    backend = route_backend()
+    if backend is None:
+        return route_outcome(backend, None)
+
+    lookups = [_offloaded(get_distance_from_api)(source, destination)]
+    if backend == 'google':
+        lookups.append(_offloaded(get_country_for_place)(source))
+        lookups.append(_offloaded(get_country_for_place)(destination))
+    deadline = getattr(settings, 'ROUTE_LOOKUP_DEADLINE_SECONDS', 12)
+    try:
+        results = await asyncio.wait_for(asyncio.gather(*lookups, return_exceptions=True), timeout=deadline)
+    except asyncio.TimeoutError:
+        return None, ROUTE_MESSAGES['timeout'], None
+
+    results = [None if isinstance(r, Exception) else r for r in results]
+    distance_info, countries = results[0], results[1:]
+    in_india = all(str(c or '').upper() == 'IN' for c in countries)
+    return route_outcome(backend, distance_info, in_india)
+
+
+async def recommend_async(request):
+    """
+    Async route finder (same page and results as `recommend`).
+    Geocoding and routing run concurrently off the event loop; browsing
+    and rendering stay on the sync ORM path.
+    """
+    if request.method != 'POST':
+        return await sync_to_async(recommend)(request)
+
+    travel_form = TravelInputForm(request.POST)
+    travel_result = None
+    api_error = None
+    api_info = None
+
+    user = await request.auser()
+    if travel_form.is_valid():
+        if not user.is_authenticated:
+            api_error = "Please log in to use the route finder."
+        else:
+            source = travel_form.cleaned_data['source']
+            destination = travel_form.cleaned_data['destination']
+            passenger_count = int(travel_form.cleaned_data.get('passenger_count') or 1)
+
+            distance_info, api_error, api_info = await aresolve_route(source, destination)
+            if distance_info is not None:
+                travel_result = build_travel_result(source, destination, distance_info, passenger_count)
+                if travel_result:
+                    await sync_to_async(save_travel_record)(user, travel_result, travel_form.cleaned_data.get('travel_type'))
+
+    return await sync_to_async(render_index)(request, travel_form, travel_result, api_error, api_info)
+
+
+def _batch_pairs(payload):
+    """(source, destination) tuples from a batch body; ValueError on a malformed one"""
+    if not isinstance(payload, dict):
+        raise ValueError
+    if 'pairs' in payload:
+        if not isinstance(payload['pairs'], list):
+            raise ValueError
+        pairs = []
+        for pair in payload['pairs']:
+            # A bare string would unpack character by character ("ab" -> a, b)
+            if isinstance(pair, dict):
+                pair = (pair.get('source'), pair.get('destination'))
+            if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+                raise ValueError
+            pairs.append(pair)
+    else:
+        origins, destinations = payload.get('origins', []), payload.get('destinations', [])
+        if not isinstance(origins, list) or not isinstance(destinations, list):
+            raise ValueError
+        pairs = [(o, d) for o in origins for d in destinations]
+    if not all(isinstance(place, str) and place.strip() for pair in pairs for place in pair):
+        raise ValueError
+    return [(source.strip(), destination.strip()) for source, destination in pairs]
+
+
+@csrf_exempt
+@require_POST
+@api_key_required
+def batch_recommend(request):
+    """
+    Score many routes in one request (API key auth, for scheduled jobs).
+    JSON body: {"pairs": [["Delhi", "Agra"], ...]} (or pairs as
+    {"source": ..., "destination": ...}) or {"origins": [...],
+    "destinations": [...]} (every combination), plus an optional
+    "passengers" count. Returns {"results": [...]} in input order.
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+        passengers = int(payload.get('passengers') or 1)
+        pairs = _batch_pairs(payload)
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Expected a JSON body with "pairs" (each [source, destination]) or "origins"/"destinations".'}, status=400)
+
+    max_pairs = getattr(settings, 'BATCH_MAX_PAIRS', 2000)
+    if not 1 <= passengers <= 20:
+        return JsonResponse({'error': 'passengers must be between 1 and 20.'}, status=400)
+    if not pairs:
+        return JsonResponse({'error': 'No routes given.'}, status=400)
+    if len(pairs) > max_pairs:
+        return JsonResponse({'error': f'At most {max_pairs} routes per request.'}, status=400)
+
+    return JsonResponse({'results': evaluate_pairs(pairs, passengers=passengers)})
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'HEAD', 'POST'])
+@rate_limited
+def recommend_api(request):
+    """
+    Route recommendations as JSON, for apps and partner integrations.
+    GET params or a JSON/form POST body: source and destination, or a raw
+    distance_km, plus optional passengers (1-20). Looking up a route by place
+    uses the paid Maps APIs, so it needs an API key; anonymous callers may
+    only send distance_km. Rate limited per client. Touches no session, CSRF
+    token or template, so it can be served by API-only workers.
+    """
+    params = request.GET
+    if request.method == 'POST':
+        if request.content_type == 'application/json':
+            try:
+                params = json.loads(request.body or b'{}')
+            except ValueError:
+                params = None
+            if not isinstance(params, dict):
+                return json_response(request, {'error': 'Expected a JSON object body.'}, status=400)
+        else:
+            params = request.POST
+
+    try:
+        passengers = int(params.get('passengers') or 1)
+        raw_distance = params.get('distance_km')
+        distance_km = float(raw_distance) if raw_distance not in (None, '') else None
+    except (TypeError, ValueError):
+        return json_response(request, {'error': 'passengers must be an integer and distance_km a number.'}, status=400)
+    source = str(params.get('source') or '').strip()
+    destination = str(params.get('destination') or '').strip()
+    if not 1 <= passengers <= 20:
+        return json_response(request, {'error': 'passengers must be between 1 and 20.'}, status=400)
+
+    api_info = None
+    if distance_km is not None:
+        if not math.isfinite(distance_km) or not 0 < distance_km <= getattr(settings, 'RECOMMEND_API_MAX_DISTANCE_KM', 20000):
+            return json_response(request, {'error': 'distance_km is out of range.'}, status=400)
+        distance_info = {'distance_km': distance_km}
+    elif not source or not destination:
+        return json_response(request, {'error': 'Give source and destination, or distance_km.'}, status=400)
+    elif request.api_client is None:
+        return unauthorized('Route lookups by place need an API key; anonymous callers can send distance_km.')
+    elif len(source) > 200 or len(destination) > 200:
+        return json_response(request, {'error': 'source and destination are limited to 200 characters.'}, status=400)
+    else:
+        distance_info, api_error, api_info = resolve_route(source, destination)
+        if distance_info is None:
+            status = 422 if api_error == ROUTE_MESSAGES['outside_india'] else 502
+            return json_response(request, {'error': api_error}, status=status)
+        distance_km = distance_info['distance_km']
+
+    with stage('score'):
+        recommendations = GreenTravelAI.calculate_recommendations(
+            distance_km, distance_info.get('durations') or {}, passengers,
+        )
+        best = recommendations[0] if recommendations else None
+        result = {
+            'source': source or None,
+            'destination': destination or None,
+            'distance_km': distance_km,
+            'passengers': passengers,
+            'factor_version': GreenTravelAI.FACTOR_VERSION,
+            'estimated': bool(distance_info.get('mock')),
+            'notice': api_info,
+            'recommended': best['transport'] if best else None,
+            'co2_saved_kg': GreenTravelAI.compare_with_flight(best, distance_km) if best else 0,
+            'recommendations': recommendations,
+        }
+    # Mock distances are placeholders; don't let clients hold on to them
+    max_age = 0 if result['estimated'] else getattr(settings, 'RECOMMEND_API_MAX_AGE', 300)
+    response = json_response(request, result, max_age=max_age, private=request.api_client is not None)
+    # Keyed and anonymous callers get different answers for the same URL
+    patch_vary_headers(response, ('Authorization', 'X-API-Key'))
+    return response
+
+
+def nearby(request):
+    """
+    Green destinations within `radius_km` of an origin, as JSON.
+    GET params: origin (place name) or lat/lng, radius_km (default 300),
+    limit (default 20), optional max_carbon and passengers.
+    """
+    try:
+        radius_km = min(float(request.GET.get('radius_km') or 300), 5000.0)
+        limit = max(1, min(int(request.GET.get('limit') or 20), 100))
+        passengers = max(1, min(int(request.GET.get('passengers') or 1), 20))
+        max_carbon = request.GET.get('max_carbon')
+        max_carbon = int(max_carbon) if max_carbon not in (None, '') else None
+        if request.GET.get('lat') and request.GET.get('lng'):
+            lat, lng = float(request.GET['lat']), float(request.GET['lng'])
+        else:
+            origin = (request.GET.get('origin') or '').strip()
+            if not origin:
+                return JsonResponse({'error': 'Give an origin or lat/lng.'}, status=400)
+            coords = get_gazetteer().coordinates(origin)
+            if coords is None and not getattr(settings, 'OFFLINE_ROUTING', False):
+                place = geocode_place(origin)
+                coords = (place['lat'], place['lng']) if place else None
+            if coords is None:
+                return JsonResponse({'error': 'Origin not found.'}, status=404)
+            lat, lng = coords
+    except ValueError:
+        return JsonResponse({'error': 'Invalid number in query parameters.'}, status=400)
+    if not all(math.isfinite(v) for v in (radius_km, lat, lng)) or radius_km <= 0:
+        return JsonResponse({'error': 'radius_km must be positive and lat/lng finite numbers.'}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JsonResponse({'error': 'lat must be within [-90, 90] and lng within [-180, 180].'}, status=400)
+
+    results = nearby_destinations(lat, lng, radius_km, limit=limit, max_carbon=max_carbon, passengers=passengers)
+    return JsonResponse({
+        'origin': {'lat': lat, 'lng': lng},
+        'radius_km': radius_km,
+        'results': [
+            {
+                'id': r['destination'].pk,
+                'name': r['destination'].name,
+                'country': r['destination'].country,
+                'carbon_score': r['destination'].carbon_score,
+                'distance_km': r['distance_km'],
+                'trip_km': r['trip_km'],
+                'recommended': r['recommended'],
+                'co2_kg': r['co2_kg'],
+            }
+            for r in results
+        ],
+    })
 
 
 def signup(request):
@@ -403,24 +690,87 @@ def signup(request):
     return render(request, 'registration/signup.html', {'form': form})
 
 
+@cache_anonymous_page
 def about(request):
     return render(request, 'recommendations/about.html')
 
 
 @login_required
 def history(request):
-    # Show recent records for the logged-in user and total CO2 saved
-    records = TravelRecord.objects.filter(user=request.user).order_by('-created_at')[:200]
-    total_saved = records.aggregate(total=Sum('co2_saved_kg'))['total'] or 0.0
-    total_emitted = records.aggregate(total=Sum('co2_estimated_kg'))['total'] or 0.0
+    # Show the logged-in user's records a page at a time (keyset cursor); totals come from the precomputed summary
+    # Include a just-submitted trip that is still in the write-behind queue
+    record_writer.flush_user(request.user.pk)
+    records = TravelRecord.objects.filter(user=request.user).only(
+        'source', 'destination', 'distance_km', 'recommended_transport', 'co2_estimated_kg', 'created_at',
+    )
+    cursor = request.GET.get('cursor')
+    try:
+        records, next_cursor = keyset_page(records, cursor, getattr(settings, 'HISTORY_PAGE_SIZE', 50))
+    except ValueError:
+        return redirect('recommendations:history')
+    summary = summary_for_user(request.user)
     context = {
         'records': records,
-        'total_saved_kg': round(total_saved, 2),
-        'total_emitted_kg': round(total_emitted, 2),
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
+        'total_saved_kg': summary['total_saved_kg'],
+        'total_emitted_kg': summary['total_emitted_kg'],
+        'trip_count': summary['trip_count'],
+        'mode_summaries': summary['modes'],
     }
     return render(request, 'recommendations/history.html', context)
 
 
+HISTORY_API_FIELDS = (
+    'id', 'source', 'destination', 'distance_km', 'passenger_count', 'selected_travel_type',
+    'recommended_transport', 'co2_estimated_kg', 'co2_saved_kg', 'created_at',
+)
+
+
+def history_api(request):
+    """
+    The logged-in user's travel records as JSON, newest first.
+    GET params: cursor (from the previous page's next_cursor) and limit
+    (default HISTORY_PAGE_SIZE, max 500). Every page costs the same.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required.'}, status=401)
+    record_writer.flush_user(request.user.pk)
+    try:
+        limit = max(1, min(int(request.GET.get('limit') or getattr(settings, 'HISTORY_PAGE_SIZE', 50)), 500))
+        rows, next_cursor = keyset_page(
+            TravelRecord.objects.filter(user=request.user).values(*HISTORY_API_FIELDS),
+            request.GET.get('cursor'),
+            limit,
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or limit.'}, status=400)
+    return JsonResponse({'results': rows, 'next_cursor': next_cursor})
+
+
+@staff_member_required
+def export_travel_records(request):
+    """
+    Stream TravelRecord rows for reporting (staff only).
+    GET params: format (csv, parquet, arrow), user (id), start/end
+    (YYYY-MM-DD, inclusive) and transport.
+    """
+    fmt = request.GET.get('format') or 'csv'
+    if fmt not in available_formats():
+        return JsonResponse({'error': f'Unsupported format; available: {", ".join(available_formats())}.'}, status=400)
+    try:
+        user_id = int(request.GET['user']) if request.GET.get('user') else None
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid user id or date (expected YYYY-MM-DD).'}, status=400)
+
+    rows = export_queryset(user_id, start, end, request.GET.get('transport') or None)
+    response = StreamingHttpResponse(stream_export(rows, fmt), content_type=EXPORT_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="travel_records.{fmt}"'
+    return response
+
+
 @login_required
 def profile(request):
     # Edit or view personal profile information